@@ -15,26 +15,126 @@ except ImportError:
     # Missing dependencies are handled elsewhere.
     pass
 
+from collections import OrderedDict
 import base64
+import datetime
 import hashlib
+import threading
 
+# The maximum number of parsed certificates to keep in the cache.
+CERT_CACHE_SIZE = 4096
 
-def load_cert(cert):
-    parsed_cert = base64.b64decode(cert).decode('utf8')
-    return x509.load_pem_x509_certificate(parsed_cert.encode('utf8'), default_backend())
+# The maximum number of indexed certificate revocation lists to keep in the cache.
+CRL_CACHE_SIZE = 64
 
+# The DER encoded OID for the CRL number extension (2.5.29.20).
+CRL_NUMBER_OID = b'\x55\x1d\x14'
 
-def load_certs(certs):
+
+class ParsedCertificate:
+
+    def __init__(self, cert, fingerprint, pem, ski, aki):
+        self.cert = cert
+        self.fingerprint = fingerprint
+        self.pem = pem
+        self.ski = ski
+        self.aki = aki
+
+    def is_root(self):
+        return self.aki is None or self.ski == self.aki
+
+    def get_validity(self):
+        # Newer versions of the cryptography module deprecate the naive datetime
+        # properties in favour of timezone aware ones.
+        if hasattr(self.cert, 'not_valid_after_utc'):
+            return (self.cert.not_valid_before_utc, self.cert.not_valid_after_utc)
+        not_valid_before = self.cert.not_valid_before.replace(tzinfo=datetime.timezone.utc)
+        not_valid_after = self.cert.not_valid_after.replace(tzinfo=datetime.timezone.utc)
+        return (not_valid_before, not_valid_after)
+
+
+class CertificateCache:
+
+    def __init__(self, max_size=CERT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pem):
+
+        # The cache is keyed by a hash of the PEM exactly as it was passed in,
+        # so that we can find previously parsed certificates without parsing.
+        key = hashlib.sha256(pem).digest()
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse the certificate outside of the lock, as this is the expensive bit.
+        entry = _parse_cert(pem)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+cert_cache = CertificateCache()
+
+
+def _parse_cert(pem):
+    cert = x509.load_pem_x509_certificate(pem, default_backend())
+    fingerprint = hashlib.sha256(cert.public_bytes(Encoding.DER)).hexdigest()
+    # Load and save the certificate. This will format the certificate
+    # as per the cryptography module rules, rather than whatever it was
+    # passed in as - this is needed so we can compare certificates.
+    normalized_pem = base64.b64encode(cert.public_bytes(Encoding.PEM)).decode('utf8')
+    return ParsedCertificate(cert, fingerprint, normalized_pem, get_ski_for_cert(cert), get_aki_for_cert(cert))
+
+
+def _split_pem_certs(certs):
     parsed_certs = base64.b64decode(certs).decode('utf8').split('-----END CERTIFICATE-----\n')
     result = list()
     for parsed_cert in parsed_certs:
         if not parsed_cert.strip():
             continue
         parsed_cert += '-----END CERTIFICATE-----\n'
-        result.append(x509.load_pem_x509_certificate(parsed_cert.encode('utf8'), default_backend()))
+        result.append(parsed_cert.encode('utf8'))
     return result
 
 
+def get_parsed_cert(cert):
+    return cert_cache.get(base64.b64decode(cert))
+
+
+def get_parsed_certs(certs):
+    return [cert_cache.get(pem) for pem in _split_pem_certs(certs)]
+
+
+def load_cert(cert):
+    return get_parsed_cert(cert).cert
+
+
+def load_certs(certs):
+    return [parsed_cert.cert for parsed_cert in get_parsed_certs(certs)]
+
+
+def get_cert_fingerprint(cert):
+    return get_parsed_cert(cert).fingerprint
+
+
 def get_ski_for_cert(cert):
     result = None
     try:
@@ -58,15 +158,11 @@ def get_aki_for_cert(cert):
 def split_ca_chain(chain):
     root_certs = list()
     intermediate_certs = list()
-    certs = load_certs(chain)
-    for cert in certs:
-        ski = get_ski_for_cert(cert)
-        aki = get_aki_for_cert(cert)
-        serialized_cert = base64.b64encode(cert.public_bytes(Encoding.PEM)).decode('utf8')
-        if aki is None or ski == aki:
-            root_certs.append(serialized_cert)
+    for parsed_cert in get_parsed_certs(chain):
+        if parsed_cert.is_root():
+            root_certs.append(parsed_cert.pem)
         else:
-            intermediate_certs.append(serialized_cert)
+            intermediate_certs.append(parsed_cert.pem)
     return (root_certs, intermediate_certs)
 
 
@@ -75,25 +171,183 @@ def load_crl(crl):
     return x509.load_pem_x509_crl(parsed_crl, default_backend())
 
 
+class CrlIndex:
+
+    def __init__(self, fingerprint, der, issuer, crl_number, revoked_start, revoked_end):
+        self.fingerprint = fingerprint
+        self.der = der
+        self.issuer = issuer
+        self.crl_number = crl_number
+        self.revoked_start = revoked_start
+        self.revoked_end = revoked_end
+        self._serials = None
+
+    @property
+    def serials(self):
+        # The serial numbers are only extracted on demand, as most comparisons
+        # can be answered from the fingerprint or CRL number alone.
+        if self._serials is None:
+            data = memoryview(self.der)
+            serials = set()
+            entry = self.revoked_start
+            while entry < self.revoked_end:
+                (_, serial, entry_end) = _read_der_header(data, entry)
+                (_, serial_start, serial_end) = _read_der_header(data, serial)
+                serials.add(int.from_bytes(data[serial_start:serial_end], 'big', signed=True))
+                entry = entry_end
+            self._serials = frozenset(serials)
+        return self._serials
+
+    def same_crl_number(self, other):
+        # CRL numbers are monotonically increasing per issuer (RFC 5280), so
+        # the same issuer and CRL number means the same set of revoked serials.
+        return self.crl_number is not None and self.crl_number == other.crl_number and self.issuer == other.issuer
+
+
+class CrlCache:
+
+    def __init__(self, max_size=CRL_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, der):
+        key = hashlib.sha256(der).hexdigest()
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+        entry = _index_crl(key, der)
+        with self.lock:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+crl_cache = CrlCache()
+
+
+def _read_der_header(data, offset):
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        length_bytes = length & 0x7f
+        length = int.from_bytes(data[offset:offset + length_bytes], 'big')
+        offset += length_bytes
+    return (tag, offset, offset + length)
+
+
+def _crl_pem_to_der(crl):
+    pem = base64.b64decode(crl)
+    start = pem.find(b'-----BEGIN X509 CRL-----')
+    end = pem.find(b'-----END X509 CRL-----')
+    if start == -1 or end == -1:
+        raise Exception('Invalid certificate revocation list, expected a PEM encoded X509 CRL')
+    return base64.b64decode(b''.join(pem[start + 24:end].split()))
+
+
+def _index_crl(fingerprint, der):
+
+    # Walk the DER encoding of the TBSCertList directly, rather than loading
+    # it with the cryptography module; this avoids building a Python object
+    # for every revoked certificate, which is slow for large CRLs.
+    data = memoryview(der)
+    (_, offset, _) = _read_der_header(data, 0)
+    (_, offset, tbs_end) = _read_der_header(data, offset)
+
+    # Skip the version (optional) and signature algorithm.
+    (tag, _, end) = _read_der_header(data, offset)
+    if tag == 0x02:
+        (_, _, end) = _read_der_header(data, end)
+    offset = end
+
+    # Grab the issuer, and skip this update and next update (optional).
+    (_, _, end) = _read_der_header(data, offset)
+    issuer = bytes(data[offset:end])
+    (_, _, offset) = _read_der_header(data, end)
+    if offset < tbs_end and data[offset] in (0x17, 0x18):
+        (_, _, offset) = _read_der_header(data, offset)
+
+    # Find the revoked certificates (optional), but don't extract them yet.
+    revoked_start = revoked_end = 0
+    if offset < tbs_end and data[offset] == 0x30:
+        (_, revoked_start, revoked_end) = _read_der_header(data, offset)
+        offset = revoked_end
+
+    # Look for the CRL number in the extensions (optional).
+    crl_number = None
+    if offset < tbs_end and data[offset] == 0xa0:
+        (_, offset, _) = _read_der_header(data, offset)
+        (_, extension, extensions_end) = _read_der_header(data, offset)
+        while extension < extensions_end:
+            (_, field, extension_end) = _read_der_header(data, extension)
+            (_, oid_start, field) = _read_der_header(data, field)
+            if data[oid_start:field] == CRL_NUMBER_OID:
+                (tag, _, value_end) = _read_der_header(data, field)
+                if tag == 0x01:
+                    field = value_end
+                (_, value, _) = _read_der_header(data, field)
+                (_, number_start, number_end) = _read_der_header(data, value)
+                crl_number = int.from_bytes(data[number_start:number_end], 'big', signed=True)
+                break
+            extension = extension_end
+
+    return CrlIndex(fingerprint, der, issuer, crl_number, revoked_start, revoked_end)
+
+
+def get_crl_index(crl):
+    return crl_cache.get(_crl_pem_to_der(crl))
+
+
+def get_crl_indexes(crl):
+    return [get_crl_index(entry) for entry in crl]
+
+
+def get_revoked_serials(crl):
+    result = set()
+    for index in get_crl_indexes(crl):
+        result.update(index.serials)
+    return result
+
+
 def hash_crl(crl):
     m = hashlib.sha256()
     m.update(str(len(crl)).encode('utf-8'))
-    for entry in crl:
-        loaded_crl = load_crl(entry)
-        m.update(str(len(loaded_crl)).encode('utf-8'))
-        for revoked_cert in loaded_crl:
-            m.update(str(revoked_cert.serial_number).encode('utf-8'))
+    for index in get_crl_indexes(crl):
+        m.update(str(len(index.serials)).encode('utf-8'))
+        for serial in sorted(index.serials):
+            m.update(str(serial).encode('utf-8'))
     return m.hexdigest()
 
 
 def equal_crls(crl1, crl2):
-    return hash_crl(crl1) == hash_crl(crl2)
+    if len(crl1) != len(crl2):
+        return False
+    for (entry1, entry2) in zip(crl1, crl2):
+        if entry1 == entry2:
+            continue
+        index1 = get_crl_index(entry1)
+        index2 = get_crl_index(entry2)
+        if index1.fingerprint == index2.fingerprint or index1.same_crl_number(index2):
+            continue
+        if index1.serials != index2.serials:
+            return False
+    return True
+
+
+def diff_crls(crl1, crl2):
+    # Returns the serial numbers revoked in crl2 but not crl1, and vice versa.
+    serials1 = get_revoked_serials(crl1)
+    serials2 = get_revoked_serials(crl2)
+    return (serials2 - serials1, serials1 - serials2)
 
 
 def normalize_whitespace(cert):
-    # Load and save the certificate. This will format the certificate
-    # as per the cryptography module rules, rather than whatever it was
-    # passed in as - this is needed so we can compare certificates.
-    loaded_cert = load_cert(cert)
-    pem = loaded_cert.public_bytes(Encoding.PEM)
-    return base64.b64encode(pem).decode('utf-8')
+    return get_parsed_cert(cert).pem
@@ -10,6 +10,7 @@ __metaclass__ = type
 from ansible.module_utils.urls import open_url
 
 from .enrolled_identities import EnrolledIdentity
+from .health_utils import HEALTHZ_PROBE_TIMEOUT, wait_for_healthz
 from .pkcs11.crypto import PKCS11Crypto
 
 try:
@@ -112,23 +113,11 @@ class CertificateAuthority:
             imported=data['imported']
         )
 
-    def wait_for(self, timeout):
-        started = False
-        last_e = None
-        for x in range(timeout):
-            try:
-                url = urllib.parse.urljoin(self.operations_url, '/healthz')
-                response = open_url(url, None, None, method='GET', validate_certs=False, follow_redirects='all')
-                if response.code == 200:
-                    healthz = json.load(response)
-                    if healthz['status'] == 'OK':
-                        started = True
-                        break
-            except Exception as e:
-                last_e = e
-            time.sleep(1)
-        if not started:
-            raise Exception(f'Certificate authority failed to start within {timeout} seconds: {str(last_e)}')
+    def wait_for(self, timeout, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
+        timeline = wait_for_healthz([(self.name, self.operations_url)], timeout, probe_timeout=probe_timeout)
+        if not timeline[0]['ready']:
+            raise Exception(f'Certificate authority failed to start within {timeout} seconds: {timeline[0]["error"]}')
+        return timeline
 
     def connect(self, module, hsm, tls=False):
         return CertificateAuthorityConnection(module, self, hsm, tls)
@@ -0,0 +1,187 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from .file_utils import get_private_cache_dir
+from .proto_utils import WIRE_TYPE_LENGTH_DELIMITED, iterate_fields
+
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+import threading
+
+# The size, in bytes, of each chunk read when hashing a chaincode package.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The maximum number of chaincode packages to remember the package IDs of.
+PACKAGE_CACHE_SIZE = 100
+
+
+def hash_file(file, hasher, length=None):
+
+    # Feed the file (or the next length bytes of it) into the hasher, one chunk at a time.
+    while length is None or length > 0:
+        chunk = file.read(HASH_CHUNK_SIZE if length is None else min(HASH_CHUNK_SIZE, length))
+        if not chunk:
+            break
+        hasher.update(chunk)
+        if length is not None:
+            length -= len(chunk)
+    if length:
+        raise Exception('Unexpected end of file')
+    return hasher
+
+
+def get_package_label(path):
+
+    # Fabric v2.x chaincode packages are tar files containing a small metadata.json
+    # file and a large code.tar.gz file. Stop reading as soon as we find the metadata,
+    # rather than reading the member list of the whole package.
+    with tarfile.open(path, 'r') as tar:
+        for member in tar:
+            if member.name == 'metadata.json':
+                metadata = json.load(tar.extractfile(member))
+                return metadata['label']
+    raise Exception(f'The chaincode package {path} does not contain metadata.json')
+
+
+def compute_package_id(path):
+
+    # The package ID is the label and the SHA-256 hash of the whole package.
+    label = get_package_label(path)
+    with open(path, 'rb') as file:
+        hash = hash_file(file, hashlib.sha256()).hexdigest()
+    return dict(label=label, package_id=f'{label}:{hash}')
+
+
+def compute_chaincode_deployment_spec_id(path):
+
+    # Fabric v1.4 chaincode packages are ChaincodeDeploymentSpec messages, where the
+    # chaincode ID is computed from the hash of the code package and the name and version.
+    # Parse the message directly from the file, so that the code package is hashed in
+    # chunks rather than being decoded into memory.
+    name = None
+    version = None
+    code_package_hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for (field_number, wire_type, value) in iterate_fields(file):
+            if wire_type != WIRE_TYPE_LENGTH_DELIMITED:
+                continue
+            elif field_number == 1:
+                # ChaincodeSpec, which contains the ChaincodeID in field 2.
+                for (spec_field_number, spec_wire_type, spec_value) in iterate_fields(file, file.tell() + value):
+                    if spec_field_number != 2 or spec_wire_type != WIRE_TYPE_LENGTH_DELIMITED:
+                        continue
+                    for (id_field_number, id_wire_type, id_value) in iterate_fields(file, file.tell() + spec_value):
+                        if id_wire_type != WIRE_TYPE_LENGTH_DELIMITED:
+                            continue
+                        elif id_field_number == 2:
+                            name = file.read(id_value).decode('utf-8')
+                        elif id_field_number == 3:
+                            version = file.read(id_value).decode('utf-8')
+            elif field_number == 3:
+                # The code package.
+                hash_file(file, code_package_hasher, value)
+    if name is None or version is None:
+        raise Exception(f'The chaincode package {path} does not contain a chaincode name and version')
+    hasher = hashlib.sha256(name.encode('utf-8'))
+    hasher.update(version.encode('utf-8'))
+    metadata_hash = hasher.digest()
+    hasher = hashlib.sha256(code_package_hasher.digest())
+    hasher.update(metadata_hash)
+    return dict(name=name, version=version, id=hasher.hexdigest())
+
+
+def fingerprint_file(path):
+
+    # A cheap fingerprint of the file for cache keys: the identity, modification
+    # time, and size of the file, and a hash of its first and last chunks. This
+    # catches a package that is rebuilt in place with the same size and timestamp
+    # (for example, by a reproducible build), without hashing the whole file.
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        hasher = hashlib.sha256(file.read(HASH_CHUNK_SIZE))
+        if stat.st_size > HASH_CHUNK_SIZE:
+            file.seek(max(HASH_CHUNK_SIZE, stat.st_size - HASH_CHUNK_SIZE))
+            hasher.update(file.read(HASH_CHUNK_SIZE))
+    return [stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size, hasher.hexdigest()]
+
+
+class PackageCache:
+
+    # Remembers the IDs computed for chaincode packages, keyed by the path and fingerprint of
+    # the package, so that large packages are not hashed again by every task that uses them.
+    # The cache is persisted to a file in a private cache directory, as each Ansible task runs
+    # in a new process; if no path is given and the cache directory cannot be used, the cache
+    # is kept in memory.
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.packages = None
+
+    def _load(self):
+        if self.packages is not None:
+            return
+        self.packages = dict()
+        if self.path is None:
+            try:
+                self.path = os.path.join(get_private_cache_dir(), 'package-ids.json')
+            except Exception:
+                self.path = False
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as file:
+                packages = json.load(file)
+            if isinstance(packages, dict):
+                self.packages = packages
+        except Exception:
+            # Missing or corrupt cache is not fatal, we just start again.
+            pass
+
+    def get(self, path, kind, compute):
+        key = json.dumps([os.path.realpath(path), kind] + fingerprint_file(path))
+        with self.lock:
+            self._load()
+            if key in self.packages:
+                return self.packages[key]
+        result = compute(path)
+        with self.lock:
+            self.packages[key] = result
+            while len(self.packages) > PACKAGE_CACHE_SIZE:
+                del self.packages[next(iter(self.packages))]
+            self._save()
+        return result
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            temp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(temp[0], 'w') as file:
+                json.dump(self.packages, file)
+            os.replace(temp[1], self.path)
+        except Exception:
+            # Failing to persist the cache is not fatal.
+            pass
+
+
+package_cache = PackageCache()
+
+
+def get_package_id(path):
+
+    # Get the label and package ID of a Fabric v2.x chaincode package.
+    return package_cache.get(path, 'package', compute_package_id)
+
+
+def get_chaincode_deployment_spec_id(path):
+
+    # Get the name, version, and ID of a Fabric v1.4 chaincode package.
+    return package_cache.get(path, 'cds', compute_chaincode_deployment_spec_id)
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from .channel_utils import read_config
+from .msp_utils import msp_to_organization
+
+
+class ChannelConfig:
+
+    # A decoded channel config, with indexes over the parts of the config that are
+    # looked up by name. Each index is built the first time that it is needed, with a
+    # single scan of the config, and organizations are only converted from their MSP
+    # definitions when they are requested; the config must not be modified afterwards.
+    def __init__(self, channel_group):
+        self.channel_group = channel_group
+        self._groups = dict()
+        self._organizations = dict()
+        self._tls_certs = None
+        self._anchor_peers = None
+        self._consenters = None
+
+    @staticmethod
+    def from_json(config_json):
+        return ChannelConfig(config_json['channel_group'])
+
+    @staticmethod
+    def from_path(path):
+        return ChannelConfig.from_json(read_config(path))
+
+    def _get_groups(self, *path):
+
+        # Get the child groups of the group at the specified path, keyed by name.
+        if path not in self._groups:
+            group = self.channel_group
+            for name in path:
+                group = group.get('groups', dict()).get(name, None)
+                if group is None:
+                    break
+            self._groups[path] = group.get('groups', dict()) if group is not None else dict()
+        return self._groups[path]
+
+    def _get_organization(self, path, msp_id):
+        key = path + (msp_id,)
+        if key not in self._organizations:
+            msp = self._get_groups(*path).get(msp_id, None)
+            self._organizations[key] = msp_to_organization(msp_id, msp) if msp is not None else None
+        return self._organizations[key]
+
+    def get_member(self, msp_id):
+
+        # Get the channel member as an organization, or None if it is not a member.
+        return self._get_organization(('Application',), msp_id)
+
+    def get_consortium_member(self, msp_id, consortium='SampleConsortium'):
+
+        # Get the consortium member as an organization, or None if it is not a member.
+        return self._get_organization(('Consortiums', consortium), msp_id)
+
+    def get_member_tls_certs(self, msp_id):
+
+        # Get the TLS root and intermediate certificates of the channel member.
+        if self._tls_certs is None:
+            tls_certs = dict()
+            for member_msp_id, msp in self._get_groups('Application').items():
+                msp_config = msp['values']['MSP']['value']['config']
+                tls_root_certs = msp_config.get('tls_root_certs', None) or []
+                tls_intermediate_certs = msp_config.get('tls_intermediate_certs', None) or []
+                tls_certs[member_msp_id] = tls_root_certs + tls_intermediate_certs
+            self._tls_certs = tls_certs
+        return self._tls_certs.get(msp_id, None)
+
+    def get_anchor_peers(self, msp_id):
+
+        # Get the addresses (host:port) of the anchor peers of the channel member.
+        if self._anchor_peers is None:
+            anchor_peers = dict()
+            for member_msp_id, msp in self._get_groups('Application').items():
+                anchor_peers_value = msp.get('values', dict()).get('AnchorPeers', None)
+                if anchor_peers_value is None:
+                    anchor_peers[member_msp_id] = []
+                    continue
+                anchor_peers[member_msp_id] = [
+                    f'{anchor_peer["host"]}:{anchor_peer["port"]}'
+                    for anchor_peer in anchor_peers_value['value'].get('anchor_peers', None) or []
+                ]
+            self._anchor_peers = anchor_peers
+        return self._anchor_peers.get(msp_id, None)
+
+    def get_consenters(self):
+
+        # Get the consenters of the ordering service, keyed by host:port.
+        if self._consenters is None:
+            orderer_values = self.channel_group.get('groups', dict()).get('Orderer', dict()).get('values', dict())
+            consensus_type = orderer_values.get('ConsensusType', dict()).get('value', dict())
+            consenters = (consensus_type.get('metadata', None) or dict()).get('consenters', None) or []
+            self._consenters = {f'{consenter["host"]}:{consenter["port"]}': consenter for consenter in consenters}
+        return self._consenters
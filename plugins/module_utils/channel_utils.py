@@ -6,6 +6,24 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from .dict_utils import copy_dict, diff_dicts, diff_paths, merge_dicts
+from .fabric_utils import get_fabric_cfg_path
+from .file_utils import get_private_cache_dir, get_temp_file
+from .msp_utils import organization_to_msp
+from .proto_utils import (get_block_config, get_block_info, json_to_proto,
+                          proto_to_json)
+
+from subprocess import CalledProcessError
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import urllib.parse
+
 
 def get_application_capability(channel_group):
     application_capabilities = channel_group['groups'].get('Application', dict()).get('values', dict()).get('Capabilities', dict()).get('value', dict()).get('capabilities', dict())
@@ -45,3 +63,571 @@ def get_highest_capability(channel_group):
     if capabilities:
         return capabilities[0]
     return None
+
+
+def get_config_session_path(path):
+    return f'{path}.session.json'
+
+
+def _get_config_file_identity(path):
+
+    # Identify the contents of a config file by the inode, modification time, size, and hash
+    # of the file; the hash alone is not enough, as fetching the same config again must not
+    # bring an old session back to life.
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        return dict(
+            inode=stat.st_ino,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            hash=hashlib.sha256(file.read()).hexdigest()
+        )
+
+
+def _read_config_session(path):
+
+    # A config editing session holds the decoded config, along with the identity of the
+    # config file it was decoded from. If the config file has been changed since, for
+    # example by fetching the config again, then the session is stale and is ignored.
+    session_path = get_config_session_path(path)
+    if not os.path.exists(session_path):
+        return None
+    try:
+        with open(session_path, 'r') as file:
+            session = json.load(file)
+    except Exception:
+        return None
+    if session.get('file', None) != _get_config_file_identity(path):
+        return None
+    return session
+
+
+def read_config(path):
+
+    # Use the config editing session if there is one, otherwise decode the config file.
+    session = _read_config_session(path)
+    if session is not None:
+        return session['config']
+    with open(path, 'rb') as file:
+        return proto_to_json('common.Config', file.read())
+
+
+def write_config(path, config_json, session=False):
+
+    # If using a config editing session, save the decoded config alongside the
+    # config file, and leave encoding the config file until it is needed.
+    if session:
+        session_path = get_config_session_path(path)
+        temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(session_path)))
+        with os.fdopen(temp[0], 'w') as file:
+            json.dump(dict(file=_get_config_file_identity(path), config=config_json), file)
+        os.replace(temp[1], session_path)
+        return
+    config_proto = json_to_proto('common.Config', config_json)
+    with open(path, 'wb') as file:
+        file.write(config_proto)
+    discard_config_session(path)
+
+
+def encode_config(path):
+
+    # Get the encoded config, including any config editing session, without changing the config file.
+    session = _read_config_session(path)
+    if session is None:
+        with open(path, 'rb') as file:
+            return file.read()
+    return json_to_proto('common.Config', session['config'])
+
+
+def discard_config_session(path):
+
+    # Remove the config editing session, if there is one, returning True if it was removed.
+    session_path = get_config_session_path(path)
+    if os.path.exists(session_path):
+        os.remove(session_path)
+        return True
+    return False
+
+
+def flush_config_session(path):
+
+    # Encode the config editing session, if there is one, into the config file.
+    session = _read_config_session(path)
+    if session is None:
+        discard_config_session(path)
+        return False
+    write_config(path, session['config'])
+    return True
+
+
+def update_consenters(config_json, ordering_service_nodes):
+
+    # Build the expected list of consenters.
+    expected_consenters = list()
+    for ordering_service_node in ordering_service_nodes:
+        parsed_api_url = urllib.parse.urlparse(ordering_service_node.api_url)
+        host = parsed_api_url.hostname
+        port = parsed_api_url.port or 443
+        client_tls_cert = ordering_service_node.client_tls_cert or ordering_service_node.tls_cert
+        server_tls_cert = ordering_service_node.server_tls_cert or ordering_service_node.tls_cert
+        expected_consenters.append(dict(
+            host=host,
+            port=port,
+            client_tls_cert=client_tls_cert,
+            server_tls_cert=server_tls_cert,
+        ))
+
+    # Get the actual list of consenters.
+    orderer_group = config_json['channel_group']['groups']['Orderer']
+    orderer_values = orderer_group['values']
+    orderer_consensus_type = orderer_values['ConsensusType']['value']
+    orderer_consensus_type_type = orderer_consensus_type['type']
+    if orderer_consensus_type_type != 'etcdraft':
+        raise Exception(f'The channel uses an unsupported consensus type ${orderer_consensus_type_type}')
+    actual_consenters = orderer_consensus_type['metadata']['consenters']
+
+    # Compare the expected consenters to the actual consenters.
+    # Look for a additional consenter or an update to an existing consenter.
+    changed = False
+    for expected_consenter in expected_consenters:
+        actual_consenter = None
+        for consenter in actual_consenters:
+            if consenter['host'] == expected_consenter['host'] and consenter['port'] == expected_consenter['port']:
+                actual_consenter = consenter
+                break
+        if actual_consenter is None:
+            if changed:
+                raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
+            actual_consenters.append(expected_consenter)
+            changed = True
+        else:
+            if actual_consenter['client_tls_cert'] == expected_consenter['client_tls_cert'] and actual_consenter['server_tls_cert'] == expected_consenter['server_tls_cert']:
+                continue
+            elif changed:
+                raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
+            actual_consenter['client_tls_cert'] = expected_consenter['client_tls_cert']
+            actual_consenter['server_tls_cert'] = expected_consenter['server_tls_cert']
+            changed = True
+
+    # Compare the actual consenters to the expected consenters.
+    # Look for a consenter that has been removed.
+    for idx, actual_consenter in enumerate(actual_consenters):
+        expected_consenter = None
+        for consenter in expected_consenters:
+            if consenter['host'] == actual_consenter['host'] and consenter['port'] == actual_consenter['port']:
+                expected_consenter = consenter
+                break
+        if expected_consenter is None:
+            if changed:
+                raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
+            del actual_consenters[idx]
+            changed = True
+
+    # Build the expected list of orderer addresses.
+    expected_orderer_addresses = set()
+    for ordering_service_node in ordering_service_nodes:
+        parsed_api_url = urllib.parse.urlparse(ordering_service_node.api_url)
+        host = parsed_api_url.hostname
+        port = parsed_api_url.port or 443
+        expected_orderer_addresses.add(f'{host}:{port}')
+
+    # Get the actual list of orderer addresses.
+    channel_group = config_json['channel_group']
+    channel_values = channel_group['values']
+    orderer_addresses_value = channel_values['OrdererAddresses']['value']
+    orderer_addresses = orderer_addresses_value['addresses']
+    actual_orderer_addresses = set(orderer_addresses)
+
+    # Update the list of orderer addresses if required.
+    if expected_orderer_addresses != actual_orderer_addresses:
+        orderer_addresses_value['addresses'] = list(expected_orderer_addresses)
+        changed = True
+    return changed
+
+
+# The fields of an MSP configuration that contain certificates.
+MSP_CERTIFICATE_FIELDS = ['admins', 'intermediate_certs', 'revocation_list', 'root_certs', 'tls_intermediate_certs', 'tls_root_certs']
+
+
+def get_certificate_fingerprints(msp):
+
+    # Get the SHA-256 fingerprints of the certificates in each field of the MSP configuration.
+    msp_config = msp['values']['MSP']['value']['config']
+    fingerprints = dict()
+    for field in MSP_CERTIFICATE_FIELDS:
+        fingerprints[field] = set(hashlib.sha256(base64.b64decode(cert)).hexdigest() for cert in msp_config.get(field, None) or [])
+    return fingerprints
+
+
+def reconcile_members(groups, members, endorsement_policy_required, purge=False):
+
+    # Reconcile the member groups (of a channel or consortium) with the expected members in a
+    # single pass, where each expected member is a dict of organization, state (present or absent,
+    # defaults to present), anchor_peers (a list of peers, or None to leave them unchanged), and
+    # policies. If purge is specified, then any members that are not expected are removed.
+    # Returns a plan listing the added, updated, removed, and unchanged members.
+    plan = dict(added=list(), updated=list(), removed=list(), unchanged=list())
+    expected_msp_ids = set()
+    for member in members:
+        organization = member['organization']
+        if organization.msp_id in expected_msp_ids:
+            raise Exception(f'The organization {organization.msp_id} is specified more than once')
+        expected_msp_ids.add(organization.msp_id)
+        msp = groups.get(organization.msp_id, None)
+
+        # Remove the member if it is not expected.
+        if member.get('state', 'present') == 'absent':
+            if msp is not None:
+                del groups[organization.msp_id]
+                plan['removed'].append(dict(msp_id=organization.msp_id))
+            continue
+
+        # Build the expected member.
+        new_msp = organization_to_msp(organization, endorsement_policy_required, member.get('policies', None) or dict())
+        if member.get('anchor_peers', None):
+            anchor_peers = list()
+            for anchor_peer in member['anchor_peers']:
+                api_url_split = urllib.parse.urlsplit(anchor_peer.api_url)
+                anchor_peers.append(dict(host=api_url_split.hostname, port=api_url_split.port))
+            new_msp['values']['AnchorPeers'] = dict(mod_policy='Admins', value=dict(anchor_peers=anchor_peers))
+
+        # Add the member if it does not exist.
+        if msp is None:
+            groups[organization.msp_id] = new_msp
+            plan['added'].append(dict(msp_id=organization.msp_id))
+            continue
+
+        # Otherwise, find the changes to the member, and only update it if there are any.
+        changes = diff_paths(msp, new_msp)
+        if not changes:
+            plan['unchanged'].append(dict(msp_id=organization.msp_id))
+            continue
+        old_fingerprints = get_certificate_fingerprints(msp)
+        new_fingerprints = get_certificate_fingerprints(new_msp)
+        certificates = dict()
+        for field in MSP_CERTIFICATE_FIELDS:
+            if old_fingerprints[field] != new_fingerprints[field]:
+                certificates[field] = dict(
+                    added=sorted(new_fingerprints[field] - old_fingerprints[field]),
+                    removed=sorted(old_fingerprints[field] - new_fingerprints[field])
+                )
+        updated_msp = copy_dict(msp)
+        merge_dicts(updated_msp, new_msp)
+        groups[organization.msp_id] = updated_msp
+        plan['updated'].append(dict(msp_id=organization.msp_id, changes=[change['path'] for change in changes], certificates=certificates))
+
+    # Remove any members that are not expected.
+    if purge:
+        for msp_id in list(groups.keys()):
+            if msp_id not in expected_msp_ids:
+                del groups[msp_id]
+                plan['removed'].append(dict(msp_id=msp_id))
+    plan['counts'] = {key: len(value) for key, value in plan.items()}
+    return plan
+
+
+def _is_endorsement_policy_required(config_json):
+    highest_capability = get_highest_capability(config_json['channel_group'])
+    return highest_capability is not None and highest_capability >= 'V2_0'
+
+
+def reconcile_channel_members(config_json, members, purge=False):
+
+    # Reconcile the members of the channel in the Application group.
+    application_groups = config_json['channel_group']['groups']['Application']['groups']
+    return reconcile_members(application_groups, members, _is_endorsement_policy_required(config_json), purge)
+
+
+def reconcile_consortium_members(config_json, members, purge=False, consortium='SampleConsortium'):
+
+    # Reconcile the members of the consortium in the system channel.
+    consortiums = config_json['channel_group']['groups'].get('Consortiums', None)
+    if consortiums is None:
+        raise Exception('The configuration is not for the system channel')
+    consortium_group = consortiums['groups'].get(consortium, None)
+    if consortium_group is None:
+        raise Exception(f'The consortium {consortium} does not exist')
+    return reconcile_members(consortium_group['groups'], members, _is_endorsement_policy_required(config_json), purge)
+
+
+def compute_config_update(name, original, updated):
+
+    # Compute the config update between the original and updated configuration
+    # files, and wrap it in an envelope ready for signing. Returns None if there
+    # are no differences between the configurations.
+    config_update_proto_path = get_temp_file()
+    try:
+
+        # Run the command to compute the update
+        try:
+            subprocess.run([
+                'configtxlator', 'compute_update', f'--channel_id={name}', f'--original={original}', f'--updated={updated}', f'--output={config_update_proto_path}'
+            ], text=True, close_fds=True, check=True, capture_output=True)
+        except CalledProcessError as e:
+            if e.stderr.find('no differences detected') != -1:
+                return None
+            raise
+
+        # Convert it into JSON.
+        with open(config_update_proto_path, 'rb') as file:
+            config_update_json = proto_to_json('common.ConfigUpdate', file.read())
+
+        # Build the config envelope.
+        return dict(
+            payload=dict(
+                header=dict(
+                    channel_header=dict(
+                        channel_id=name,
+                        type=2
+                    )
+                ),
+                data=dict(
+                    config_update=config_update_json
+                )
+            )
+        )
+
+    # Ensure the temporary file is cleaned up.
+    finally:
+        os.remove(config_update_proto_path)
+
+
+def save_config_update(path, config_update_envelope_json):
+
+    # Compare and copy if needed, returning True if the file was changed.
+    config_update_envelope_proto = json_to_proto('common.Envelope', config_update_envelope_json)
+    if os.path.exists(path):
+        changed = False
+        try:
+            with open(path, 'rb') as file:
+                original_config_update_envelope_json = proto_to_json('common.Envelope', file.read())
+            changed = diff_dicts(original_config_update_envelope_json, config_update_envelope_json)
+        except Exception:
+            changed = True
+        if changed:
+            with open(path, 'wb') as file:
+                file.write(config_update_envelope_proto)
+        return changed
+    else:
+        with open(path, 'wb') as file:
+            file.write(config_update_envelope_proto)
+        return True
+
+
+def update_config(name, original, config_json, path, unchanged, check_mode, description):
+
+    # Compute and save the configuration update for the changes to the original config, or
+    # remove any existing configuration update if nothing changed. Returns a (changed, path)
+    # tuple, where the path is None if there is no configuration update. In check mode, the
+    # configuration update is neither computed nor saved, and no file is removed.
+    if unchanged:
+        if os.path.exists(path):
+            if not check_mode:
+                os.remove(path)
+            return (True, None)
+        return (False, None)
+    elif check_mode:
+        return (True, path)
+
+    # Encode the updated config, and compute the configuration update.
+    flush_config_session(original)
+    updated = get_temp_file()
+    try:
+        with open(updated, 'wb') as file:
+            file.write(json_to_proto('common.Config', config_json))
+        config_update_envelope_json = compute_config_update(name, original, updated)
+    finally:
+        os.remove(updated)
+    if config_update_envelope_json is None:
+        raise Exception(f'The changes to the {description} did not result in a configuration update')
+
+    # Compare and copy if needed.
+    return (save_config_update(path, config_update_envelope_json), path)
+
+
+def read_config_update(path, config_update_envelope_json):
+
+    # Get the existing configuration update envelope, including any signatures, if it is for
+    # the same configuration update as the specified envelope; otherwise, return None.
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as file:
+            original_config_update_envelope_json = proto_to_json('common.Envelope', file.read())
+    except Exception:
+        return None
+    if diff_dicts(original_config_update_envelope_json, config_update_envelope_json):
+        return None
+    return original_config_update_envelope_json
+
+
+def get_config_update_signers(config_update_envelope_json):
+
+    # Get the set of MSP IDs that have already signed the configuration update.
+    signatures = config_update_envelope_json['payload']['data'].get('signatures', None) or list()
+    return set(signature['signature_header']['creator']['mspid'] for signature in signatures)
+
+
+def sign_config_update(path, msp_id, msp_path, hsm=None):
+
+    # Add a signature to the configuration update envelope in place, using the local MSP.
+    fabric_cfg_path = get_fabric_cfg_path()
+    try:
+        env = os.environ.copy()
+        env['CORE_PEER_MSPCONFIGPATH'] = msp_path
+        env['CORE_PEER_LOCALMSPID'] = msp_id
+        env['FABRIC_CFG_PATH'] = fabric_cfg_path
+        if hsm:
+            env['CORE_PEER_BCCSP_DEFAULT'] = 'PKCS11'
+            env['CORE_PEER_BCCSP_PKCS11_LIBRARY'] = hsm['pkcs11library']
+            env['CORE_PEER_BCCSP_PKCS11_LABEL'] = hsm['label']
+            env['CORE_PEER_BCCSP_PKCS11_PIN'] = hsm['pin']
+            env['CORE_PEER_BCCSP_PKCS11_HASH'] = 'SHA2'
+            env['CORE_PEER_BCCSP_PKCS11_SECURITY'] = '256'
+            env['CORE_PEER_BCCSP_PKCS11_FILEKEYSTORE_KEYSTORE'] = os.path.join(msp_path, 'keystore')
+        subprocess.run([
+            'peer', 'channel', 'signconfigtx', '-f', path
+        ], env=env, text=True, close_fds=True, check=True, capture_output=True)
+    finally:
+        shutil.rmtree(fabric_cfg_path)
+
+
+class ConfigBlockCache:
+
+    # Remembers the latest config block for each channel, keyed by the channel ID and the source of
+    # the block (the peer or ordering service it was fetched from), along with the block number and
+    # data hash. The cache is revalidated by fetching the newest block: if it is the cached config
+    # block, or the same newest block that was seen when the config block was cached, then the cached
+    # config is used. Otherwise, if its last config index matches the cached block number, the config
+    # block is fetched again to compare its data hash, as a channel that was deleted and created again
+    # or a reset ledger has a different block with the same number; the saving is then in not decoding
+    # the config again. The cache is persisted to files in a private cache directory, as each Ansible
+    # task runs in a new process; if no path is given and the cache directory cannot be used, nothing
+    # is cached.
+    def __init__(self, path=None):
+        self.path = path
+
+    def _get_path(self):
+        if self.path is None:
+            try:
+                self.path = get_private_cache_dir('config-blocks')
+            except Exception:
+                self.path = False
+        return self.path
+
+    def _get_entry_path(self, channel, source):
+        source_hash = hashlib.sha256(json.dumps(source).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self._get_path(), f'{channel}-{source_hash}.json')
+
+    def _load(self, channel, source):
+        if not self._get_path():
+            return None
+        try:
+            with open(self._get_entry_path(channel, source), 'r') as file:
+                entry = json.load(file)
+
+            # Check that the entry is for this channel and source, that it identifies the config
+            # block, and that the config has not been truncated or corrupted since it was stored.
+            config_hash = hashlib.sha256(base64.b64decode(entry['config'])).hexdigest()
+            if entry['channel'] == channel and entry['source'] == source and entry['hash'] == config_hash and entry.get('data_hash', None) and 'newest' in entry:
+                return entry
+        except Exception:
+            # Missing or corrupt cache is not fatal, we just start again.
+            pass
+        return None
+
+    def _save(self, entry):
+        if not self._get_path():
+            return
+        try:
+            temp = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(temp[0], 'w') as file:
+                json.dump(entry, file)
+            os.replace(temp[1], self._get_entry_path(entry['channel'], entry['source']))
+        except Exception:
+            # Failing to persist the cache is not fatal.
+            pass
+
+    def get(self, channel, source, fetch, decode=False):
+
+        # Get the config for the channel, as a dict with the block number, the encoded config,
+        # and if requested the decoded config. The fetch function is called with the target
+        # (newest or config) and the path to fetch the block to.
+        block_path = get_temp_file()
+        try:
+            fetch('newest', block_path)
+            with open(block_path, 'rb') as file:
+                block_proto = file.read()
+            block_info = get_block_info(block_proto)
+            last_config = block_info['last_config']
+            newest = [block_info['number'], block_info['data_hash']]
+            is_config_block = last_config is not None and block_info['number'] == last_config
+
+            # Only use the cached config if it is for the same block, not just the same block number.
+            entry = self._load(channel, source) if last_config is not None else None
+            cached = False
+            if entry is not None and entry['number'] == last_config:
+                if is_config_block:
+                    cached = entry['data_hash'] == block_info['data_hash']
+                elif entry['newest'] == newest:
+                    cached = True
+                else:
+                    fetch('config', block_path)
+                    with open(block_path, 'rb') as file:
+                        block_proto = file.read()
+                    block_info = get_block_info(block_proto)
+                    is_config_block = True
+                    cached = entry['data_hash'] == block_info['data_hash']
+            updated = not cached or entry['newest'] != newest
+            if cached:
+                entry['newest'] = newest
+            else:
+
+                # If the newest block is not the config block, we need to fetch the config block.
+                if not is_config_block:
+                    fetch('config', block_path)
+                    with open(block_path, 'rb') as file:
+                        block_proto = file.read()
+                    block_info = get_block_info(block_proto)
+                config_proto = get_block_config(block_proto)
+                entry = dict(
+                    channel=channel,
+                    source=source,
+                    number=block_info['number'],
+                    data_hash=block_info['data_hash'],
+                    newest=newest,
+                    hash=hashlib.sha256(config_proto).hexdigest(),
+                    config=base64.b64encode(config_proto).decode('utf-8'),
+                    config_json=None
+                )
+        finally:
+            os.remove(block_path)
+
+        # Decode the config if requested, and remember the decoded config as well.
+        if decode and entry['config_json'] is None:
+            entry['config_json'] = proto_to_json('common.Config', base64.b64decode(entry['config']))
+            updated = True
+        if updated:
+            self._save(entry)
+        return dict(
+            cached=cached,
+            number=entry['number'],
+            config=base64.b64decode(entry['config']),
+            config_json=entry['config_json']
+        )
+
+    def invalidate(self, channel):
+
+        # Forget the config for the channel from every source, for example after it is updated.
+        if not self._get_path():
+            return
+        try:
+            for name in os.listdir(self.path):
+                if name.startswith(f'{channel}-') and name.endswith('.json') and name[len(channel) + 1:-5].isalnum():
+                    os.remove(os.path.join(self.path, name))
+        except Exception:
+            # A missing cache is not fatal, there is nothing to forget.
+            pass
+
+
+config_block_cache = ConfigBlockCache()
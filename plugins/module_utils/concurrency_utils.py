@@ -0,0 +1,90 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+
+def run_concurrently(func, items, concurrency):
+
+    # Run the function against each item using at most the specified number of
+    # threads, and return a list of (result, exception) tuples in the same order
+    # as the items. Exceptions are returned, not raised, so that one failure does
+    # not stop the processing of the other items.
+    def wrapper(item):
+        try:
+            return (func(item), None)
+        except Exception as e:
+            return (None, e)
+    items = list(items)
+    if not items:
+        return list()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items)))) as executor:
+        return list(executor.map(wrapper, items))
+
+
+class Backoff:
+
+    def __init__(self, initial_interval=1, max_interval=10, multiplier=2):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.interval = initial_interval
+        self.next_attempt = 0
+
+    def ready(self, now):
+        return now >= self.next_attempt
+
+    def failed(self, now):
+        self.next_attempt = now + self.interval
+        self.interval = min(self.interval * self.multiplier, self.max_interval)
+
+
+def poll_concurrently(func, items, timeout, concurrency, initial_interval=1, max_interval=10, required=None):
+
+    # Repeatedly call the function for each item until it returns True, backing
+    # off exponentially between calls for the same item. Polling stops when all
+    # items have succeeded, when the required number of items have succeeded, or
+    # when the timeout expires. Returns a list of results in the same order as the
+    # items, recording when (in seconds since polling started) each item succeeded.
+    items = list(items)
+    if required is None:
+        required = len(items)
+    results = [dict(ready=False, elapsed=None, attempts=0, error=None) for _ in items]
+    started = time.monotonic()
+    deadline = started + timeout
+    backoffs = {index: Backoff(initial_interval, max_interval) for index in range(len(items))}
+    completed = dict()
+
+    def poll(index):
+        try:
+            return func(items[index])
+        finally:
+            completed[index] = time.monotonic()
+    succeeded = 0
+    while backoffs and succeeded < required:
+        now = time.monotonic()
+        ready = [index for index, backoff in backoffs.items() if backoff.ready(now)]
+        polled = run_concurrently(poll, ready, concurrency)
+        now = time.monotonic()
+        for index, (result, e) in zip(ready, polled):
+            results[index]['attempts'] += 1
+            if e is None and result:
+                results[index]['ready'] = True
+                results[index]['elapsed'] = round(completed[index] - started, 3)
+                results[index]['error'] = None
+                succeeded += 1
+                del backoffs[index]
+            else:
+                results[index]['error'] = e
+                backoffs[index].failed(now)
+        if not backoffs or succeeded >= required or now >= deadline:
+            break
+        next_attempt = min(backoff.next_attempt for backoff in backoffs.values())
+        time.sleep(max(0, min(next_attempt, deadline) - now))
+    return results
@@ -481,6 +481,11 @@ class Console:
                 time.sleep(10)
         return response
 
+    def update_peer_version(self, id, version, ignore_warnings):
+        # Unlike update_peer, this does not sleep afterwards; the caller is
+        # expected to wait until the peer is running the new version.
+        return self._update_peer(id, dict(version=version), ignore_warnings)
+
     def _update_peer(self, id, data, ignore_warnings):
         self._ensure_loggedin()
         url = urllib.parse.urljoin(self.api_base_url, f'./kubernetes/components/fabric-peer/{id}')
@@ -787,6 +792,11 @@ class Console:
                 time.sleep(10)
         return response
 
+    def update_ordering_service_node_version(self, id, version):
+        # Unlike update_ordering_service_node, this does not sleep afterwards; the caller
+        # is expected to wait until the ordering service node is running the new version.
+        return self._update_ordering_service_node(id, dict(version=version))
+
     def _update_ordering_service_node(self, id, data):
         self._ensure_loggedin()
         url = urllib.parse.urljoin(self.api_base_url, f'./kubernetes/components/fabric-orderer/{id}')
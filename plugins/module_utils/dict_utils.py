@@ -9,32 +9,206 @@ __metaclass__ = type
 from collections.abc import Mapping
 import json
 
+# The types that can be shared between the source and the copy of a dict, and
+# that can be compared directly if both values are of the same type.
+IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
 
 def copy_dict(source):
+
+    # Copy the structure in the same way as a JSON round trip would: tuples become lists,
+    # and strings and numbers become plain values, but without building the JSON string.
+    source_type = type(source)
+    if source_type is dict:
+        result = dict()
+        for key, value in source.items():
+            if type(key) is not str:
+                return _copy_value(source)
+            value_type = type(value)
+            result[key] = value if value_type in IMMUTABLE_TYPES else copy_dict(value)
+        return result
+    elif source_type is list:
+        return [value if type(value) in IMMUTABLE_TYPES else copy_dict(value) for value in source]
+    elif source_type in IMMUTABLE_TYPES:
+        return source
+    return _copy_value(source)
+
+
+def _copy_value(source):
+
+    # Handle the less common types, such as tuples and subclasses of strings.
+    if isinstance(source, Mapping):
+        if not all(isinstance(key, str) for key in source):
+            return json.loads(json.dumps(source))
+        return {str(key): copy_dict(value) for key, value in source.items()}
+    elif isinstance(source, (list, tuple)):
+        return [copy_dict(value) for value in source]
+    elif isinstance(source, bool):
+        return bool(source)
+    elif isinstance(source, str):
+        return str(source)
+    elif isinstance(source, int):
+        return int(source)
+    elif isinstance(source, float):
+        return float(source)
     return json.loads(json.dumps(source))
 
 
 def merge_dicts(target, source):
-    for key, value in source.items():
-        if key in target and isinstance(target[key], dict) and isinstance(source[key], Mapping):
-            merge_dicts(target[key], source[key])
+
+    # Merge the source into the target, walking both with an explicit
+    # stack of iterators so that deep structures are handled in order.
+    pending = [(target, iter(source.items()))]
+    while pending:
+        (current, items) = pending[-1]
+        for key, value in items:
+            if key in current and isinstance(current[key], dict) and isinstance(value, Mapping):
+                pending.append((current[key], iter(value.items())))
+                break
+            current[key] = value
         else:
-            target[key] = source[key]
+            pending.pop()
 
 
-def diff_dicts(target, source):
+def _escape_pointer_token(token):
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def diff_paths(target, source, removals=False):
+
+    # Compare the source to the target, returning a flat list of changes that would turn
+    # the target into the source, in the same order as the keys in the source. Each change
+    # has an op (add, replace, or remove) and a path (a JSON pointer), and add and replace
+    # changes have the new value. Dicts are compared key by key, but any other values are
+    # compared as a whole. Keys that are missing from the target but are None in the source
+    # are not changes. Keys that are missing from the source are only removals if requested.
+    changes = list()
+    missing = object()
+    pending = [(target, source, '', iter(source.items()))]
+    while pending:
+        (current_target, current_source, path, items) = pending[-1]
+        for key, value in items:
+            target_value = current_target.get(key, missing)
+            if target_value is value:
+                continue
+            elif isinstance(target_value, dict) and isinstance(value, Mapping):
+                pending.append((target_value, value, f'{path}/{_escape_pointer_token(key)}', iter(value.items())))
+                break
+            elif target_value is missing:
+                if value is not None:
+                    changes.append(dict(op='add', path=f'{path}/{_escape_pointer_token(key)}', value=value))
+            elif target_value != value:
+                changes.append(dict(op='replace', path=f'{path}/{_escape_pointer_token(key)}', value=value))
+        else:
+            pending.pop()
+            if removals:
+                for key in current_target:
+                    if key not in current_source:
+                        changes.append(dict(op='remove', path=f'{path}/{_escape_pointer_token(key)}'))
+    return changes
+
+
+def changes_to_dict(changes):
+
+    # Build a nested dict containing the new values from a list of changes.
     result = dict()
-    for key, value in source.items():
-        if key in target and isinstance(target[key], dict) and isinstance(source[key], Mapping):
-            sub_result = diff_dicts(target[key], source[key])
-            if bool(sub_result):
-                result[key] = sub_result
-        elif target.get(key, None) != source[key]:
-            result[key] = source[key]
+    for change in changes:
+        if change['op'] == 'remove':
+            continue
+        tokens = [token.replace('~1', '/').replace('~0', '~') for token in change['path'].split('/')[1:]]
+        current = result
+        for token in tokens[:-1]:
+            current = current.setdefault(token, dict())
+        current[tokens[-1]] = change['value']
     return result
 
 
+def diff_dicts(target, source):
+    return changes_to_dict(diff_paths(target, source))
+
+
+def _get_kind(value):
+
+    # Values are equal if they would be serialized to the same JSON, so
+    # booleans, integers, and floats are all different kinds of values.
+    if value is None:
+        return 'null'
+    elif isinstance(value, bool):
+        return 'bool'
+    elif isinstance(value, int):
+        return 'int'
+    elif isinstance(value, float):
+        return 'float'
+    elif isinstance(value, str):
+        return 'str'
+    elif isinstance(value, Mapping):
+        return 'dict'
+    elif isinstance(value, (list, tuple)):
+        return 'list'
+    return None
+
+
 def equal_dicts(source1, source2):
-    json1 = json.dumps(source1, sort_keys=True)
-    json2 = json.dumps(source2, sort_keys=True)
-    return json1 == json2
+
+    # Walk both structures at the same time, stopping at the first difference.
+    # Values of the same plain type are compared straight away, rather than being queued,
+    # and plain dicts and lists are recognised by their type before checking for the
+    # less common types that are serialized in the same way.
+    missing = object()
+    pending = [(source1, source2)]
+    while pending:
+        (value1, value2) = pending.pop()
+        value_type = type(value1)
+        if value_type is dict and type(value2) is dict:
+            kind = 'dict'
+        elif value_type is list and type(value2) is list:
+            kind = 'list'
+        else:
+            kind = _get_kind(value1)
+            if kind != _get_kind(value2):
+                return False
+        if kind == 'dict':
+            if len(value1) != len(value2):
+                return False
+            for key, child1 in value1.items():
+                child2 = value2.get(key, missing)
+                if child2 is missing:
+                    # Keys that are not strings are converted to strings by JSON.
+                    if not isinstance(key, str):
+                        return json.dumps(source1, sort_keys=True) == json.dumps(source2, sort_keys=True)
+                    return False
+                if child1 is child2:
+                    continue
+                child_type = type(child1)
+                if child_type is type(child2) and child_type in IMMUTABLE_TYPES:
+                    if (child1 != child2 or child_type is float) and not _equal_values(child1, child2):
+                        return False
+                    continue
+                pending.append((child1, child2))
+        elif kind == 'list':
+            if len(value1) != len(value2):
+                return False
+            for child1, child2 in zip(value1, value2):
+                if child1 is child2:
+                    continue
+                child_type = type(child1)
+                if child_type is type(child2) and child_type in IMMUTABLE_TYPES:
+                    if (child1 != child2 or child_type is float) and not _equal_values(child1, child2):
+                        return False
+                    continue
+                pending.append((child1, child2))
+        elif kind is None:
+            if json.dumps(value1, sort_keys=True) != json.dumps(value2, sort_keys=True):
+                return False
+        elif not _equal_values(value1, value2):
+            return False
+    return True
+
+
+def _equal_values(value1, value2):
+
+    # Floats are serialized using their repr, so NaN is the same JSON as NaN even though
+    # they are not equal, and 0.0 is not the same JSON as -0.0 even though they are equal.
+    if isinstance(value1, float) and isinstance(value2, float):
+        return float.__repr__(value1) == float.__repr__(value2)
+    return value1 == value2
@@ -9,6 +9,8 @@ __metaclass__ = type
 import os.path
 import tempfile
 
+from .file_utils import get_ram_temp_dir
+
 # This is horrible, but Ansible transfers modules as a ZIP file, and
 # loads them from the ZIP file using the zipimport module. This means
 # you can't use __file__ to find the path to anything in the collection.
@@ -724,7 +726,7 @@ def get_core_yaml():
 
 
 def get_fabric_cfg_path():
-    fabric_cfg_path = tempfile.mkdtemp()
+    fabric_cfg_path = tempfile.mkdtemp(dir=get_ram_temp_dir())
     core_yaml_path = os.path.join(fabric_cfg_path, 'core.yaml')
     with open(core_yaml_path, 'w') as file:
         file.write(core_yaml)
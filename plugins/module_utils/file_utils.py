@@ -6,20 +6,101 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
-import hashlib
 import os
+import secrets
+import shutil
+import stat
 import tempfile
 
+# The size, in bytes, of each chunk read when comparing files.
+COMPARE_CHUNK_SIZE = 1024 * 1024
 
-def get_temp_file():
-    temp = tempfile.mkstemp()
-    os.close(temp[0])
-    return temp[1]
+
+def get_ram_temp_dir():
+    # Prefer a RAM-backed file system for short lived files, such as those
+    # created for every call to the Fabric CLI, to avoid disk I/O; fall back
+    # to the default temporary directory if one isn't available.
+    for candidate in ['/dev/shm']:
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return None
+
+
+def get_private_cache_dir(name=None):
+
+    # Get a directory for results that are cached between tasks. The directory is private to
+    # the current user, so that other users cannot plant or modify cached results, and it is
+    # not trusted unless it is a real directory owned by the current user that no one else can
+    # access. An optional subdirectory is created with the same permissions.
+    path = os.path.join(tempfile.gettempdir(), f'fabric-ansible-collection-{os.getuid()}')
+    paths = [path] if name is None else [path, os.path.join(path, name)]
+    for path in paths:
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise Exception(f'Cache directory {path} is not a private directory owned by the current user')
+    return path
+
+
+def get_temp_file(dir=None, mode=None):
+
+    # Create an empty temporary file that only the current user can access. If a mode is
+    # given, the file is instead created with that mode less the umask, like any other new
+    # file, so that it can be moved into place with the same permissions.
+    if mode is None:
+        temp = tempfile.mkstemp(dir=dir)
+        os.close(temp[0])
+        return temp[1]
+    if dir is None:
+        dir = tempfile.gettempdir()
+    while True:
+        path = os.path.join(dir, f'tmp{secrets.token_hex(8)}')
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return path
 
 
 def equal_files(file1, file2):
-    with open(file1, 'rb') as file:
-        hash1 = hashlib.sha256(file.read()).hexdigest()
-    with open(file2, 'rb') as file:
-        hash2 = hashlib.sha256(file.read()).hexdigest()
-    return hash1 == hash2
+
+    # Files of different sizes cannot be equal, so don't read them at all. Otherwise,
+    # compare them one chunk at a time, stopping at the first chunk that differs.
+    if os.path.getsize(file1) != os.path.getsize(file2):
+        return False
+    with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
+        while True:
+            chunk1 = f1.read(COMPARE_CHUNK_SIZE)
+            chunk2 = f2.read(COMPARE_CHUNK_SIZE)
+            if chunk1 != chunk2:
+                return False
+            elif not chunk1:
+                return True
+
+
+def replace_file(source, target):
+
+    # Move the source file over the target file if they are different, returning True if the
+    # target file was changed. If the target file is a symbolic link, the file that it points
+    # to is replaced instead of the link. The source file must be on the same file system as
+    # that file (for example, created by get_temp_file in the same directory) so that it is
+    # replaced atomically, and it keeps its own mode if the target file does not exist yet;
+    # it is removed if it is not needed. A target file with other hard links is overwritten
+    # in place instead, so that the new contents are visible through all of the links.
+    target = os.path.realpath(target)
+    if os.path.exists(target):
+        if equal_files(source, target):
+            os.remove(source)
+            return False
+        info = os.stat(target)
+        if info.st_nlink > 1:
+            shutil.copyfile(source, target)
+            os.remove(source)
+            return True
+        os.chmod(source, info.st_mode & 0o777)
+    os.replace(source, target)
+    return True
@@ -0,0 +1,307 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible.module_utils.urls import open_url
+
+from .concurrency_utils import Backoff, poll_concurrently, run_concurrently
+from .file_utils import get_private_cache_dir
+
+import fcntl
+import json
+import math
+import os
+import random
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import urllib
+
+# The timeout, in seconds, for a single request to a health endpoint.
+HEALTHZ_PROBE_TIMEOUT = 5
+
+# The maximum number of health endpoints to probe at the same time.
+HEALTHZ_CONCURRENCY = 10
+
+# The initial and maximum intervals, in seconds, between probes of the same health endpoint.
+HEALTHZ_INITIAL_INTERVAL = 0.5
+HEALTHZ_MAX_INTERVAL = 4
+
+# The time, in seconds, to wait for a restarted component to go down before
+# assuming that it restarted before we noticed.
+RECOVERY_DOWN_TIMEOUT = 30
+
+# The interval, in seconds, between probes of a restarted component until it goes down.
+RECOVERY_DOWN_INTERVAL = 0.2
+
+# The number of consecutive failures after which a node is avoided, and for how many seconds.
+CIRCUIT_BREAKER_THRESHOLD = 3
+CIRCUIT_BREAKER_TIMEOUT = 60
+
+# The number of latency samples to keep for each node and operation.
+LATENCY_SAMPLES = 20
+
+# The timeout, in seconds, for connecting to an endpoint, and how long to cache the results for.
+ENDPOINT_PROBE_TIMEOUT = 3
+ENDPOINT_PROBE_TTL = 30
+
+
+def check_healthz(operations_url, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
+    url = urllib.parse.urljoin(operations_url, '/healthz')
+    response = open_url(url, None, None, method='GET', validate_certs=False, follow_redirects='all', timeout=probe_timeout)
+    if response.code != 200:
+        return False
+    healthz = json.load(response)
+    return healthz['status'] == 'OK'
+
+
+def check_version(operations_url, version, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
+
+    # Check that the component reports the expected version, ignoring any
+    # build suffix (2.2.5-1 is reported as 2.2.5), and that it is healthy.
+    url = urllib.parse.urljoin(operations_url, '/version')
+    response = open_url(url, None, None, method='GET', validate_certs=False, follow_redirects='all', timeout=probe_timeout)
+    if response.code != 200:
+        return False
+    reported = json.load(response).get('Version', None)
+    if reported != version.split('-')[0]:
+        raise Exception(f'Component is running version {reported}, not {version}')
+    return check_healthz(operations_url, probe_timeout)
+
+
+def wait_for_recovery(operations_url, timeout, down_timeout=RECOVERY_DOWN_TIMEOUT, probe_timeout=HEALTHZ_PROBE_TIMEOUT, down_interval=RECOVERY_DOWN_INTERVAL):
+
+    # After a restart, the old instance may still report that it is healthy for a
+    # short time, so wait for the health check to fail first (or for the down timeout
+    # to expire), and then wait for it to succeed again. Until the health check fails,
+    # probe at a fixed short interval so that a quick restart is not missed; after that,
+    # back off between probes. Returns the time taken.
+    started = time.monotonic()
+    deadline = started + timeout
+    down_deadline = started + min(down_timeout, timeout)
+    backoff = Backoff(HEALTHZ_INITIAL_INTERVAL, HEALTHZ_MAX_INTERVAL)
+    went_down = False
+    last_e = None
+    while True:
+        try:
+            healthy = check_healthz(operations_url, probe_timeout)
+            last_e = None if healthy else Exception('Health check did not report OK')
+        except Exception as e:
+            healthy = False
+            last_e = e
+        now = time.monotonic()
+        if not healthy:
+            went_down = True
+        elif went_down or now >= down_deadline:
+            return now - started
+        if now >= deadline:
+            raise Exception(f'Component failed to recover within {timeout} seconds: {str(last_e)}')
+        if went_down:
+            backoff.failed(now)
+            next_attempt = backoff.next_attempt
+        else:
+            next_attempt = min(now + down_interval, down_deadline)
+        time.sleep(max(0, min(next_attempt, deadline) - now))
+
+
+def wait_for_healthz(targets, timeout, required=None, probe_timeout=HEALTHZ_PROBE_TIMEOUT, concurrency=HEALTHZ_CONCURRENCY):
+
+    # Probe the health endpoints of all of the targets, which are (name, operations URL)
+    # tuples, at the same time until the required number of targets (default all) are
+    # healthy or the timeout expires. Returns a readiness timeline with an entry for each
+    # target, in the same order as the targets.
+    targets = list(targets)
+    results = poll_concurrently(lambda target: check_healthz(target[1], probe_timeout), targets, timeout, concurrency, HEALTHZ_INITIAL_INTERVAL, HEALTHZ_MAX_INTERVAL, required)
+    timeline = list()
+    for (name, _), result in zip(targets, results):
+        error = result['error']
+        timeline.append(dict(
+            name=name,
+            ready=result['ready'],
+            skipped=False,
+            elapsed=result['elapsed'],
+            attempts=result['attempts'],
+            error=str(error) if error is not None else None
+        ))
+    return timeline
+
+
+def get_last_error(timeline):
+    for entry in reversed(timeline):
+        if entry['error'] is not None:
+            return entry['error']
+    return None
+
+
+class EndpointProber:
+
+    # Measures the time taken to open a TCP connection and complete a TLS handshake
+    # with each endpoint, caching the results for a short time. The TLS certificate
+    # is not verified, and the TLS handshake is allowed to fail, as some endpoints
+    # require a client certificate - we only care that something is listening.
+    def __init__(self, probe_timeout=ENDPOINT_PROBE_TIMEOUT, ttl=ENDPOINT_PROBE_TTL):
+        self.probe_timeout = probe_timeout
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.results = dict()
+
+    def probe(self, address):
+        (host, port) = address.rsplit(':', 1)
+        started = time.monotonic()
+        with socket.create_connection((host, int(port)), timeout=self.probe_timeout) as sock:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            try:
+                with context.wrap_socket(sock, server_hostname=host):
+                    pass
+            except (ssl.SSLError, OSError):
+                pass
+        return time.monotonic() - started
+
+    def probe_all(self, addresses):
+
+        # Only probe the endpoints that we do not have recent results for.
+        now = time.monotonic()
+        with self.lock:
+            stale = [address for address in set(addresses) if address not in self.results or self.results[address][0] + self.ttl < now]
+        probed = run_concurrently(self.probe, stale, len(stale))
+        with self.lock:
+            for address, (rtt, e) in zip(stale, probed):
+                self.results[address] = (now, rtt)
+            return {address: self.results[address][1] for address in addresses}
+
+    def select(self, addresses):
+
+        # Pick the reachable endpoint with the lowest round trip time. If none of
+        # them are reachable, pick one at random and let the caller report the error.
+        timings = self.probe_all(addresses)
+        reachable = [address for address in addresses if timings[address] is not None]
+        if reachable:
+            selected = min(reachable, key=lambda address: timings[address])
+        else:
+            selected = random.choice(addresses)
+        return (selected, {address: round(rtt, 3) if rtt is not None else None for address, rtt in timings.items()})
+
+
+endpoint_prober = EndpointProber()
+
+
+class NodeScoreboard:
+
+    # Records the latency and failures of requests to each node, keyed by the
+    # address of the node, so that the fastest healthy node can be tried first.
+    # The scores are persisted to a file in a private cache directory, as each
+    # Ansible task runs in a new process; they are loaded when first needed, and
+    # only the nodes updated by this process are written back, so that tasks
+    # running in parallel do not overwrite each other's scores. If no path is
+    # given and the cache directory cannot be used, the scores are kept in memory.
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.RLock()
+        self.nodes = None
+        self.updated = set()
+
+    def _get_path(self):
+        if self.path is None:
+            try:
+                self.path = os.path.join(get_private_cache_dir(), 'node-scores.json')
+            except Exception:
+                self.path = False
+        return self.path
+
+    def _read(self):
+        try:
+            with open(self._get_path(), 'r') as file:
+                nodes = json.load(file)
+            return nodes if isinstance(nodes, dict) else dict()
+        except Exception:
+            # Missing or corrupt scores are not fatal, we just start again.
+            return dict()
+
+    def _get_nodes(self):
+        with self.lock:
+            if self.nodes is None:
+                self.nodes = self._read() if self._get_path() else dict()
+            return self.nodes
+
+    def _get_node(self, address):
+        self.updated.add(address)
+        return self._get_nodes().setdefault(address, dict(failures=0, opened_until=0, latencies=dict()))
+
+    def is_open(self, address, now=None):
+        if now is None:
+            now = time.time()
+        node = self._get_nodes().get(address, None)
+        return node is not None and node['opened_until'] > now
+
+    def get_latency(self, address, operation, percentile=50):
+        node = self._get_nodes().get(address, None)
+        if node is None:
+            return None
+        latencies = sorted(node['latencies'].get(operation, list()))
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(math.ceil(len(latencies) * percentile / 100)) - 1)
+        return latencies[max(0, index)]
+
+    def rank(self, addresses, operation):
+
+        # Nodes with an open circuit breaker go last, then nodes with recent
+        # failures, then nodes by median latency. Nodes we know nothing about
+        # go first amongst equals, so that they get a chance to be measured.
+        now = time.time()
+        with self.lock:
+            nodes = self._get_nodes()
+
+            def key(address):
+                node = nodes.get(address, dict(failures=0))
+                latency = self.get_latency(address, operation)
+                return (self.is_open(address, now), node['failures'], latency is not None, latency or 0)
+            return sorted(addresses, key=key)
+
+    def record_success(self, address, operation, latency):
+        with self.lock:
+            node = self._get_node(address)
+            node['failures'] = 0
+            node['opened_until'] = 0
+            latencies = node['latencies'].setdefault(operation, list())
+            latencies.append(round(latency, 3))
+            del latencies[:-LATENCY_SAMPLES]
+            self._save()
+
+    def record_failure(self, address, operation):
+        with self.lock:
+            node = self._get_node(address)
+            node['failures'] += 1
+            if node['failures'] >= CIRCUIT_BREAKER_THRESHOLD:
+                node['opened_until'] = time.time() + CIRCUIT_BREAKER_TIMEOUT
+            self._save()
+
+    def _save(self):
+        path = self._get_path()
+        if not path:
+            return
+        try:
+
+            # Merge our updates into the latest scores on disk while holding a lock,
+            # so that updates to other nodes by other processes are not lost.
+            with open(f'{path}.lock', 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                nodes = self._read()
+                for address in self.updated:
+                    nodes[address] = self.nodes[address]
+                temp = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(temp[0], 'w') as file:
+                    json.dump(nodes, file)
+                os.replace(temp[1], path)
+            self.nodes = nodes
+        except Exception:
+            # Failing to persist the scores is not fatal.
+            pass
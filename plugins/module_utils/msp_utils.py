@@ -6,10 +6,14 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from .file_utils import get_ram_temp_dir
 from .organizations import Organization
 
+import hashlib
 import os
+import shutil
 import tempfile
+import threading
 
 fake_cacert = '''
 -----BEGIN CERTIFICATE-----
@@ -36,7 +40,7 @@ def convert_identity_to_msp_path(identity, path='temp'):
 
     # Create a temporary directory.
     if path == 'temp':
-        msp_path = tempfile.mkdtemp()
+        msp_path = tempfile.mkdtemp(prefix='msp-', dir=get_ram_temp_dir())
     else:
         msp_path = path
 
@@ -70,6 +74,64 @@ def convert_identity_to_msp_path(identity, path='temp'):
     return msp_path
 
 
+class MSPPathCache:
+
+    def __init__(self):
+        self.entries = dict()
+        self.paths = dict()
+        self.lock = threading.Lock()
+
+    def acquire(self, identity):
+
+        # Identities with the same contents share the same MSP directory; it is
+        # created on first use, and deleted once the last user has released it.
+        key = get_identity_hash(identity)
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                entry = [convert_identity_to_msp_path(identity), 0]
+                self.entries[key] = entry
+                self.paths[entry[0]] = key
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, msp_path):
+        with self.lock:
+            key = self.paths.get(msp_path, None)
+            if key is None:
+                shutil.rmtree(msp_path, ignore_errors=True)
+                return
+            entry = self.entries[key]
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self.entries[key]
+            del self.paths[msp_path]
+        shutil.rmtree(msp_path, ignore_errors=True)
+
+
+msp_path_cache = MSPPathCache()
+
+
+def get_identity_hash(identity):
+    m = hashlib.sha256()
+    for value in [identity.cert, identity.ca, identity.private_key]:
+        value = value or b''
+        m.update(str(len(value)).encode('utf-8'))
+        m.update(b':')
+        m.update(value)
+    m.update(b'hsm' if identity.hsm else b'')
+    return m.hexdigest()
+
+
+def acquire_msp_path(identity):
+    return msp_path_cache.acquire(identity)
+
+
+def release_msp_path(msp_path):
+    msp_path_cache.release(msp_path)
+
+
 def get_default_admins_policy(organization):
     return dict(
         type=1,
@@ -8,7 +8,6 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import base64
-import json
 import os
 import shutil
 import subprocess
@@ -16,10 +15,34 @@ import tempfile
 import time
 import urllib
 
-from ansible.module_utils.urls import open_url
-
 from .fabric_utils import get_fabric_cfg_path
-from .msp_utils import convert_identity_to_msp_path
+from .file_utils import get_temp_file
+from .health_utils import HEALTHZ_PROBE_TIMEOUT, NodeScoreboard, get_last_error, wait_for_healthz
+from .msp_utils import acquire_msp_path, release_msp_path
+
+# The maximum number of ordering service nodes to fetch a block from at the same time.
+FETCH_HEDGE_LIMIT = 2
+
+# The percentile of previous fetch latencies after which a fetch is hedged, and the
+# delay in seconds to use if a node has no previous fetches, or is faster than the minimum.
+FETCH_HEDGE_PERCENTILE = 90
+FETCH_HEDGE_DEFAULT_DELAY = 10
+FETCH_HEDGE_MIN_DELAY = 1
+
+# The interval, in seconds, between checks for a finished fetch, and the time to wait
+# for a fetch that is no longer needed to exit after it has been asked to terminate.
+FETCH_POLL_INTERVAL = 0.1
+FETCH_TERMINATE_TIMEOUT = 5
+
+# The time, in seconds, to wait before retrying a command that could not connect.
+RETRY_INTERVAL = 5
+
+
+def is_retryable_error(output):
+    return "could not send to orderer node" in output or "failed to create new connection" in output
+
+
+node_scoreboard = NodeScoreboard()
 
 
 class OrderingServiceNode:
@@ -144,27 +167,15 @@ class OrderingServiceNode:
             imported=data['imported']
         )
 
-    def wait_for(self, timeout):
+    def wait_for(self, timeout, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
         # If the ordering service node has been pre-created, then it will
         # not be running, so we do not want to wait for it.
         if not self.consenter_proposal_fin:
-            return
-        started = False
-        last_e = None
-        for x in range(timeout):
-            try:
-                url = urllib.parse.urljoin(self.operations_url, '/healthz')
-                response = open_url(url, None, None, method='GET', validate_certs=False, follow_redirects='all')
-                if response.code == 200:
-                    healthz = json.load(response)
-                    if healthz['status'] == 'OK':
-                        started = True
-                        break
-            except Exception as e:
-                last_e = e
-            time.sleep(1)
-        if not started:
-            raise Exception(f'Ordering service node failed to start within {timeout} seconds: {str(last_e)}')
+            return [dict(name=self.name, ready=False, skipped=True, elapsed=None, attempts=0, error=None)]
+        timeline = wait_for_healthz([(self.name, self.operations_url)], timeout, probe_timeout=probe_timeout)
+        if not timeline[0]['ready']:
+            raise Exception(f'Ordering service node failed to start within {timeout} seconds: {timeline[0]["error"]}')
+        return timeline
 
     def connect(self, module, identity, msp_id, hsm, tls_handshake_time_shift=None):
         return OrderingServiceNodeConnection(module, self, identity, msp_id, hsm, tls_handshake_time_shift)
@@ -190,13 +201,13 @@ class OrderingServiceNodeConnection:
         os.write(temp[0], base64.b64decode(self.ordering_service_node.pem))
         os.close(temp[0])
         self.pem_path = temp[1]
-        self.msp_path = convert_identity_to_msp_path(self.identity)
+        self.msp_path = acquire_msp_path(self.identity)
         self.fabric_cfg_path = get_fabric_cfg_path()
         return self
 
     def __exit__(self, type, value, tb):
         os.remove(self.pem_path)
-        shutil.rmtree(self.msp_path)
+        release_msp_path(self.msp_path)
         shutil.rmtree(self.fabric_cfg_path)
 
     def fetch(self, channel, target, path):
@@ -209,6 +220,16 @@ class OrderingServiceNodeConnection:
         else:
             raise Exception(f'Failed to fetch block from ordering service node: {process.stdout}')
 
+    def start_fetch(self, channel, target, path, output):
+
+        # Start fetching the block in the background, writing the output of the
+        # command to the specified file; the caller must wait for the process.
+        env = self._get_environ()
+        args = ['peer', 'channel', 'fetch', target, path, '--channelID', channel]
+        args.extend(self._get_ordering_service())
+        self.module.json_log({'msg': 'starting command', 'args': args, 'env': env})
+        return subprocess.Popen(args, env=env, stdout=output, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, text=True, close_fds=True)
+
     def update(self, channel, path):
         env = self._get_environ()
         args = ['peer', 'channel', 'update', '-f', path, '--channelID', channel]
@@ -250,11 +271,8 @@ class OrderingServiceNodeConnection:
                 return process
             elif attempt >= self.retries:
                 return process
-            elif "could not send to orderer node" in process.stdout:
-                time.sleep(5)
-                continue
-            elif "failed to create new connection" in process.stdout:
-                time.sleep(5)
+            elif is_retryable_error(process.stdout):
+                time.sleep(RETRY_INTERVAL)
                 continue
             else:
                 return process
@@ -297,15 +315,20 @@ class OrderingService:
             nodes.append(OrderingServiceNode.from_json(node))
         return OrderingService(nodes=nodes)
 
-    def wait_for(self, timeout):
-        last_e = None
-        for node in self.nodes:
-            try:
-                node.wait_for(timeout)
-                return
-            except Exception as e:
-                last_e = e
-        raise Exception(f'Ordering service failed to start within {timeout} seconds: {str(last_e)}')
+    def wait_for(self, timeout, quorum=1, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
+        # Probe all of the ordering service nodes at the same time, and stop as soon
+        # as the required number of nodes are ready. Pre-created nodes will not be
+        # running, so we do not wait for them, but they do not count towards the quorum.
+        nodes = [node for node in self.nodes if node.consenter_proposal_fin]
+        skipped = [dict(name=node.name, ready=False, skipped=True, elapsed=None, attempts=0, error=None) for node in self.nodes if not node.consenter_proposal_fin]
+        if not nodes:
+            return skipped
+        required = min(quorum, len(nodes))
+        timeline = wait_for_healthz([(node.name, node.operations_url) for node in nodes], timeout, required=required, probe_timeout=probe_timeout)
+        ready = len([entry for entry in timeline if entry['ready']])
+        if ready < required:
+            raise Exception(f'Ordering service failed to start within {timeout} seconds ({ready} of {required} required nodes ready): {get_last_error(timeline)}')
+        return timeline + skipped
 
     def connect(self, module, identity, msp_id, hsm, tls_handshake_time_shift=None):
         return OrderingServiceConnection(module, self, identity, msp_id, hsm, tls_handshake_time_shift)
@@ -332,29 +355,180 @@ class OrderingServiceConnection:
         pass
 
     def fetch(self, channel, target, path):
+
+        # Try the healthiest ordering service node first, but if it has not answered
+        # within its usual time, hedge the request by also trying the next node. Each
+        # attempt is a separate peer process fetching into its own file; the first to
+        # succeed wins, and any slower attempts are terminated rather than waited for.
+        nodes = self._get_ranked_nodes('fetch')
+        attempts = list()
         last_e = None
-        for node in self.ordering_service.nodes:
-            if not node.consenter_proposal_fin:
-                # Don't connect to ordering service nodes that are not ready.
-                continue
+        next_node = 0
+
+        def start_next():
+            nonlocal last_e, next_node
+            node = nodes[next_node]
+            next_node += 1
             try:
-                with node.connect(self.module, self.identity, self.msp_id, self.hsm, self.tls_handshake_time_shift) as connection:
-                    connection.fetch(channel, target, path)
-                return
+                attempts.append(FetchAttempt(self, node, channel, target, path))
             except Exception as e:
+                node_scoreboard.record_failure(node.api_url, 'fetch')
                 last_e = e
+        try:
+            while attempts or next_node < len(nodes):
+                if not attempts:
+                    start_next()
+                    continue
+                can_hedge = next_node < len(nodes) and len(attempts) < FETCH_HEDGE_LIMIT
+                deadline = time.monotonic() + self._get_hedge_delay(attempts) if can_hedge else None
+                attempt = self._wait_for_attempt(attempts, deadline)
+                if attempt is None:
+                    self.module.json_log({'msg': 'hedging fetch to another ordering service node', 'node': nodes[next_node].api_url})
+                    start_next()
+                    continue
+                attempts.remove(attempt)
+                try:
+                    attempt.finish()
+                except Exception as e:
+                    last_e = e
+                    continue
+                # Keep the mode of any existing file; otherwise, the file was created with
+                # the mode of any other new file.
+                if os.path.exists(path):
+                    shutil.copymode(path, attempt.temp_path)
+                os.replace(attempt.temp_path, path)
+                self.module.json_log({'msg': 'fetched block from ordering service node', 'node': attempt.node.api_url})
+                return
+        finally:
+            # Stop any slower attempts that are still running, and clean up after them.
+            for attempt in attempts:
+                attempt.cancel()
         raise Exception(f'Could not fetch block from any ordering service node: {last_e}')
 
     def update(self, channel, path):
+
+        # Updates are not safe to hedge, so try the healthiest ordering service node first.
         last_e = None
-        for node in self.ordering_service.nodes:
-            if not node.consenter_proposal_fin:
-                # Don't connect to ordering service nodes that are not ready.
-                continue
+        for node in self._get_ranked_nodes('update'):
+            started = time.monotonic()
             try:
                 with node.connect(self.module, self.identity, self.msp_id, self.hsm, self.tls_handshake_time_shift) as connection:
                     connection.update(channel, path)
+                node_scoreboard.record_success(node.api_url, 'update', time.monotonic() - started)
                 return
             except Exception as e:
+                node_scoreboard.record_failure(node.api_url, 'update')
                 last_e = e
         raise Exception(f'Could not update channel on any ordering service node: {last_e}')
+
+    def _get_ranked_nodes(self, operation):
+        # Don't connect to ordering service nodes that are not ready.
+        nodes = [node for node in self.ordering_service.nodes if node.consenter_proposal_fin]
+        ranked = node_scoreboard.rank([node.api_url for node in nodes], operation)
+        nodes.sort(key=lambda node: ranked.index(node.api_url))
+        self.module.json_log({'msg': 'ranked ordering service nodes', 'operation': operation, 'nodes': ranked})
+        return nodes
+
+    def _get_hedge_delay(self, attempts):
+        # Wait until the most recent attempt has taken longer than usual for that node.
+        attempt = max(attempts, key=lambda attempt: attempt.started)
+        latency = node_scoreboard.get_latency(attempt.node.api_url, 'fetch', FETCH_HEDGE_PERCENTILE)
+        if latency is None:
+            latency = FETCH_HEDGE_DEFAULT_DELAY
+        return max(0, attempt.started + max(latency, FETCH_HEDGE_MIN_DELAY) - time.monotonic())
+
+    def _wait_for_attempt(self, attempts, deadline):
+        # Wait for any of the attempts to finish, returning None if the deadline expires first.
+        while True:
+            now = time.monotonic()
+            for attempt in attempts:
+                if attempt.poll(now):
+                    return attempt
+            if deadline is not None and now >= deadline:
+                return None
+            time.sleep(FETCH_POLL_INTERVAL if deadline is None else max(0, min(FETCH_POLL_INTERVAL, deadline - now)))
+
+
+class FetchAttempt:
+
+    # A single attempt to fetch a block from an ordering service node, running the
+    # peer command in the background so that it can be stopped if another node wins.
+    # Like the other commands, the fetch is retried if it could not connect to the node.
+    def __init__(self, connection, node, channel, target, path):
+        self.connection = connection
+        self.node = node
+        self.args = (channel, target)
+        self.temp_path = get_temp_file(os.path.dirname(os.path.abspath(path)), 0o666)
+        self.node_connection = None
+        self.output = None
+        self.process = None
+        self.attempt = 0
+        self.retry_at = None
+        self.stdout = None
+        self.started = time.monotonic()
+        try:
+            self.node_connection = node.connect(connection.module, connection.identity, connection.msp_id, connection.hsm, connection.tls_handshake_time_shift)
+            self.node_connection.__enter__()
+            self._start()
+        except Exception:
+            self.cancel()
+            raise
+
+    def _start(self):
+        self.attempt += 1
+        self.retry_at = None
+        self.output = tempfile.TemporaryFile(mode='w+')
+        (channel, target) = self.args
+        self.process = self.node_connection.start_fetch(channel, target, self.temp_path, self.output)
+
+    def poll(self, now):
+
+        # Check if the attempt has finished, starting the next retry when it is due.
+        if self.process is None:
+            if now >= self.retry_at:
+                self._start()
+            return False
+        returncode = self.process.poll()
+        if returncode is None:
+            return False
+        self.output.seek(0)
+        self.stdout = self.output.read()
+        self.output.close()
+        self.connection.module.json_log({'msg': 'command finished', 'rc': returncode, 'stdout': self.stdout, 'attempt': self.attempt})
+        if returncode != 0 and self.attempt < self.node_connection.retries and is_retryable_error(self.stdout):
+            self.process = None
+            self.retry_at = now + RETRY_INTERVAL
+            return False
+        return True
+
+    def finish(self):
+
+        # Record the outcome of an attempt that has finished, raising if it failed.
+        returncode = self.process.returncode
+        self._close()
+        if returncode != 0:
+            node_scoreboard.record_failure(self.node.api_url, 'fetch')
+            os.remove(self.temp_path)
+            raise Exception(f'Failed to fetch block from ordering service node: {self.stdout}')
+        node_scoreboard.record_success(self.node.api_url, 'fetch', time.monotonic() - self.started)
+
+    def cancel(self):
+
+        # Stop an attempt that lost the race; this is not counted as a failure of the node.
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(FETCH_TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self._close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def _close(self):
+        if self.output is not None:
+            self.output.close()
+        if self.node_connection is not None:
+            self.node_connection.__exit__(None, None, None)
+            self.node_connection = None
@@ -10,19 +10,25 @@ __metaclass__ = type
 import base64
 import json
 import os
-import random
 import re
 import shutil
 import subprocess
 import tempfile
+import threading
 import time
 import urllib
 
-from ansible.module_utils.urls import open_url
-
+from .channel_configs import ChannelConfig
+from .channel_utils import config_block_cache
+from .concurrency_utils import Backoff
 from .fabric_utils import get_fabric_cfg_path
-from .msp_utils import convert_identity_to_msp_path
-from .proto_utils import proto_to_json
+from .health_utils import HEALTHZ_PROBE_TIMEOUT, endpoint_prober, wait_for_healthz
+from .msp_utils import acquire_msp_path, release_msp_path
+
+# The initial and maximum intervals, in seconds, between checks for instantiated
+# chaincode when the peer will not deliver blocks.
+CHAINCODE_POLL_INITIAL_INTERVAL = 1
+CHAINCODE_POLL_MAX_INTERVAL = 5
 
 
 class Peer:
@@ -102,31 +108,38 @@ class Peer:
             imported=data['imported']
         )
 
-    def wait_for(self, timeout):
-        started = False
-        last_e = None
-        for x in range(timeout):
-            try:
-                url = urllib.parse.urljoin(self.operations_url, '/healthz')
-                response = open_url(url, None, None, method='GET', validate_certs=False, follow_redirects='all')
-                if response.code == 200:
-                    healthz = json.load(response)
-                    if healthz['status'] == 'OK':
-                        started = True
-                        break
-            except Exception as e:
-                last_e = e
-            time.sleep(1)
-        if not started:
-            raise Exception(f'Peer failed to start within {timeout} seconds: {str(last_e)}')
-
-    def connect(self, module, identity, msp_id, hsm):
-        return PeerConnection(module, self, identity, msp_id, hsm)
+    def wait_for(self, timeout, probe_timeout=HEALTHZ_PROBE_TIMEOUT):
+        timeline = wait_for_healthz([(self.name, self.operations_url)], timeout, probe_timeout=probe_timeout)
+        if not timeline[0]['ready']:
+            raise Exception(f'Peer failed to start within {timeout} seconds: {timeline[0]["error"]}')
+        return timeline
+
+    def connect(self, module, identity, msp_id, hsm, channel_configs=None):
+        return PeerConnection(module, self, identity, msp_id, hsm, channel_configs=channel_configs)
+
+
+class ChannelConfigCache:
+
+    # Holds the parsed channel config for each channel, so that many connections used
+    # by the same task can share a single fetch and decode of the config block, and the
+    # indexes built over it.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channel_configs = dict()
+        self.channel_locks = dict()
+
+    def get(self, channel, fetch):
+        with self.lock:
+            channel_lock = self.channel_locks.setdefault(channel, threading.Lock())
+        with channel_lock:
+            if channel not in self.channel_configs:
+                self.channel_configs[channel] = fetch(channel)
+            return self.channel_configs[channel]
 
 
 class PeerConnection:
 
-    def __init__(self, module, peer, identity, msp_id, hsm, retries=5):
+    def __init__(self, module, peer, identity, msp_id, hsm, retries=5, channel_configs=None):
         if hsm and not identity.hsm:
             raise Exception('HSM configuration specified, but specified identity does not use HSM')
         elif not hsm and identity.hsm:
@@ -137,13 +150,16 @@ class PeerConnection:
         self.msp_id = msp_id
         self.hsm = hsm
         self.retries = retries
+        # If no cache is shared with other connections, the channel configs
+        # are still cached for the lifetime of this connection.
+        self.channel_configs = channel_configs if channel_configs is not None else ChannelConfigCache()
 
     def __enter__(self):
         temp = tempfile.mkstemp()
         os.write(temp[0], base64.b64decode(self.peer.pem))
         os.close(temp[0])
         self.pem_path = temp[1]
-        self.msp_path = convert_identity_to_msp_path(self.identity)
+        self.msp_path = acquire_msp_path(self.identity)
         self.other_paths = list()
         self.fabric_cfg_path = get_fabric_cfg_path()
         return self
@@ -152,7 +168,7 @@ class PeerConnection:
         for other_path in self.other_paths:
             os.remove(other_path)
         os.remove(self.pem_path)
-        shutil.rmtree(self.msp_path)
+        release_msp_path(self.msp_path)
         shutil.rmtree(self.fabric_cfg_path)
 
     def list_channels(self):
@@ -242,6 +258,7 @@ class PeerConnection:
 
     def instantiate_chaincode(self, channel, name, version, ctor, endorsement_policy, collections_config, escc, vscc, orderer):
         env = self._get_environ()
+        start_block = self.get_channel_height(channel)
         args = ['peer', 'chaincode', 'instantiate', '-C', channel, '-n', name, '-v', version]
         if ctor is not None:
             args.extend(['-c', ctor])
@@ -256,7 +273,7 @@ class PeerConnection:
         args.extend(self._get_ordering_service(channel, orderer))
         process = self._run_command(args, env)
         if process.returncode == 0:
-            transaction_committed = self.wait_for_chaincode(channel, name, version)
+            transaction_committed = self.wait_for_chaincode(channel, name, version, start_block)
             if transaction_committed:
                 return
             else:
@@ -266,6 +283,7 @@ class PeerConnection:
 
     def upgrade_chaincode(self, channel, name, version, ctor, endorsement_policy, collections_config, escc, vscc, orderer):
         env = self._get_environ()
+        start_block = self.get_channel_height(channel)
         args = ['peer', 'chaincode', 'upgrade', '-C', channel, '-n', name, '-v', version]
         if ctor is not None:
             args.extend(['-c', ctor])
@@ -280,7 +298,7 @@ class PeerConnection:
         args.extend(self._get_ordering_service(channel, orderer))
         process = self._run_command(args, env)
         if process.returncode == 0:
-            transaction_committed = self.wait_for_chaincode(channel, name, version)
+            transaction_committed = self.wait_for_chaincode(channel, name, version, start_block)
             if transaction_committed:
                 return
             else:
@@ -288,18 +306,64 @@ class PeerConnection:
         else:
             raise Exception(f'Failed to upgrade chaincode on channel: {process.stdout} {process.stderr}')
 
-    def wait_for_chaincode(self, channel, name, version):
+    def get_channel_height(self, channel):
+        env = self._get_environ()
+        args = ['peer', 'channel', 'getinfo', '--channelID', channel]
+        process = self._run_command(args, env)
+        if process.returncode == 0:
+            for line in process.stdout.splitlines():
+                if line.startswith('Blockchain info: '):
+                    return json.loads(line[len('Blockchain info: '):])['height']
+        raise Exception(f'Failed to get channel information from peer: {process.stdout} {process.stderr}')
+
+    def wait_for_block(self, channel, number, timeout):
+        # The peer delivers a block that it has not committed yet as soon as it
+        # commits it, so fetching the next block waits for the next commit.
+        temp = tempfile.mkstemp()
+        os.close(temp[0])
+        env = self._get_environ()
+        args = ['peer', 'channel', 'fetch', str(number), temp[1], '--channelID', channel]
+        try:
+            self.module.json_log({'msg': 'waiting for block', 'args': args, 'timeout': timeout})
+            process = subprocess.run(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE, text=True, close_fds=True, timeout=timeout)
+            self.module.json_log({'msg': 'block wait finished', 'rc': process.returncode, 'stderr': process.stderr})
+            return process.returncode == 0
+        except subprocess.TimeoutExpired:
+            return False
+        finally:
+            os.remove(temp[1])
+
+    def wait_for_chaincode(self, channel, name, version, start_block=None, timeout=30):
         # The commands for instantiating and upgrading chaincode do not
         # support the --waitForEvent options, which means that if the
         # transactions are lost in the ordering service or fail validation,
-        # we will not know about it.
-        for attempt in range(0, 30):
-            time.sleep(1)
+        # we will not know about it. Rather than polling, we wait for each new
+        # block to be committed, starting from the height of the channel before
+        # the transaction was submitted, and only then check the chaincode.
+        # If the peer will not deliver blocks to us, then we remember that and
+        # fall back to polling, backing off between attempts.
+        deadline = time.monotonic() + timeout
+        block = start_block
+        if block is None:
+            block = self.get_channel_height(channel)
+        backoff = None
+        while True:
             chaincodes = self.list_instantiated_chaincodes(channel)
             for chaincode in chaincodes:
                 if chaincode['name'] == name and chaincode['version'] == version:
                     return True
-        return False
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= 0:
+                return False
+            if backoff is None:
+                if self.wait_for_block(channel, block, remaining):
+                    block += 1
+                    continue
+                backoff = Backoff(CHAINCODE_POLL_INITIAL_INTERVAL, CHAINCODE_POLL_MAX_INTERVAL)
+                now = time.monotonic()
+            backoff.failed(now)
+            time.sleep(max(0, min(backoff.next_attempt, deadline) - now))
 
     def list_installed_chaincodes_newlc(self):
         env = self._get_environ()
@@ -436,87 +500,60 @@ class PeerConnection:
             env['CORE_PEER_BCCSP_PKCS11_FILEKEYSTORE_KEYSTORE'] = os.path.join(self.msp_path, 'keystore')
         return env
 
-    def _get_anchor_peers(self, channel, msp_ids):
-        temp = tempfile.mkstemp()
-        os.close(temp[0])
-        block_path = temp[1]
-        try:
-            self.fetch_channel(channel, 'config', block_path)
-            with open(block_path, 'rb') as file:
-                block = proto_to_json('common.Block', file.read())
-            channel_group = block['data']['data'][0]['payload']['data']['config']['channel_group']
-            application_groups = channel_group['groups']['Application']['groups']
-            args = []
-            for msp_id in msp_ids:
-                msp = application_groups.get(msp_id, None)
-                if msp is None:
-                    raise Exception(f'Organization {msp_id} is not a member of the channel {channel}')
-                msp_value = msp['values']['MSP']
-                msp_config = msp_value['value']['config']
-                tls_root_certs = msp_config['tls_root_certs']
-                if tls_root_certs is None:
-                    tls_root_certs = []
-                tls_intermediate_certs = msp_config['tls_intermediate_certs']
-                if tls_intermediate_certs is None:
-                    tls_intermediate_certs = []
-                tls_certs = tls_root_certs + tls_intermediate_certs
-                temp = tempfile.mkstemp()
-                for tls_cert in tls_certs:
-                    decoded_tls_cert = base64.b64decode(tls_cert)
-                    os.write(temp[0], decoded_tls_cert)
-                    if not decoded_tls_cert.endswith(b'\n'):
-                        os.write(temp[0], b'\n')
-                os.close(temp[0])
-                pem_path = temp[1]
-                self.other_paths.append(pem_path)
-                anchor_peers_value = msp['values'].get('AnchorPeers', None)
-                if anchor_peers_value is None:
-                    raise Exception(f'Organization {msp_id} has no anchor peers defined for channel {channel}')
-                anchor_peers = anchor_peers_value['value']['anchor_peers']
-                if not anchor_peers:
-                    raise Exception(f'Organization {msp_id} has no anchor peers defined for channel {channel}')
-                anchor_peer = random.choice(anchor_peers)
-                host = anchor_peer['host']
-                port = anchor_peer['port']
-                address = f'{host}:{port}'
-                args.extend(['--peerAddresses', address, '--tlsRootCertFiles', pem_path])
-            return args
-        finally:
-            os.remove(block_path)
-
-    def _get_ordering_service(self, channel, orderer):
-        temp = tempfile.mkstemp()
-        os.close(temp[0])
-        block_path = temp[1]
-        try:
+    def _fetch_channel_config(self, channel):
+        source = [self.peer.api_url]
+        result = config_block_cache.get(channel, source, lambda target, block_path: self.fetch_channel(channel, target, block_path), decode=True)
+        self.module.json_log({'msg': 'got config block', 'channel': channel, 'number': result['number'], 'cached': result['cached']})
+        return ChannelConfig.from_json(result['config_json'])
 
-            if orderer:
-                ordererNode = random.choice(orderer.nodes)
-                tlsCert = ordererNode.tls_ca_root_cert
-                apiUrl = urllib.parse.urlparse(ordererNode.api_url)
-                address = f'{apiUrl.hostname}:{apiUrl.port}'
-                self.module.json_log({"msg": "using task specified orderer", "tls_cert": tlsCert, "api_url": address})
-            else:
-                self.fetch_channel(channel, 'config', block_path)
-                with open(block_path, 'rb') as file:
-                    block = proto_to_json('common.Block', file.read())
-
-                channel_group = block['data']['data'][0]['payload']['data']['config']['channel_group']
-                orderer_group = channel_group['groups']['Orderer']
-                consenters = orderer_group['values']['ConsensusType']['value']['metadata']['consenters']
-                consenter = random.choice(consenters)
-                tlsCert = consenter['server_tls_cert']
-                address = f'{consenter["host"]}:{consenter["port"]}'
-                self.module.json_log({"msg": "using orderer from channel", "tls_cert": tlsCert, "api_url": address})
+    def _get_channel_config(self, channel):
+        return self.channel_configs.get(channel, self._fetch_channel_config)
 
+    def _get_anchor_peers(self, channel, msp_ids):
+        channel_config = self._get_channel_config(channel)
+        args = []
+        for msp_id in msp_ids:
+            tls_certs = channel_config.get_member_tls_certs(msp_id)
+            if tls_certs is None:
+                raise Exception(f'Organization {msp_id} is not a member of the channel {channel}')
             temp = tempfile.mkstemp()
-            os.write(temp[0], base64.b64decode(tlsCert))
+            for tls_cert in tls_certs:
+                decoded_tls_cert = base64.b64decode(tls_cert)
+                os.write(temp[0], decoded_tls_cert)
+                if not decoded_tls_cert.endswith(b'\n'):
+                    os.write(temp[0], b'\n')
             os.close(temp[0])
             pem_path = temp[1]
             self.other_paths.append(pem_path)
-            return ['-o', address, '--tls', '--cafile', pem_path]
-        finally:
-            os.remove(block_path)
+            addresses = channel_config.get_anchor_peers(msp_id)
+            if not addresses:
+                raise Exception(f'Organization {msp_id} has no anchor peers defined for channel {channel}')
+            (address, timings) = endpoint_prober.select(addresses)
+            self.module.json_log({'msg': 'selected anchor peer', 'msp_id': msp_id, 'address': address, 'timings': timings})
+            args.extend(['--peerAddresses', address, '--tlsRootCertFiles', pem_path])
+        return args
+
+    def _get_ordering_service(self, channel, orderer):
+        if orderer:
+            nodes = dict()
+            for ordererNode in orderer.nodes:
+                apiUrl = urllib.parse.urlparse(ordererNode.api_url)
+                nodes.setdefault(f'{apiUrl.hostname}:{apiUrl.port}', ordererNode)
+            (address, timings) = endpoint_prober.select(list(nodes.keys()))
+            tlsCert = nodes[address].tls_ca_root_cert
+            self.module.json_log({"msg": "using task specified orderer", "tls_cert": tlsCert, "api_url": address, "timings": timings})
+        else:
+            consenters = self._get_channel_config(channel).get_consenters()
+            (address, timings) = endpoint_prober.select(list(consenters.keys()))
+            tlsCert = consenters[address]['server_tls_cert']
+            self.module.json_log({"msg": "using orderer from channel", "tls_cert": tlsCert, "api_url": address, "timings": timings})
+
+        temp = tempfile.mkstemp()
+        os.write(temp[0], base64.b64decode(tlsCert))
+        os.close(temp[0])
+        pem_path = temp[1]
+        self.other_paths.append(pem_path)
+        return ['-o', address, '--tls', '--cafile', pem_path]
 
     def _run_command(self, args, env):
         for attempt in range(1, self.retries + 1):
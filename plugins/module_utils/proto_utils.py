@@ -8,10 +8,26 @@ __metaclass__ = type
 
 from .file_utils import get_temp_file
 
+import io
 import json
 import os
 import subprocess
 
+# The protobuf wire types that we need to understand.
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+# The index of the block metadata that contains the signatures, and in Fabric v2.x the last config.
+BLOCK_METADATA_SIGNATURES = 0
+
+# The index of the block metadata that contains the last config in Fabric v1.4.
+BLOCK_METADATA_LAST_CONFIG = 1
+
+# The type in the channel header of a config transaction (common.HeaderType.CONFIG).
+HEADER_TYPE_CONFIG = 1
+
 
 def proto_to_json(proto_type, proto_input):
     temp_file = get_temp_file()
@@ -36,3 +52,125 @@ def json_to_proto(proto_type, json_input):
             return file.read()
     finally:
         os.remove(temp_file)
+
+
+def read_varint(file):
+    result = 0
+    shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte and shift == 0:
+            return None
+        elif not byte:
+            raise Exception('Unexpected end of file')
+        result |= (byte[0] & 0x7f) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+
+def iterate_fields(file, end=None):
+
+    # Yield (field number, wire type, value or length) for each field in a protobuf message.
+    # The value of a length delimited field is not read, the caller must read or skip it.
+    while end is None or file.tell() < end:
+        tag = read_varint(file)
+        if tag is None:
+            return
+        (field_number, wire_type) = (tag >> 3, tag & 0x07)
+        if wire_type == WIRE_TYPE_VARINT:
+            yield (field_number, wire_type, read_varint(file))
+        elif wire_type == WIRE_TYPE_FIXED64:
+            yield (field_number, wire_type, file.read(8))
+        elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+            length = read_varint(file)
+            start = file.tell()
+            yield (field_number, wire_type, length)
+            if file.tell() == start:
+                file.seek(length, os.SEEK_CUR)
+        elif wire_type == WIRE_TYPE_FIXED32:
+            yield (field_number, wire_type, file.read(4))
+        else:
+            raise Exception(f'Unsupported protobuf wire type {wire_type}')
+
+
+def get_fields(message):
+
+    # Get the values of the fields in an encoded protobuf message, keyed by field number.
+    # Length delimited fields are returned as bytes, and every field is returned as a list.
+    fields = dict()
+    file = io.BytesIO(message)
+    for (field_number, wire_type, value) in iterate_fields(file):
+        if wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+            value = file.read(value)
+        fields.setdefault(field_number, list()).append(value)
+    return fields
+
+
+def _get_field(message, *field_numbers):
+
+    # Follow a path of (first occurrence) fields through nested messages.
+    for field_number in field_numbers:
+        values = get_fields(message).get(field_number, None)
+        if not values:
+            return None
+        message = values[0]
+    return message
+
+
+def get_block_info(block_proto):
+
+    # Get the number and data hash of a block, the number of the last config block, and the type and
+    # channel ID of the first transaction, without decoding the whole block. The block is a common.Block
+    # message, where the header has the number and data hash, the first envelope has the channel header,
+    # and the metadata has the last config index.
+    block_fields = get_fields(block_proto)
+    number = None
+    data_hash = None
+    if 1 in block_fields:
+        header_fields = get_fields(block_fields[1][0])
+        number = header_fields[1][0] if 1 in header_fields else 0
+        data_hash = header_fields[3][0].hex() if 3 in header_fields else None
+    channel_id = None
+    header_type = None
+    if 2 in block_fields:
+        channel_header = _get_field(block_fields[2][0], 1, 1, 1, 1)
+        if channel_header is not None:
+            header_type = _get_field(channel_header, 1) or 0
+            channel_id = _get_field(channel_header, 4)
+            channel_id = channel_id.decode('utf-8') if channel_id is not None else ''
+    last_config = None
+    if 3 in block_fields:
+        metadata = get_fields(block_fields[3][0]).get(1, list())
+
+        # Fabric v2.x stores an OrdererBlockMetadata message in the signatures metadata.
+        if len(metadata) > BLOCK_METADATA_SIGNATURES:
+            orderer_block_metadata = _get_field(metadata[BLOCK_METADATA_SIGNATURES], 1)
+            if orderer_block_metadata:
+                last_config_message = _get_field(orderer_block_metadata, 1)
+                if last_config_message is not None:
+                    last_config = _get_field(last_config_message, 1) or 0
+
+        # Fabric v1.4 stores a LastConfig message in the last config metadata.
+        if last_config is None and len(metadata) > BLOCK_METADATA_LAST_CONFIG:
+            last_config_message = _get_field(metadata[BLOCK_METADATA_LAST_CONFIG], 1)
+            if last_config_message:
+                last_config = _get_field(last_config_message, 1) or 0
+    # A config block is always its own last config block, even if the metadata does not say so,
+    # as is the case for the genesis block of a channel.
+    if header_type == HEADER_TYPE_CONFIG:
+        last_config = number
+    return dict(number=number, data_hash=data_hash, last_config=last_config, channel_id=channel_id, type=header_type)
+
+
+def get_block_config(block_proto):
+
+    # Get the encoded common.Config message from a config block, without decoding the whole block.
+    # The config is in the first envelope: Envelope.payload -> Payload.data -> ConfigEnvelope.config.
+    block_fields = get_fields(block_proto)
+    if 2 not in block_fields:
+        raise Exception('The block does not contain any data')
+    config_proto = _get_field(block_fields[2][0], 1, 1, 2, 1)
+    if config_proto is None:
+        raise Exception('The block is not a config block')
+    return config_proto
@@ -12,6 +12,7 @@ import json
 
 from .certificate_authorities import CertificateAuthority
 from .consoles import Console
+from .dict_utils import copy_dict
 from .enrolled_identities import EnrolledIdentity
 from .ordering_services import OrderingService, OrderingServiceNode
 from .organizations import Organization
@@ -391,10 +392,13 @@ def get_certs_from_certificate_authority(console, module):
 
 
 def get_identity_by_module(module, parameter_name='identity'):
+    return get_identity_by_value(module.params[parameter_name])
+
+
+def get_identity_by_value(identity):
 
     # If the identity is a dictionary, then we assume that
     # it contains all of the required keys/values.
-    identity = module.params[parameter_name]
     if isinstance(identity, dict):
         return EnrolledIdentity.from_json(identity)
 
@@ -405,6 +409,19 @@ def get_identity_by_module(module, parameter_name='identity'):
     return EnrolledIdentity.from_json(data)
 
 
+def load_policy(name, policy):
+
+    # If the policy is a string, then it is the path to a JSON file containing the
+    # policy. Otherwise, it is the policy itself, which is copied so that it can be
+    # added to a config without the config and the module parameters sharing it.
+    if isinstance(policy, str):
+        with open(policy, 'r') as file:
+            return json.load(file)
+    elif isinstance(policy, dict):
+        return copy_dict(policy)
+    raise Exception(f'The policy {name} is invalid')
+
+
 def resolve_identity(console, module, identity, msp_id):
 
     # If the identity contains the CA field, then we do
@@ -439,3 +456,121 @@ def resolve_identity(console, module, identity, msp_id):
         parsed_certs.append(base64.b64decode(cert).decode('utf8'))
     identity.ca = "\n".join(parsed_certs).encode('utf8')
     return identity
+
+
+# The module parameters used to request components by name, and the type of each component.
+COMPONENT_PARAMETERS = [
+    ('certificate_authorities', 'fabric-ca'),
+    ('peers', 'fabric-peer'),
+    ('ordering_service_nodes', 'fabric-orderer')
+]
+
+
+class ComponentListing:
+
+    # Looks up components by name, using a single request to the console for all of them,
+    # and only logging in to the console if any are specified by name. Components that are
+    # passed as dicts (or lists, for ordering services) are used as they are. If the caller
+    # has already logged in to the console, then it can be passed in to be reused.
+    def __init__(self, module, console=None):
+        self.module = module
+        self.console = console
+        self.components = None
+        self.by_name = None
+
+    def get_console(self):
+        if self.console is None:
+            if self.module.params['api_endpoint'] is None:
+                raise Exception('api_endpoint must be specified when components are specified by name')
+            self.console = get_console(self.module)
+        return self.console
+
+    def get_all_components(self):
+
+        # Get all of the components, without their deployment attributes.
+        if self.components is None:
+            self.components = self.get_console().get_all_components('omitted')
+            self.by_name = dict()
+            for component in self.components:
+                self.by_name[(component.get('type', None), component.get('display_name', None))] = component
+        return self.components
+
+    def get_component(self, component_type, name, fail_on_missing=True):
+        self.get_all_components()
+        component = self.by_name.get((component_type, name), None)
+        if component is None and fail_on_missing:
+            raise Exception(f'The component {name} of type {component_type} does not exist')
+        return component
+
+    def get_components(self, requested):
+
+        # Get the components for a list of (type, name) tuples, in the same order, ignoring
+        # any duplicates, and failing if any of the components do not exist.
+        result = list()
+        seen = set()
+        for (component_type, name) in requested:
+            if (component_type, name) in seen:
+                continue
+            seen.add((component_type, name))
+            result.append(self.get_component(component_type, name))
+        return result
+
+    def get_requested_components(self, msp_ids=None):
+
+        # Get the components requested by name using the certificate_authorities, peers, and
+        # ordering_service_nodes parameters, followed by the peers and ordering service nodes
+        # for any of the specified MSP IDs, ignoring any duplicates.
+        requested = list()
+        for (parameter_name, component_type) in COMPONENT_PARAMETERS:
+            for name in self.module.params[parameter_name]:
+                requested.append((component_type, name))
+        if msp_ids:
+            for component in self.get_all_components():
+                component_type = component.get('type', None)
+                if component_type in ['fabric-peer', 'fabric-orderer'] and component.get('msp_id', None) in msp_ids:
+                    requested.append((component_type, component.get('display_name', None)))
+        return self.get_components(requested)
+
+    def find_components(self, name, component_types):
+
+        # Get all of the components of any of the specified types with the specified name;
+        # there may be more than one, as names are only unique for each type of component.
+        return [
+            component for component in self.get_all_components()
+            if component.get('type', None) in component_types and component.get('display_name', None) == name
+        ]
+
+    def get_organization(self, organization):
+        if isinstance(organization, dict):
+            return Organization.from_json(organization)
+        component = self.get_component('msp', organization, False)
+        if component is None:
+            raise Exception(f'The organization {organization} does not exist')
+        return Organization.from_json(self.console.extract_organization_info(component))
+
+    def get_peer(self, peer):
+        if isinstance(peer, dict):
+            return Peer.from_json(peer)
+        component = self.get_component('fabric-peer', peer, False)
+        if component is None:
+            raise Exception(f'The peer {peer} does not exist')
+        return Peer.from_json(self.console.extract_peer_info(component))
+
+    def get_ordering_service(self, ordering_service):
+        if isinstance(ordering_service, list):
+            return OrderingService.from_json(ordering_service)
+        components = [
+            component for component in self.get_all_components()
+            if component.get('type', None) == 'fabric-orderer' and component.get('cluster_name', None) == ordering_service
+        ]
+        if not components:
+            raise Exception(f'The ordering service {ordering_service} does not exist')
+        return OrderingService.from_json(self.console.extract_ordering_service_info(components))
+
+    def get_ordering_service_node(self, ordering_service_node):
+        if isinstance(ordering_service_node, dict):
+            return OrderingServiceNode.from_json(ordering_service_node)
+        component = self.get_component('fabric-orderer', ordering_service_node, False)
+        if component is None:
+            raise Exception(f'The ordering service node {ordering_service_node} does not exist')
+        return OrderingServiceNode.from_json(self.console.extract_ordering_service_node_info(component))
@@ -9,6 +9,7 @@ __metaclass__ = type
 
 from ansible.module_utils._text import to_native
 
+from ..module_utils.chaincode_utils import get_package_id
 from ..module_utils.module import BlockchainModule
 from ..module_utils.utils import (get_console, get_identity_by_module,
                                   get_ordering_service_by_name,
@@ -127,8 +128,15 @@ options:
     package_id:
         description:
             - The package ID of the chaincode to use for the chaincode definition.
+            - You must specify one of I(package_id) or I(path).
+        type: str
+    path:
+        description:
+            - The path to the chaincode package to use for the chaincode definition.
+            - The package ID is computed from the chaincode package, and remembered
+              until the chaincode package is modified.
+            - You must specify one of I(package_id) or I(path).
         type: str
-        required: true
     sequence:
         description:
             - The sequence number of the chaincode definition. If and only if this is set to 0 the next sequence
@@ -187,6 +195,22 @@ EXAMPLES = '''
     sequence: 1
     package_id: fabcar@1.0.0:eb4bd64f7014f7d42e9d358035802242741b974e8dfcd37c59f9c21ce29d781e
 
+- name: Approve the chaincode definition on the channel using the package ID of a chaincode package
+  hyperledger.fabric_ansible_collection.approved_chaincode:
+    state: present
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    peer: Org1 Peer
+    identity: Org1 Admin.json
+    msp_id: Org1MSP
+    channel: mychannel
+    name: fabcar
+    version: 1.0.0
+    sequence: 1
+    path: fabcar@1.0.0.tgz
+
 - name: Approve the chaincode definition on the channel with an endorsement policy and collection configuration
   hyperledger.fabric_ansible_collection.approved_chaincode:
     state: present
@@ -313,7 +337,8 @@ def main():
         channel=dict(type='str', required=True),
         name=dict(type='str', required=True),
         version=dict(type='str', required=True),
-        package_id=dict(type='str', required=True),
+        package_id=dict(type='str'),
+        path=dict(type='str'),
         sequence=dict(type='int', required=True),
         endorsement_policy_ref=dict(type='str'),
         endorsement_policy=dict(type='str'),
@@ -323,11 +348,14 @@ def main():
         collections_config=dict(type='str'),
         orderer_name=dict(type='str'))
     required_if = [('api_authtype', 'basic', ['api_secret'])]
-    mutually_exclusive = [['endorsement_policy_ref', 'endorsement_policy']]
+    required_one_of = [['package_id', 'path']]
+    mutually_exclusive = [['endorsement_policy_ref', 'endorsement_policy'],
+                          ['package_id', 'path']]
     module = BlockchainModule(min_fabric_version='2.1.1',
                               argument_spec=argument_spec,
                               supports_check_mode=True,
                               required_if=required_if,
+                              required_one_of=required_one_of,
                               mutually_exclusive=mutually_exclusive)
 
     # Validate HSM requirements if HSM is specified.
@@ -358,6 +386,8 @@ def main():
         name = module.params['name']
         version = module.params['version']
         package_id = module.params['package_id']
+        if module.params['path'] is not None:
+            package_id = get_package_id(module.params['path'])['package_id']
         sequence = module.params['sequence']
         endorsement_policy_ref = module.params['endorsement_policy_ref']
         endorsement_policy = module.params['endorsement_policy']
@@ -11,8 +11,8 @@ from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params
 
 from ..module_utils.certificate_authorities import CertificateAuthority
-from ..module_utils.dict_utils import (copy_dict, diff_dicts, equal_dicts,
-                                       merge_dicts)
+from ..module_utils.dict_utils import (changes_to_dict, copy_dict,
+                                       diff_paths, merge_dicts)
 from ..module_utils.module import BlockchainModule
 from ..module_utils.utils import get_console
 
@@ -338,6 +338,43 @@ certificate_authority:
                 - The TLS certificate chain is returned as a base64 encoded PEM.
             type: str
             sample: LS0tLS1CRUdJTiBDRVJUSUZJQ0FURS0t...
+readiness:
+    description:
+        - The readiness timeline, with an entry for each certificate authority that was waited for.
+    type: list
+    elements: dict
+    returned: when I(state) is C(present)
+    contains:
+        name:
+            description:
+                - The name of the certificate authority.
+            type: str
+            sample: Org1 CA
+        ready:
+            description:
+                - True if the certificate authority was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the certificate authority was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the certificate authority was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the certificate authority.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the certificate authority was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -585,7 +622,8 @@ def main():
             # Check to see if any banned changes have been made.
             # HACK: zone is documented as a permitted change, but it has no effect.
             permitted_changes = ['resources', 'config_override', 'replicas', 'version']
-            diff = diff_dicts(certificate_authority, new_certificate_authority)
+            changes = diff_paths(certificate_authority, new_certificate_authority)
+            diff = changes_to_dict(changes)
             for change in diff:
                 if change not in permitted_changes:
                     raise Exception(f'{change} cannot be changed from {certificate_authority[change]} to {new_certificate_authority[change]} for existing certificate authority')
@@ -601,7 +639,7 @@ def main():
                 del new_certificate_authority['version']
 
             # If the certificate authority has changed, apply the changes.
-            certificate_authority_changed = not equal_dicts(certificate_authority, new_certificate_authority)
+            certificate_authority_changed = bool(changes)
             if certificate_authority_changed:
 
                 # Log the differences.
@@ -609,7 +647,8 @@ def main():
                     'msg': 'differences detected, updating certificate authority',
                     'certificate_authority': certificate_authority,
                     'new_certificate_authority': new_certificate_authority,
-                    'diff': diff
+                    'diff': diff,
+                    'changes': [change['path'] for change in changes]
                 })
 
                 # Remove anything that hasn't changed from the updates.
@@ -627,10 +666,10 @@ def main():
         # Wait for the certificate authority to start.
         certificate_authority = CertificateAuthority.from_json(console.extract_ca_info(certificate_authority))
         timeout = module.params['wait_timeout']
-        certificate_authority.wait_for(timeout)
+        readiness = certificate_authority.wait_for(timeout)
 
         # Return the certificate authority.
-        module.exit_json(changed=changed, certificate_authority=certificate_authority.to_json())
+        module.exit_json(changed=changed, certificate_authority=certificate_authority.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
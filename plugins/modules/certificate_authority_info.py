@@ -134,6 +134,43 @@ certificate_authority:
                 - The TLS certificate chain is returned as a base64 encoded PEM.
             type: str
             sample: LS0tLS1CRUdJTiBDRVJUSUZJQ0FURS0t...
+readiness:
+    description:
+        - The readiness timeline, with an entry for each certificate authority that was waited for.
+    type: list
+    elements: dict
+    returned: if certificate authority exists
+    contains:
+        name:
+            description:
+                - The name of the certificate authority.
+            type: str
+            sample: Org1 CA
+        ready:
+            description:
+                - True if the certificate authority was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the certificate authority was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the certificate authority was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the certificate authority.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the certificate authority was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -170,10 +207,10 @@ def main():
 
         # Wait for the CA to start.
         wait_timeout = module.params['wait_timeout']
-        certificate_authority.wait_for(wait_timeout)
+        readiness = certificate_authority.wait_for(wait_timeout)
 
         # Return certificate authority information.
-        module.exit_json(exists=True, certificate_authority=certificate_authority.to_json())
+        module.exit_json(exists=True, certificate_authority=certificate_authority.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -0,0 +1,361 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.cert_utils import get_parsed_certs
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import get_console
+
+from ansible.module_utils._text import to_native
+
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: certificate_expiry_info
+short_description: Get the expiry dates of all certificates used by Hyperledger Fabric components
+description:
+    - Get the expiry dates of all of the certificates used by the Hyperledger Fabric certificate authorities,
+      peers, ordering service nodes, and organizations known to the Fabric operations console.
+    - This includes enrollment certificates, TLS certificates, admin certificates, and CA certificates.
+    - All components are retrieved from the Fabric operations console using a single request, and
+      the certificates are parsed in parallel.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    types:
+        description:
+            - The types of component to include in the report.
+            - C(fabric-ca) - Certificate authorities.
+            - C(fabric-peer) - Peers.
+            - C(fabric-orderer) - Ordering service nodes.
+            - C(msp) - Organizations.
+        type: list
+        elements: str
+        default: ['fabric-ca', 'fabric-peer', 'fabric-orderer', 'msp']
+        choices:
+            - fabric-ca
+            - fabric-peer
+            - fabric-orderer
+            - msp
+    expires_within:
+        description:
+            - Only include certificates that expire within this number of days, including
+              certificates that have already expired.
+            - If not specified, all certificates are included.
+        type: int
+    concurrency:
+        description:
+            - The maximum number of certificates to parse at the same time.
+        type: int
+        default: 8
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Get all certificates that expire in the next 30 days
+  hyperledger.fabric_ansible_collection.certificate_expiry_info:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    expires_within: 30
+
+- name: Get the expiry dates of all peer and ordering service node certificates
+  hyperledger.fabric_ansible_collection.certificate_expiry_info:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    types:
+      - fabric-peer
+      - fabric-orderer
+'''
+
+RETURN = '''
+---
+certificates:
+    description:
+        - The certificates, sorted by expiry date, soonest first.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description:
+                - The name of the component that uses the certificate.
+            type: str
+            sample: Org1 Peer
+        type:
+            description:
+                - The type of the component that uses the certificate.
+            type: str
+            sample: fabric-peer
+        msp_id:
+            description:
+                - The MSP ID of the component that uses the certificate.
+            type: str
+            sample: Org1MSP
+        usage:
+            description:
+                - How the certificate is used by the component.
+            type: str
+            sample: tls_cert
+        subject:
+            description:
+                - The subject of the certificate.
+            type: str
+            sample: CN=org1peer
+        issuer:
+            description:
+                - The issuer of the certificate.
+            type: str
+            sample: CN=tlsca
+        serial_number:
+            description:
+                - The serial number of the certificate, in hexadecimal.
+            type: str
+            sample: 2ed7eef35513b7621c76258aec661053bec786c7
+        not_before:
+            description:
+                - The date and time from which the certificate is valid, in ISO 8601 format.
+            type: str
+            sample: 2020-03-06T08:55:00+00:00
+        not_after:
+            description:
+                - The date and time at which the certificate expires, in ISO 8601 format.
+            type: str
+            sample: 2021-03-06T08:55:00+00:00
+        days_remaining:
+            description:
+                - The number of whole days until the certificate expires.
+                - This will be negative if the certificate has already expired.
+            type: int
+            sample: 30
+        expired:
+            description:
+                - True if the certificate has already expired, false otherwise.
+            type: bool
+            sample: false
+        fingerprint:
+            description:
+                - The SHA-256 fingerprint of the certificate.
+            type: str
+            sample: 6f1c6a...
+        ski:
+            description:
+                - The subject key identifier of the certificate, in hexadecimal.
+            type: str
+            sample: e800b9d93f51e58dcae1718d3ea8776c1251ec32
+        aki:
+            description:
+                - The authority key identifier of the certificate, in hexadecimal.
+            type: str
+            sample: e800b9d93f51e58dcae1718d3ea8776c1251ec32
+        issuer_fingerprints:
+            description:
+                - The SHA-256 fingerprints of the certificates in this report whose subject key
+                  identifier matches the authority key identifier of this certificate.
+            type: list
+            elements: str
+            sample: [6f1c6a...]
+'''
+
+# The locations of the certificates in each type of component, and how they are used.
+COMPONENT_CERTS = {
+    'fabric-ca': [
+        (('msp', 'component', 'tls_cert'), 'tls_cert'),
+        (('msp', 'ca', 'root_certs'), 'ca_root_cert'),
+        (('msp', 'tlsca', 'root_certs'), 'tlsca_root_cert')
+    ],
+    'fabric-peer': [
+        (('msp', 'component', 'ecert'), 'ecert'),
+        (('msp', 'component', 'tls_cert'), 'tls_cert'),
+        (('msp', 'component', 'admin_certs'), 'admin_cert'),
+        (('admin_certs',), 'admin_cert'),
+        (('msp', 'ca', 'root_certs'), 'ca_root_cert'),
+        (('msp', 'tlsca', 'root_certs'), 'tlsca_root_cert')
+    ],
+    'fabric-orderer': [
+        (('msp', 'component', 'ecert'), 'ecert'),
+        (('msp', 'component', 'tls_cert'), 'tls_cert'),
+        (('msp', 'component', 'admin_certs'), 'admin_cert'),
+        (('admin_certs',), 'admin_cert'),
+        (('msp', 'ca', 'root_certs'), 'ca_root_cert'),
+        (('msp', 'tlsca', 'root_certs'), 'tlsca_root_cert')
+    ],
+    'msp': [
+        (('root_certs',), 'root_cert'),
+        (('intermediate_certs',), 'intermediate_cert'),
+        (('admins',), 'admin_cert'),
+        (('tls_root_certs',), 'tls_root_cert'),
+        (('tls_intermediate_certs',), 'tls_intermediate_cert')
+    ]
+}
+
+
+def get_component_certs(component):
+
+    # Find all of the certificates in the component; each of these may
+    # be a single certificate, or a list of certificates.
+    result = list()
+    for (path, usage) in COMPONENT_CERTS.get(component.get('type', None), list()):
+        value = component
+        for key in path:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key, None)
+        if not value:
+            continue
+        elif isinstance(value, list):
+            result.extend([(usage, cert) for cert in value if cert])
+        else:
+            result.append((usage, value))
+    return result
+
+
+def parse_certs(module, certs, concurrency):
+
+    # Parse each distinct certificate (or certificate chain) once.
+    def parse(cert):
+        try:
+            return get_parsed_certs(cert)
+        except Exception as e:
+            module.json_log({'msg': 'failed to parse certificate', 'cert': cert, 'error': str(e)})
+            return list()
+    unique_certs = list(set(certs))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        parsed_certs = executor.map(parse, unique_certs)
+    return dict(zip(unique_certs, parsed_certs))
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        types=dict(type='list', elements='str', default=['fabric-ca', 'fabric-peer', 'fabric-orderer', 'msp'], choices=['fabric-ca', 'fabric-peer', 'fabric-orderer', 'msp']),
+        expires_within=dict(type='int'),
+        concurrency=dict(type='int', default=8)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Log in to the console.
+        console = get_console(module)
+
+        # Get all of the components in a single request; we do not need the
+        # deployment attributes, as all of the certificates are in the MSP.
+        types = module.params['types']
+        components = [component for component in console.get_all_components('omitted') if component.get('type', None) in types]
+
+        # Find all of the certificates, and parse them.
+        component_certs = list()
+        for component in components:
+            component_certs.append((component, get_component_certs(component)))
+        all_certs = [cert for (_, certs) in component_certs for (_, cert) in certs]
+        parsed_certs = parse_certs(module, all_certs, module.params['concurrency'])
+
+        # Index the certificates by subject key identifier, so we can link each
+        # certificate to the certificates that issued it.
+        certs_by_ski = dict()
+        for certs in parsed_certs.values():
+            for parsed_cert in certs:
+                if parsed_cert.ski is not None:
+                    certs_by_ski.setdefault(parsed_cert.ski, set()).add(parsed_cert.fingerprint)
+
+        # Build the report.
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_within = module.params['expires_within']
+        result = list()
+        for (component, certs) in component_certs:
+            seen = set()
+            for (usage, cert) in certs:
+                for parsed_cert in parsed_certs[cert]:
+                    if (usage, parsed_cert.fingerprint) in seen:
+                        continue
+                    seen.add((usage, parsed_cert.fingerprint))
+                    (not_before, not_after) = parsed_cert.get_validity()
+                    days_remaining = (not_after - now).days
+                    if expires_within is not None and days_remaining > expires_within:
+                        continue
+                    issuer_fingerprints = set()
+                    if parsed_cert.aki is not None:
+                        issuer_fingerprints = certs_by_ski.get(parsed_cert.aki, set())
+                    result.append(dict(
+                        name=component.get('display_name', None),
+                        type=component.get('type', None),
+                        msp_id=component.get('msp_id', None),
+                        usage=usage,
+                        subject=parsed_cert.cert.subject.rfc4514_string(),
+                        issuer=parsed_cert.cert.issuer.rfc4514_string(),
+                        serial_number=format(parsed_cert.cert.serial_number, 'x'),
+                        not_before=not_before.isoformat(),
+                        not_after=not_after.isoformat(),
+                        days_remaining=days_remaining,
+                        expired=not_after <= now,
+                        fingerprint=parsed_cert.fingerprint,
+                        ski=parsed_cert.ski.hex() if parsed_cert.ski is not None else None,
+                        aki=parsed_cert.aki.hex() if parsed_cert.aki is not None else None,
+                        issuer_fingerprints=sorted(issuer_fingerprints - set([parsed_cert.fingerprint]))
+                    ))
+        result.sort(key=lambda entry: (entry['not_after'], entry['name'] or '', entry['usage']))
+
+        # Return the certificates.
+        module.exit_json(changed=False, certificates=result)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,8 @@ __metaclass__ = type
 
 from ansible.module_utils._text import to_native
 
+from ..module_utils.channel_utils import read_config, write_config
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import json_to_proto, proto_to_json
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -46,6 +46,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     name:
         description:
             - The name of the ACL to add, update, or remove from the channel.
@@ -87,6 +96,7 @@ def main():
     argument_spec = dict(
         state=dict(type='str', default='present', choices=['present', 'absent']),
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         name=dict(type='str', required=True),
         policy=dict(type='raw', required=True)
     )
@@ -103,8 +113,7 @@ def main():
         policy = module.params['policy']
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
 
         # Check to see if the channel ACL exists.
         application_values = config_json['channel_group']['groups']['Application']['values']
@@ -150,9 +159,7 @@ def main():
             del acls[name]
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True)
 
     # Notify Ansible of the exception.
@@ -8,12 +8,11 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import os
-import shutil
 
 from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params, env_fallback
 
-from ..module_utils.file_utils import equal_files, get_temp_file
+from ..module_utils.file_utils import get_temp_file, replace_file
 from ..module_utils.module import BlockchainModule
 from ..module_utils.ordering_services import OrderingService
 from ..module_utils.utils import (get_console, get_identity_by_module,
@@ -258,27 +257,24 @@ def main():
         name = module.params['name']
         target = module.params['target']
 
-        # Create a temporary file to hold the block.
-        block_proto_path = get_temp_file()
+        # Create a temporary file to hold the block, next to the file at the target path
+        # (following any symbolic link) so that it can be replaced atomically without
+        # copying the block, and with the same mode as any other new file.
+        block_proto_path = get_temp_file(os.path.dirname(os.path.realpath(path)), 0o666)
         try:
 
             # Fetch the block.
             with ordering_service.connect(module, identity, msp_id, hsm, tls_handshake_time_shift) as connection:
                 connection.fetch(name, target, block_proto_path)
 
-            # Compare and copy if needed.
-            if os.path.exists(path):
-                changed = not equal_files(path, block_proto_path)
-                if changed:
-                    shutil.copyfile(block_proto_path, path)
-                module.exit_json(changed=changed, path=path)
-            else:
-                shutil.copyfile(block_proto_path, path)
-                module.exit_json(changed=True, path=path)
+            # Compare and replace if needed.
+            changed = replace_file(block_proto_path, path)
+            module.exit_json(changed=changed, path=path)
 
         # Ensure the temporary file is cleaned up.
         finally:
-            os.remove(block_proto_path)
+            if os.path.exists(block_proto_path):
+                os.remove(block_proto_path)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -6,9 +6,9 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_utils import read_config, write_config
 from ..module_utils.dict_utils import equal_dicts, copy_dict
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 
 from ansible.module_utils._text import to_native
 
@@ -34,6 +34,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     application:
         description:
             - The application capability level for the channel.
@@ -96,6 +105,7 @@ def main():
     # Create the module.
     argument_spec = dict(
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         application=dict(type='str'),
         channel=dict(type='str'),
         orderer=dict(type='str')
@@ -112,8 +122,7 @@ def main():
         orderer = module.params['orderer']
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
         original_config_json = copy_dict(config_json)
 
         # Handle the application capability level.
@@ -148,9 +157,7 @@ def main():
             return module.exit_json(changed=False)
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True)
 
     # Notify Ansible of the exception.
@@ -7,30 +7,35 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import json
 import os
-import shutil
-import subprocess
+import time
 import urllib.parse
-from subprocess import CalledProcessError
 
 from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params, env_fallback
 
 from pathlib import Path
 
+from ..module_utils.channel_utils import (compute_config_update,
+                                          config_block_cache,
+                                          discard_config_session,
+                                          encode_config, flush_config_session,
+                                          get_config_update_signers,
+                                          read_config_update,
+                                          save_config_update,
+                                          sign_config_update)
 from ..module_utils.dict_utils import diff_dicts
-from ..module_utils.fabric_utils import get_fabric_cfg_path
 from ..module_utils.file_utils import get_temp_file
 from ..module_utils.module import BlockchainModule
-from ..module_utils.msp_utils import convert_identity_to_msp_path
+from ..module_utils.msp_utils import acquire_msp_path, release_msp_path
 from ..module_utils.ordering_services import OrderingService
 from ..module_utils.proto_utils import json_to_proto, proto_to_json
 from ..module_utils.utils import (get_console, get_identity_by_module,
+                                  get_identity_by_value,
                                   get_ordering_service_by_module,
                                   get_ordering_service_nodes_by_module,
                                   get_organizations_by_module,
-                                  resolve_identity)
+                                  load_policy, resolve_identity)
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -80,7 +85,17 @@ options:
               the original configuration at I(origin) and the updated configuration at
               I(updated).
             - C(sign_update) - Sign a channel configuration update transaction.
+            - C(sign_update_organizations) - Sign a channel configuration update transaction using the
+              local MSP directories for the organizations in I(organizations), which are found in I(organizations_dir).
             - C(apply_update) - Apply a channel configuration update transaction.
+            - C(pipeline) - Compute a channel configuration update transaction using the original configuration
+              at I(original) and the updated configuration at I(updated), or use the existing channel configuration
+              update transaction at I(path) if they are not specified; then sign it using the local MSP directories
+              for the organizations in I(organizations) and the identities in I(signers), and apply it, all in a
+              single task. Organizations that have already signed the channel configuration update transaction
+              are skipped. In check mode, no files are changed, nothing is signed or applied, and the organizations
+              that would sign the channel configuration update transaction are returned in I(signed); the task
+              reports a change if there is a channel configuration update transaction to sign and apply.
         type: str
         required: true
     ordering_service:
@@ -115,7 +130,7 @@ options:
               identity is stored.
             - You can also pass a dict, which must match the result format of one of the
               M(enrolled_identity_info) or M(enrolled_identity) modules.
-            - Only required when I(operation) is C(fetch), C(sign_update), or C(apply_update).
+            - Only required when I(operation) is C(fetch), C(sign_update), C(apply_update), or C(pipeline).
         type: raw
     msp_id:
         description:
@@ -151,16 +166,20 @@ options:
         description:
             - The path to the file where the channel configuration or the channel configuration
               update transaction will be stored.
+            - When I(operation) is C(fetch), any config editing session for this file is discarded,
+              even if the fetched channel configuration has not changed.
         type: str
         required: true
     original:
         description:
             - The path to the file where the original channel configuration is stored.
             - Only required when I(operation) is C(compute_update).
+            - Can also be specified, together with I(updated), when I(operation) is C(pipeline).
         type: str
     updated:
         description:
             - The path to the file where the updated channel configuration is stored.
+            - If there is a config editing session for this file, then it is encoded into the file first.
             - Only required when I(operation) is C(compute_update).
         type: str
     organizations:
@@ -172,8 +191,59 @@ options:
             - You can also pass a dict, which must match the result format of one
               of the M(organization_info) or M(organization) modules.
             - Only required when I(operation) is C(create).
+            - When I(operation) is C(sign_update_organizations) or C(pipeline), these are the MSP IDs of the
+              organizations that should sign the channel configuration update transaction.
+            - The local MSP directories for these organizations are used with the HSM configuration in I(hsm), if
+              specified. When I(operation) is C(pipeline), use I(signers) instead for organizations that do not use
+              the same HSM configuration.
         type: list
         elements: raw
+    organizations_dir:
+        description:
+            - The directory containing the local MSP directories for the organizations in I(organizations);
+              the local MSP directory for each organization must be at C(<organizations_dir>/<msp_id>/msp).
+            - Only used when I(operation) is C(sign_update_organizations) or C(pipeline).
+        type: str
+        default: organizations
+    signers:
+        description:
+            - The identities that should sign the channel configuration update transaction.
+            - Only used when I(operation) is C(pipeline).
+        type: list
+        elements: dict
+        suboptions:
+            identity:
+                description:
+                    - The identity to use for signing the channel configuration update transaction.
+                    - You can pass a string, which is the path to the JSON file where the enrolled
+                      identity is stored.
+                    - You can also pass a dict, which must match the result format of one of the
+                      M(enrolled_identity_info) or M(enrolled_identity) modules.
+                type: raw
+                required: true
+            msp_id:
+                description:
+                    - The MSP ID to use for signing the channel configuration update transaction.
+                type: str
+                required: true
+            hsm:
+                description:
+                    - "The PKCS #11 compliant HSM configuration to use for digital signatures."
+                    - Only required if the identity specified in I(identity) was enrolled using an HSM.
+                type: dict
+                suboptions:
+                    pkcs11library:
+                        description:
+                            - "The PKCS #11 library that should be used for digital signatures."
+                        type: str
+                    label:
+                        description:
+                            - The HSM label that should be used for digital signatures.
+                        type: str
+                    pin:
+                        description:
+                            - The HSM pin that should be used for digital signatures.
+                        type: str
     policies:
         description:
             - The set of policies to add to the new channel. The keys are the policy
@@ -314,6 +384,30 @@ EXAMPLES = '''
     operation: apply_update
     name: mychannel
     path: channel_config_update.bin
+
+- name: Compute, sign, and apply the configuration update for the channel
+  hyperledger.fabric_ansible_collection.channel_config:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    ordering_service: Ordering Service
+    identity: Org1 Admin.json
+    msp_id: Org1MSP
+    operation: pipeline
+    name: mychannel
+    original: original_channel_config.bin
+    updated: updated_channel_config.bin
+    path: channel_config_update.bin
+    organizations:
+      - Org2MSP
+    signers:
+      - identity: Org3 Admin.json
+        msp_id: Org3MSP
+        hsm:
+          pkcs11library: /usr/local/lib/libpkcs11-proxy.so
+          label: Org3 HSM
+          pin: 1234
 '''
 
 RETURN = '''
@@ -324,6 +418,33 @@ path:
           update transaction is stored.
     type: str
     returned: always
+signed:
+    description:
+        - The MSP IDs of the organizations that signed the channel configuration update transaction.
+        - In check mode, the MSP IDs of the organizations that would have signed it.
+    type: list
+    elements: str
+    returned: when I(operation) is C(pipeline)
+    sample:
+        - Org2MSP
+        - Org3MSP
+applied:
+    description:
+        - True if the channel configuration update transaction was applied.
+        - Always false in check mode, or if there are no changes to apply.
+    type: bool
+    returned: when I(operation) is C(pipeline)
+    sample: true
+timings:
+    description:
+        - The time, in seconds, spent in each stage of the pipeline.
+    type: dict
+    returned: when I(operation) is C(pipeline)
+    sample:
+        compute: 0.41
+        resolve: 1.27
+        sign: 0.93
+        apply: 2.18
 '''
 
 
@@ -339,13 +460,7 @@ def create(module):
     policies = module.params['policies']
     actual_policies = dict()
     for policyName, policy in policies.items():
-        if isinstance(policy, str):
-            with open(policy, 'r') as file:
-                actual_policies[policyName] = json.load(file)
-        elif isinstance(policy, dict):
-            actual_policies[policyName] = policy
-        else:
-            raise Exception(f'The policy {policyName} is invalid')
+        actual_policies[policyName] = load_policy(policyName, policy)
 
     # Build the config update for a new channel.
     name = module.params['name']
@@ -608,43 +723,37 @@ def fetch(module):
     name = module.params['name']
     path = module.params['path']
 
-    # Create a temporary file to hold the block.
-    block_proto_path = get_temp_file()
-    try:
-
-        # Fetch the block.
-        with ordering_service.connect(module, identity, msp_id, hsm, tls_handshake_time_shift) as connection:
-            connection.fetch(name, 'config', block_proto_path)
-
-        # Convert it into JSON.
-        with open(block_proto_path, 'rb') as file:
-            block_json = proto_to_json('common.Block', file.read())
-
-        # Extract the config.
-        config_json = block_json['data']['data'][0]['payload']['data']['config']
-        config_proto = json_to_proto('common.Config', config_json)
+    # Get the config block, using the cached config block if it is still the latest.
+    source = sorted(node.api_url for node in ordering_service.nodes)
+    with ordering_service.connect(module, identity, msp_id, hsm, tls_handshake_time_shift) as connection:
+        result = config_block_cache.get(name, source, lambda target, block_path: connection.fetch(name, target, block_path))
+    module.json_log({'msg': 'got config block', 'number': result['number'], 'cached': result['cached']})
+    config_proto = result['config']
 
-        # Compare and copy if needed.
-        if os.path.exists(path):
-            changed = False
+    # Compare and copy if needed. If the encoded config is the same, then there is no need to
+    # decode it; otherwise, compare the decoded configs, as the encoding may differ. Any config
+    # editing session is always discarded, as it was based on the config that was fetched before.
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            original_config_proto = file.read()
+        changed = original_config_proto != config_proto
+        if changed:
             try:
-                with open(path, 'rb') as file:
-                    original_config_json = proto_to_json('common.Config', file.read())
-                changed = diff_dicts(original_config_json, config_json)
+                original_config_json = proto_to_json('common.Config', original_config_proto)
+                changed = bool(diff_dicts(original_config_json, proto_to_json('common.Config', config_proto)))
             except Exception:
                 changed = True
-            if changed:
-                with open(path, 'wb') as file:
-                    file.write(config_proto)
-            module.exit_json(changed=changed, path=path)
-        else:
+        if changed:
             with open(path, 'wb') as file:
                 file.write(config_proto)
-            module.exit_json(changed=True, path=path)
-
-    # Ensure the temporary file is cleaned up.
-    finally:
-        os.remove(block_proto_path)
+        if discard_config_session(path):
+            changed = True
+        module.exit_json(changed=changed, path=path)
+    else:
+        with open(path, 'wb') as file:
+            file.write(config_proto)
+        discard_config_session(path)
+        module.exit_json(changed=True, path=path)
 
 
 def compute_update(module):
@@ -655,65 +764,23 @@ def compute_update(module):
     original = module.params['original']
     updated = module.params['updated']
 
-    # Create a temporary file to hold the block.
-    config_update_proto_path = get_temp_file()
-    try:
-
-        # Run the command to compute the update
-        try:
-            subprocess.run([
-                'configtxlator', 'compute_update', f'--channel_id={name}', f'--original={original}', f'--updated={updated}', f'--output={config_update_proto_path}'
-            ], text=True, close_fds=True, check=True, capture_output=True)
-        except CalledProcessError as e:
-            if e.stderr.find('no differences detected') != -1:
-                if os.path.exists(path):
-                    os.remove(path)
-                    return module.exit_json(changed=True, path=None)
-                else:
-                    return module.exit_json(changed=False, path=None)
-            raise
-
-        # Convert it into JSON.
-        with open(config_update_proto_path, 'rb') as file:
-            config_update_json = proto_to_json('common.ConfigUpdate', file.read())
-
-        # Build the config envelope.
-        config_update_envelope_json = dict(
-            payload=dict(
-                header=dict(
-                    channel_header=dict(
-                        channel_id=name,
-                        type=2
-                    )
-                ),
-                data=dict(
-                    config_update=config_update_json
-                )
-            )
-        )
-        config_update_envelope_proto = json_to_proto('common.Envelope', config_update_envelope_json)
+    # Encode any config editing sessions into the configuration files, as this
+    # is the only point at which the encoded configuration is needed.
+    flush_config_session(original)
+    flush_config_session(updated)
 
-        # Compare and copy if needed.
+    # Compute the config update.
+    config_update_envelope_json = compute_config_update(name, original, updated)
+    if config_update_envelope_json is None:
         if os.path.exists(path):
-            changed = False
-            try:
-                with open(path, 'rb') as file:
-                    original_config_update_envelope_json = proto_to_json('common.Envelope', file.read())
-                changed = diff_dicts(original_config_update_envelope_json, config_update_envelope_json)
-            except Exception:
-                changed = True
-            if changed:
-                with open(path, 'wb') as file:
-                    file.write(config_update_envelope_proto)
-            module.exit_json(changed=changed, path=path)
+            os.remove(path)
+            return module.exit_json(changed=True, path=None)
         else:
-            with open(path, 'wb') as file:
-                file.write(config_update_envelope_proto)
-            module.exit_json(changed=True, path=path)
+            return module.exit_json(changed=False, path=None)
 
-    # Ensure the temporary file is cleaned up.
-    finally:
-        os.remove(config_update_proto_path)
+    # Compare and copy if needed.
+    changed = save_config_update(path, config_update_envelope_json)
+    module.exit_json(changed=changed, path=path)
 
 
 def sign_update(module):
@@ -733,34 +800,16 @@ def sign_update(module):
     # Load in the existing config update file and see if we've already signed it.
     with open(path, 'rb') as file:
         config_update_envelope_json = proto_to_json('common.Envelope', file.read())
-    signatures = config_update_envelope_json['payload']['data'].get('signatures', list())
-    for signature in signatures:
-        if msp_id == signature['signature_header']['creator']['mspid']:
-            return module.exit_json(changed=False, path=path)
+    if msp_id in get_config_update_signers(config_update_envelope_json):
+        return module.exit_json(changed=False, path=path)
 
     # Need to sign it.
-    msp_path = convert_identity_to_msp_path(identity)
-    fabric_cfg_path = get_fabric_cfg_path()
+    msp_path = acquire_msp_path(identity)
     try:
-        env = os.environ.copy()
-        env['CORE_PEER_MSPCONFIGPATH'] = msp_path
-        env['CORE_PEER_LOCALMSPID'] = msp_id
-        env['FABRIC_CFG_PATH'] = fabric_cfg_path
-        if hsm:
-            env['CORE_PEER_BCCSP_DEFAULT'] = 'PKCS11'
-            env['CORE_PEER_BCCSP_PKCS11_LIBRARY'] = hsm['pkcs11library']
-            env['CORE_PEER_BCCSP_PKCS11_LABEL'] = hsm['label']
-            env['CORE_PEER_BCCSP_PKCS11_PIN'] = hsm['pin']
-            env['CORE_PEER_BCCSP_PKCS11_HASH'] = 'SHA2'
-            env['CORE_PEER_BCCSP_PKCS11_SECURITY'] = '256'
-            env['CORE_PEER_BCCSP_PKCS11_FILEKEYSTORE_KEYSTORE'] = os.path.join(msp_path, 'keystore')
-        subprocess.run([
-            'peer', 'channel', 'signconfigtx', '-f', path
-        ], env=env, text=True, close_fds=True, check=True, capture_output=True)
+        sign_config_update(path, msp_id, msp_path, hsm)
         module.exit_json(changed=True, path=path)
     finally:
-        shutil.rmtree(msp_path)
-        shutil.rmtree(fabric_cfg_path)
+        release_msp_path(msp_path)
 
 
 def sign_update_organizations(module):
@@ -774,54 +823,37 @@ def sign_update_organizations(module):
 
     hsm = module.params['hsm']
 
-    # Load in the existing config update file and see if we've already signed it.
+    # Load in the existing config update file and see who has already signed it.
     with open(path, 'rb') as file:
         config_update_envelope_json = proto_to_json('common.Envelope', file.read())
-    signatures = config_update_envelope_json['payload']['data'].get('signatures', list())
+    signers = get_config_update_signers(config_update_envelope_json)
 
     module.json_log({
         'msg': 'Organizations for signing the update',
         'Organizations': module.params['organizations']
     })
 
+    changed = False
     for msp_id in module.params['organizations']:
 
-        for signature in signatures:
-            if msp_id == signature['signature_header']['creator']['mspid']:
-                continue
+        # Skip any organizations that have already signed it.
+        if msp_id in signers:
+            continue
 
         # Need to sign it.
         msp_path = os.path.join(organizations_dir, msp_id, "msp")
-        fabric_cfg_path = get_fabric_cfg_path()
 
         module.json_log({
             'msg': 'Adding signature to change',
             'CORE_PEER_MSPCONFIGPATH': msp_path,
-            'CORE_PEER_LOCALMSPID': msp_id,
-            'FABRIC_CFG_PATH': fabric_cfg_path
+            'CORE_PEER_LOCALMSPID': msp_id
         })
 
-        try:
-            env = os.environ.copy()
-            env['CORE_PEER_MSPCONFIGPATH'] = msp_path
-            env['CORE_PEER_LOCALMSPID'] = msp_id
-            env['FABRIC_CFG_PATH'] = fabric_cfg_path
-            if hsm:
-                env['CORE_PEER_BCCSP_DEFAULT'] = 'PKCS11'
-                env['CORE_PEER_BCCSP_PKCS11_LIBRARY'] = hsm['pkcs11library']
-                env['CORE_PEER_BCCSP_PKCS11_LABEL'] = hsm['label']
-                env['CORE_PEER_BCCSP_PKCS11_PIN'] = hsm['pin']
-                env['CORE_PEER_BCCSP_PKCS11_HASH'] = 'SHA2'
-                env['CORE_PEER_BCCSP_PKCS11_SECURITY'] = '256'
-                env['CORE_PEER_BCCSP_PKCS11_FILEKEYSTORE_KEYSTORE'] = os.path.join(msp_path, 'keystore')
-            subprocess.run([
-                'peer', 'channel', 'signconfigtx', '-f', path
-            ], env=env, text=True, close_fds=True, check=True, capture_output=True)
+        sign_config_update(path, msp_id, msp_path, hsm)
+        signers.add(msp_id)
+        changed = True
 
-        finally:
-            shutil.rmtree(fabric_cfg_path)
-
-    module.exit_json(changed=True, path=path)
+    module.exit_json(changed=changed, path=path)
 
 
 def apply_update(module):
@@ -848,12 +880,136 @@ def apply_update(module):
     name = module.params['name']
     path = module.params['path']
 
-    # Update the channel.
+    # Update the channel, and forget the cached config block for it.
     with ordering_service.connect(module, identity, msp_id, hsm, tls_handshake_time_shift) as connection:
         connection.update(name, path)
+    config_block_cache.invalidate(name)
     module.exit_json(changed=True)
 
 
+def compute_pipeline_update(module):
+
+    # Compute the config update from the original and updated configurations, returning the
+    # envelope, or None if there are no changes, and whether an existing config update was
+    # removed because there are no changes. In check mode, the config editing sessions are
+    # encoded into temporary files, and the config update is neither saved nor removed.
+    name = module.params['name']
+    path = module.params['path']
+    original = module.params['original']
+    updated = module.params['updated']
+    if not module.check_mode:
+        flush_config_session(original)
+        flush_config_session(updated)
+        config_update_envelope_json = compute_config_update(name, original, updated)
+        if config_update_envelope_json is None:
+            if os.path.exists(path):
+                os.remove(path)
+                return (None, True)
+            return (None, False)
+        if save_config_update(path, config_update_envelope_json):
+            return (config_update_envelope_json, False)
+    else:
+        temp_paths = list()
+        try:
+            for config_path in [original, updated]:
+                temp_path = get_temp_file()
+                temp_paths.append(temp_path)
+                with open(temp_path, 'wb') as file:
+                    file.write(encode_config(config_path))
+            config_update_envelope_json = compute_config_update(name, temp_paths[0], temp_paths[1])
+        finally:
+            for temp_path in temp_paths:
+                os.remove(temp_path)
+        if config_update_envelope_json is None:
+            return (None, os.path.exists(path))
+
+    # The existing config update is unchanged, so keep any signatures that it already has.
+    return (read_config_update(path, config_update_envelope_json) or config_update_envelope_json, False)
+
+
+def pipeline(module):
+
+    # Get the channel and target path.
+    name = module.params['name']
+    path = module.params['path']
+    original = module.params['original']
+    timings = dict()
+
+    # Compute the config update if the original and updated configurations were specified, otherwise
+    # use the existing config update. Either way, keep the envelope so it does not have to be decoded again.
+    started = time.monotonic()
+    if original is not None:
+        (config_update_envelope_json, removed) = compute_pipeline_update(module)
+        if config_update_envelope_json is None:
+            timings['compute'] = time.monotonic() - started
+            module.json_log({'msg': 'no configuration update required', 'removed': removed, 'timings': timings})
+            return module.exit_json(changed=removed, path=None, signed=list(), applied=False, timings=timings)
+    else:
+        with open(path, 'rb') as file:
+            config_update_envelope_json = proto_to_json('common.Envelope', file.read())
+    signers = get_config_update_signers(config_update_envelope_json)
+    timings['compute'] = time.monotonic() - started
+
+    # Log in to the console once, and resolve everything that needs it.
+    started = time.monotonic()
+    console = get_console(module)
+    ordering_service_specified = module.params['ordering_service'] is not None
+    if ordering_service_specified:
+        ordering_service = get_ordering_service_by_module(console, module)
+    else:
+        ordering_service_nodes = get_ordering_service_nodes_by_module(console, module)
+        ordering_service = OrderingService(ordering_service_nodes)
+    tls_handshake_time_shift = module.params['tls_handshake_time_shift']
+    identity = get_identity_by_module(module)
+    msp_id = module.params['msp_id']
+    hsm = module.params['hsm']
+    identity = resolve_identity(console, module, identity, msp_id)
+    timings['resolve'] = time.monotonic() - started
+
+    # Sign the config update with the local MSP directories (using the same HSM configuration as the
+    # identity that applies the update), and then with the signers (which may use their own HSM). The
+    # identity used to apply the update also signs it, so it does not need to sign it here. In check
+    # mode, nothing is signed, but the organizations that would sign it are reported.
+    started = time.monotonic()
+    signed = list()
+    organizations_dir = Path(module.params['organizations_dir']).resolve()
+    for organization_msp_id in module.params['organizations'] or list():
+        if organization_msp_id in signers or organization_msp_id == msp_id:
+            continue
+        if not module.check_mode:
+            msp_path = os.path.join(organizations_dir, organization_msp_id, 'msp')
+            sign_config_update(path, organization_msp_id, msp_path, hsm)
+        signers.add(organization_msp_id)
+        signed.append(organization_msp_id)
+    for signer in module.params['signers'] or list():
+        signer_msp_id = signer['msp_id']
+        if signer_msp_id in signers or signer_msp_id == msp_id:
+            continue
+        if not module.check_mode:
+            signer_identity = resolve_identity(console, module, get_identity_by_value(signer['identity']), signer_msp_id)
+            msp_path = acquire_msp_path(signer_identity)
+            try:
+                sign_config_update(path, signer_msp_id, msp_path, signer['hsm'])
+            finally:
+                release_msp_path(msp_path)
+        signers.add(signer_msp_id)
+        signed.append(signer_msp_id)
+    timings['sign'] = time.monotonic() - started
+    module.json_log({'msg': 'signed configuration update', 'signed': signed, 'signers': sorted(signers), 'check_mode': module.check_mode})
+
+    # Apply the update using the healthiest ordering service node. In check mode, nothing is
+    # applied, but the update would be, so report the change.
+    if module.check_mode:
+        return module.exit_json(changed=True, path=path, signed=signed, applied=False, timings=timings)
+    started = time.monotonic()
+    with ordering_service.connect(module, identity, msp_id, hsm, tls_handshake_time_shift) as connection:
+        connection.update(name, path)
+    config_block_cache.invalidate(name)
+    timings['apply'] = time.monotonic() - started
+    module.json_log({'msg': 'applied configuration update', 'timings': timings})
+    module.exit_json(changed=True, path=path, signed=signed, applied=True, timings=timings)
+
+
 def main():
 
     # Create the module.
@@ -864,7 +1020,7 @@ def main():
         api_secret=dict(type='str', no_log=True),
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
-        operation=dict(type='str', required=True, choices=['create', 'fetch', 'compute_update', 'sign_update', 'sign_update_organizations', 'apply_update']),
+        operation=dict(type='str', required=True, choices=['create', 'fetch', 'compute_update', 'sign_update', 'sign_update_organizations', 'apply_update', 'pipeline']),
         ordering_service=dict(type='raw'),
         ordering_service_nodes=dict(type='list', elements='raw'),
         tls_handshake_time_shift=dict(type='str', fallback=(env_fallback, ['IBP_TLS_HANDSHAKE_TIME_SHIFT'])),   # TODO: Look into renaming this env variable
@@ -881,6 +1037,15 @@ def main():
         updated=dict(type='str'),
         organizations=dict(type='list', elements='raw'),
         organizations_dir=dict(type='str', default='organizations'),
+        signers=dict(type='list', elements='dict', options=dict(
+            identity=dict(type='raw', required=True),
+            msp_id=dict(type='str', required=True),
+            hsm=dict(type='dict', options=dict(
+                pkcs11library=dict(type='str', required=True),
+                label=dict(type='str', required=True, no_log=True),
+                pin=dict(type='str', required=True, no_log=True)
+            ))
+        )),
         policies=dict(type='dict'),
         acls=dict(type='dict'),
         capabilities=dict(type='dict', default=dict(), options=dict(
@@ -904,18 +1069,22 @@ def main():
         ('operation', 'compute_update', ['name', 'path', 'original', 'updated']),
         ('operation', 'sign_update', ['identity', 'msp_id', 'name', 'path']),
         ('operation', 'sign_update_organizations', ['organizations', 'organizations_dir', 'name', 'path']),
-        ('operation', 'apply_update', ['api_endpoint', 'api_authtype', 'api_key', 'identity', 'msp_id', 'name', 'path'])
+        ('operation', 'apply_update', ['api_endpoint', 'api_authtype', 'api_key', 'identity', 'msp_id', 'name', 'path']),
+        ('operation', 'pipeline', ['api_endpoint', 'api_authtype', 'api_key', 'identity', 'msp_id', 'name', 'path'])
+    ]
+    required_together = [
+        ['original', 'updated']
     ]
     # Ansible doesn't allow us to say "require one of X and Y only if condition A is true",
     # so we need to handle this ourselves by seeing what was passed in.
     actual_params = _load_params()
-    if actual_params.get('operation', None) in ['fetch', 'apply_update']:
+    if actual_params.get('operation', None) in ['fetch', 'apply_update', 'pipeline']:
         required_one_of = [
             ['ordering_service', 'ordering_service_nodes']
         ]
     else:
         required_one_of = []
-    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if, required_one_of=required_one_of)
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if, required_one_of=required_one_of, required_together=required_together)
 
     # Validate HSM requirements if HSM is specified.
     if module.params['hsm']:
@@ -936,6 +1105,8 @@ def main():
             sign_update_organizations(module)
         elif operation == 'apply_update':
             apply_update(module)
+        elif operation == 'pipeline':
+            pipeline(module)
         else:
             raise Exception(f'Invalid operation {operation}')
 
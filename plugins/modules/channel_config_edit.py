@@ -0,0 +1,597 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.channel_utils import (get_highest_capability, read_config,
+                                          update_config, update_consenters)
+from ..module_utils.dict_utils import copy_dict, equal_dicts, merge_dicts
+from ..module_utils.module import BlockchainModule
+from ..module_utils.msp_utils import organization_to_msp
+from ..module_utils.utils import ComponentListing, load_policy
+
+from ansible.module_utils._text import to_native
+
+import urllib.parse
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: channel_config_edit
+short_description: Compute a configuration update for many changes to a Hyperledger Fabric channel
+description:
+    - Apply many changes to the configuration of a Hyperledger Fabric channel in a single pass, and compute
+      the configuration update envelope that is ready for signing by using the M(channel_config) module.
+    - The changes can include the members of the channel and their anchor peers, the policies, the ACLs, the
+      capability levels, the batch parameters, and the consenters for the channel.
+    - The configuration is read once, all of the changes are made to it, and the updated configuration is
+      encoded once. The changes are made in the same way as the M(channel_capabilities), M(channel_member),
+      M(channel_policy), M(channel_acl), M(channel_parameters), and M(channel_consenters) modules, in that order.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+            - Only required when organizations, peers, ordering services, or ordering service nodes
+              are specified by name.
+        type: str
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+            - Only required when organizations, peers, ordering services, or ordering service nodes
+              are specified by name.
+        type: str
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+            - Only required when organizations, peers, ordering services, or ordering service nodes
+              are specified by name.
+        type: str
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    name:
+        description:
+            - The name of the channel.
+        type: str
+        required: true
+    original:
+        description:
+            - The path to the file where the original channel configuration is stored.
+            - This file can be fetched by using the M(channel_config) module.
+            - This file is not modified.
+        type: str
+        required: true
+    path:
+        description:
+            - The path to the file where the configuration update envelope will be stored.
+            - If there are no changes to the channel configuration, then this file will be removed.
+        type: str
+        required: true
+    members:
+        description:
+            - The members to add, update, or remove from the channel.
+        type: list
+        elements: dict
+        default: []
+        suboptions:
+            state:
+                description:
+                    - C(absent) - The organization will be removed from the channel.
+                    - C(present) - The organization will be added to the channel, or updated if it is already
+                      a member of the channel.
+                type: str
+                default: present
+                choices:
+                    - absent
+                    - present
+            organization:
+                description:
+                    - The organization to add, update, or remove from the channel.
+                    - You can pass a string, which is the display name of an organization registered
+                      with the Fabric operations console.
+                    - You can also pass a dictionary, which must match the result format of one of the
+                      M(organization_info) or M(organization) modules.
+                type: raw
+                required: true
+            anchor_peers:
+                description:
+                    - The anchor peers for this organization in this channel.
+                    - You can pass strings, which are the names of peers that are
+                      registered with the Fabric operations console.
+                    - You can also pass a dict, which must match the result format of one
+                      of the M(peer_info) or M(peer) modules.
+                type: list
+                elements: raw
+            policies:
+                description:
+                    - The set of policies for the channel member. The keys are the policy
+                      names, and the values are the policies.
+                    - You can pass strings, which are paths to JSON files containing policies
+                      in the Hyperledger Fabric format (common.Policy).
+                    - You can also pass a dict, which must correspond to a parsed policy in the
+                      Hyperledger Fabric format (common.Policy).
+                type: dict
+    policies:
+        description:
+            - The policies to add, update, or remove from the channel.
+        type: list
+        elements: dict
+        default: []
+        suboptions:
+            state:
+                description:
+                    - C(absent) - The policy will be removed from the channel.
+                    - C(present) - The policy will be added to the channel, or updated if it already exists.
+                type: str
+                default: present
+                choices:
+                    - absent
+                    - present
+            name:
+                description:
+                    - The name of the policy.
+                type: str
+                required: true
+            policy:
+                description:
+                    - The policy.
+                    - You can pass a string, which is a path to a JSON file containing a policy
+                      in the Hyperledger Fabric format (common.Policy).
+                    - You can also pass a dict, which must correspond to a parsed policy in the
+                      Hyperledger Fabric format (common.Policy).
+                    - Only required when I(state) is C(present).
+                type: raw
+    acls:
+        description:
+            - The ACLs to add, update, or remove from the channel.
+        type: list
+        elements: dict
+        default: []
+        suboptions:
+            state:
+                description:
+                    - C(absent) - The ACL will be removed from the channel.
+                    - C(present) - The ACL will be added to the channel, or updated if it already exists.
+                type: str
+                default: present
+                choices:
+                    - absent
+                    - present
+            name:
+                description:
+                    - The name of the ACL.
+                type: str
+                required: true
+            policy:
+                description:
+                    - The name of the policy used by the ACL.
+                    - Only required when I(state) is C(present).
+                type: str
+    capabilities:
+        description:
+            - The capability levels for the channel.
+        type: dict
+        suboptions:
+            application:
+                description:
+                    - The application capability level for the channel.
+                type: str
+            channel:
+                description:
+                    - The channel capability level.
+                type: str
+            orderer:
+                description:
+                    - The orderer capability level for the channel.
+                type: str
+    batch_size:
+        description:
+            - The batch size parameters for the channel.
+        type: dict
+        suboptions:
+            max_message_count:
+                description:
+                    - The maximum number of messages that should be present in a block for the channel.
+                type: int
+            absolute_max_bytes:
+                description:
+                    - The total size of all the messages in a block for the channel must not exceed this value.
+                type: int
+            preferred_max_bytes:
+                description:
+                    - The total size of all the messages in a block for the channel should not exceed this value.
+                type: int
+    batch_timeout:
+        description:
+            - The maximum time to wait before cutting a new block for the channel.
+            - Example values include I(500ms), I(5m), or I(24h).
+        type: str
+    consenters:
+        description:
+            - The consenters for the channel.
+            - Only one consenter can be added, updated, or removed in a single configuration update.
+        type: dict
+        suboptions:
+            ordering_service:
+                description:
+                    - The ordering service to use as the consenters for this channel.
+                    - You can pass a string, which is the cluster name of a ordering service registered
+                      with the Fabric operations console.
+                    - You can also pass a list, which must match the result format of one of the
+                      M(ordering_service_info) or M(ordering_service) modules.
+                    - Cannot be specified with I(ordering_service_nodes).
+                type: raw
+            ordering_service_nodes:
+                description:
+                    - The ordering service nodes to use as the consenters for this channel.
+                    - You can pass strings, which are the names of ordering service nodes that are
+                      registered with the Fabric operations console.
+                    - You can also pass a dict, which must match the result format of one
+                      of the M(ordering_service_node_info) or M(ordering_service_node) modules.
+                    - Cannot be specified with I(ordering_service).
+                type: list
+                elements: raw
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Fetch the channel configuration
+  hyperledger.fabric_ansible_collection.channel_config:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    operation: fetch
+    ordering_service: Ordering Service
+    identity: Org1 Admin.json
+    msp_id: Org1MSP
+    name: mychannel
+    path: channel_config.bin
+
+- name: Compute the configuration update for all of the changes to the channel
+  hyperledger.fabric_ansible_collection.channel_config_edit:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    name: mychannel
+    original: channel_config.bin
+    path: channel_config_update.bin
+    members:
+      - organization: Org2
+        anchor_peers:
+          - Org2 Peer
+      - organization: Org3
+        state: absent
+    policies:
+      - name: Admins
+        policy: admins-policy.json
+    acls:
+      - name: lscc/ChaincodeExists
+        policy: /Channel/Application/Admins
+    capabilities:
+      application: V2_0
+    batch_timeout: 500ms
+
+- name: Sign the configuration update for the channel
+  hyperledger.fabric_ansible_collection.channel_config:
+    operation: sign_update
+    identity: Org1 Admin.json
+    msp_id: Org1MSP
+    name: mychannel
+    path: channel_config_update.bin
+'''
+
+RETURN = '''
+---
+path:
+    description:
+        - The path to the file where the configuration update envelope is stored.
+        - Is not returned if there are no changes to the channel configuration.
+    type: str
+    returned: when there are changes to the channel configuration
+    sample: channel_config_update.bin
+changes:
+    description:
+        - The changes made to the channel configuration.
+    type: list
+    elements: str
+    returned: always
+    sample:
+        - added member Org2MSP
+        - updated policy Admins
+'''
+
+
+def apply_capabilities(config_json, capabilities, changes):
+
+    # Handle the application, channel, and orderer capability levels.
+    if not capabilities:
+        return
+    channel_group = config_json['channel_group']
+    groups = dict(
+        application=channel_group['groups'].get('Application', None),
+        channel=channel_group,
+        orderer=channel_group['groups'].get('Orderer', None)
+    )
+    for key in ['application', 'channel', 'orderer']:
+        capability = capabilities.get(key, None)
+        if not capability:
+            continue
+        capabilities_value = groups[key]['values']['Capabilities']
+        if capabilities_value['value'].get('capabilities', None) == {capability: {}}:
+            continue
+        capabilities_value['value']['capabilities'] = {
+            capability: {}
+        }
+        changes.append(f'updated {key} capability to {capability}')
+
+
+def apply_members(config_json, members, resolver, changes):
+
+    # Determine the capabilities for this channel.
+    highest_capability = get_highest_capability(config_json['channel_group'])
+    endorsement_policy_required = False
+    if highest_capability is not None and highest_capability >= 'V2_0':
+        endorsement_policy_required = True
+
+    # Handle each of the members.
+    application_groups = config_json['channel_group']['groups']['Application']['groups']
+    for member in members:
+        organization = resolver.get_organization(member['organization'])
+        msp = application_groups.get(organization.msp_id, None)
+        if member['state'] == 'absent':
+            if msp is not None:
+                del application_groups[organization.msp_id]
+                changes.append(f'removed member {organization.msp_id}')
+            continue
+
+        # Build the anchor peer values.
+        anchor_peers_value = None
+        if member['anchor_peers']:
+            anchor_peers_value = dict(
+                mod_policy='Admins',
+                value=dict(
+                    anchor_peers=list()
+                )
+            )
+            for anchor_peer in member['anchor_peers']:
+                api_url_split = urllib.parse.urlsplit(resolver.get_peer(anchor_peer).api_url)
+                anchor_peers_value['value']['anchor_peers'].append(dict(
+                    host=api_url_split.hostname,
+                    port=api_url_split.port
+                ))
+
+        # Build the channel member, and add or update it.
+        policies = dict()
+        for policy_name, policy in (member['policies'] or dict()).items():
+            policies[policy_name] = load_policy(policy_name, policy)
+        new_msp = organization_to_msp(organization, endorsement_policy_required, policies)
+        if anchor_peers_value is not None:
+            new_msp['values']['AnchorPeers'] = anchor_peers_value
+        if msp is None:
+            application_groups[organization.msp_id] = new_msp
+            changes.append(f'added member {organization.msp_id}')
+            continue
+        updated_msp = copy_dict(msp)
+        merge_dicts(updated_msp, new_msp)
+        if not equal_dicts(msp, updated_msp):
+            application_groups[organization.msp_id] = updated_msp
+            changes.append(f'updated member {organization.msp_id}')
+
+
+def apply_policies(config_json, policies, changes):
+
+    # Handle each of the policies.
+    application_policies = config_json['channel_group']['groups']['Application']['policies']
+    for policy_spec in policies:
+        name = policy_spec['name']
+        policy_wrapper = application_policies.get(name, None)
+        if policy_spec['state'] == 'absent':
+            if policy_wrapper is not None:
+                del application_policies[name]
+                changes.append(f'removed policy {name}')
+            continue
+        elif policy_spec['policy'] is None:
+            raise Exception(f'The policy {name} must be specified')
+        policy = load_policy(name, policy_spec['policy'])
+        if policy_wrapper is None:
+            application_policies[name] = dict(
+                mod_policy='Admins',
+                policy=policy
+            )
+            changes.append(f'added policy {name}')
+            continue
+
+        # Delete the unused version if specified.
+        old_policy = policy_wrapper.get('policy', dict())
+        if old_policy.get('type', 0) == 1:
+            if 'version' in old_policy.get('value', dict()):
+                del old_policy['value']['version']
+        if policy.get('type', 0) == 1:
+            if 'version' in policy.get('value', dict()):
+                del policy['value']['version']
+
+        # Update the channel policy.
+        updated_policy_wrapper = copy_dict(policy_wrapper)
+        updated_policy_wrapper['policy'] = policy
+        if not equal_dicts(policy_wrapper, updated_policy_wrapper):
+            application_policies[name] = updated_policy_wrapper
+            changes.append(f'updated policy {name}')
+
+
+def apply_acls(config_json, acl_specs, changes):
+
+    # Handle each of the ACLs.
+    if not acl_specs:
+        return
+    application_values = config_json['channel_group']['groups']['Application']['values']
+    acls_value = application_values.setdefault('ACLs', dict(
+        mod_policy='Admins',
+        value=dict(
+            acls=dict()
+        ),
+        version=0
+    ))
+    value = acls_value.get('value', None)
+    if value is None:
+        value = acls_value['value'] = dict()
+    acls = value.get('acls', None)
+    if acls is None:
+        acls = value['acls'] = dict()
+    for acl_spec in acl_specs:
+        name = acl_spec['name']
+        acl = acls.get(name, None)
+        if acl_spec['state'] == 'absent':
+            if acl is not None:
+                del acls[name]
+                changes.append(f'removed ACL {name}')
+            continue
+        elif acl_spec['policy'] is None:
+            raise Exception(f'The policy for the ACL {name} must be specified')
+        elif acl is None or acl['policy_ref'] != acl_spec['policy']:
+            changes.append(f'{"added" if acl is None else "updated"} ACL {name}')
+            acls[name] = dict(policy_ref=acl_spec['policy'])
+
+
+def apply_parameters(config_json, batch_size, batch_timeout, changes):
+
+    # Handle the batch size.
+    if batch_size:
+        orderer_values = config_json['channel_group']['groups']['Orderer']['values']
+        orderer_batch_size_value = orderer_values['BatchSize']
+        for key in batch_size:
+            if batch_size[key] and orderer_batch_size_value['value'].get(key, None) != batch_size[key]:
+                orderer_batch_size_value['value'][key] = batch_size[key]
+                changes.append(f'updated batch size {key}')
+
+    # Handle the batch timeout.
+    if batch_timeout:
+        orderer_values = config_json['channel_group']['groups']['Orderer']['values']
+        orderer_batch_timeout_value = orderer_values['BatchTimeout']
+        if orderer_batch_timeout_value['value'].get('timeout', None) != batch_timeout:
+            orderer_batch_timeout_value['value']['timeout'] = batch_timeout
+            changes.append('updated batch timeout')
+
+
+def apply_consenters(config_json, consenters, resolver, changes):
+
+    # Get the list of ordering service nodes, and update the consenters.
+    if not consenters:
+        return
+    elif consenters['ordering_service'] is not None and consenters['ordering_service_nodes'] is not None:
+        raise Exception('Only one of ordering_service or ordering_service_nodes can be specified for the consenters')
+    elif consenters['ordering_service'] is not None:
+        ordering_service_nodes = resolver.get_ordering_service(consenters['ordering_service']).nodes
+    elif consenters['ordering_service_nodes'] is not None:
+        ordering_service_nodes = [resolver.get_ordering_service_node(node) for node in consenters['ordering_service_nodes']]
+    else:
+        return
+    if update_consenters(config_json, ordering_service_nodes):
+        changes.append('updated consenters')
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str'),
+        api_authtype=dict(type='str', choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        name=dict(type='str', required=True),
+        original=dict(type='str', required=True),
+        path=dict(type='str', required=True),
+        members=dict(type='list', elements='dict', default=list(), options=dict(
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            organization=dict(type='raw', required=True),
+            anchor_peers=dict(type='list', elements='raw', default=list()),
+            policies=dict(type='dict', default=dict())
+        )),
+        policies=dict(type='list', elements='dict', default=list(), options=dict(
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            name=dict(type='str', required=True),
+            policy=dict(type='raw')
+        )),
+        acls=dict(type='list', elements='dict', default=list(), options=dict(
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            name=dict(type='str', required=True),
+            policy=dict(type='str')
+        )),
+        capabilities=dict(type='dict', options=dict(
+            application=dict(type='str'),
+            channel=dict(type='str'),
+            orderer=dict(type='str')
+        )),
+        batch_size=dict(type='dict', options=dict(
+            max_message_count=dict(type='int'),
+            absolute_max_bytes=dict(type='int'),
+            preferred_max_bytes=dict(type='int')
+        )),
+        batch_timeout=dict(type='str'),
+        consenters=dict(type='dict', options=dict(
+            ordering_service=dict(type='raw'),
+            ordering_service_nodes=dict(type='list', elements='raw')
+        ))
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    required_together = [
+        ['api_endpoint', 'api_authtype', 'api_key']
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if, required_together=required_together)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Get the channel and paths.
+        name = module.params['name']
+        original = module.params['original']
+        path = module.params['path']
+
+        # Read the config, and apply all of the changes to a copy of it.
+        original_config_json = read_config(original)
+        config_json = copy_dict(original_config_json)
+        resolver = ComponentListing(module)
+        changes = list()
+        apply_capabilities(config_json, module.params['capabilities'], changes)
+        apply_members(config_json, module.params['members'], resolver, changes)
+        apply_policies(config_json, module.params['policies'], changes)
+        apply_acls(config_json, module.params['acls'], changes)
+        apply_parameters(config_json, module.params['batch_size'], module.params['batch_timeout'], changes)
+        apply_consenters(config_json, module.params['consenters'], resolver, changes)
+        module.json_log({'msg': 'applied changes to channel configuration', 'changes': changes})
+
+        # Compute and save the configuration update, or remove it if nothing changed.
+        unchanged = equal_dicts(original_config_json, config_json)
+        (changed, path) = update_config(name, original, config_json, path, unchanged, module.check_mode, 'channel configuration')
+        module.exit_json(changed=changed, path=path, changes=changes)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
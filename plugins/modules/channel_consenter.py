@@ -6,9 +6,9 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_utils import read_config, write_config
 from ..module_utils.dict_utils import equal_dicts, copy_dict
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 from ..module_utils.utils import get_console, get_ordering_service_node_by_module
 
 from ansible.module_utils._text import to_native
@@ -75,6 +75,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     ordering_service_node:
         description:
             - The ordering service node to use as a consenter for this channel.
@@ -136,6 +145,7 @@ def main():
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         ordering_service_node=dict(type='raw', required=True),
         updated_ordering_service_node=dict(type='raw')
     )
@@ -154,8 +164,7 @@ def main():
         path = module.params['path']
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
         original_config_json = copy_dict(config_json)
 
         # Get the ordering service node.
@@ -254,9 +263,7 @@ def main():
             return module.exit_json(changed=False)
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True, original_config_json=original_config_json, updated_config_json=config_json)
 
     # Notify Ansible of the exception.
@@ -6,15 +6,13 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_utils import read_config, update_consenters, write_config
 from ..module_utils.dict_utils import equal_dicts, copy_dict
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 from ..module_utils.utils import get_console, get_ordering_service_by_module, get_ordering_service_nodes_by_module
 
 from ansible.module_utils._text import to_native
 
-import urllib.parse
-
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
                     'supported_by': 'community'}
@@ -63,6 +61,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     ordering_service:
         description:
             - The ordering service to use as the consenters for this channel. All ordering service nodes
@@ -127,6 +134,7 @@ def main():
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         ordering_service=dict(type='raw'),
         ordering_service_nodes=dict(type='list', elements='raw'),
     )
@@ -149,8 +157,7 @@ def main():
         ordering_service_specified = module.params['ordering_service'] is not None
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
         original_config_json = copy_dict(config_json)
 
         # Get the list of ordering service nodes.
@@ -160,94 +167,15 @@ def main():
         else:
             ordering_service_nodes = get_ordering_service_nodes_by_module(console, module)
 
-        # Build the expected list of consenters.
-        expected_consenters = list()
-        for ordering_service_node in ordering_service_nodes:
-            parsed_api_url = urllib.parse.urlparse(ordering_service_node.api_url)
-            host = parsed_api_url.hostname
-            port = parsed_api_url.port or 443
-            client_tls_cert = ordering_service_node.client_tls_cert or ordering_service_node.tls_cert
-            server_tls_cert = ordering_service_node.server_tls_cert or ordering_service_node.tls_cert
-            expected_consenters.append(dict(
-                host=host,
-                port=port,
-                client_tls_cert=client_tls_cert,
-                server_tls_cert=server_tls_cert,
-            ))
-
-        # Get the actual list of consenters.
-        orderer_group = config_json['channel_group']['groups']['Orderer']
-        orderer_values = orderer_group['values']
-        orderer_consensus_type = orderer_values['ConsensusType']['value']
-        orderer_consensus_type_type = orderer_consensus_type['type']
-        if orderer_consensus_type_type != 'etcdraft':
-            raise Exception(f'The channel uses an unsupported consensus type ${orderer_consensus_type_type}')
-        actual_consenters = orderer_consensus_type['metadata']['consenters']
-
-        # Compare the expected consenters to the actual consenters.
-        # Look for a additional consenter or an update to an existing consenter.
-        changed = False
-        for expected_consenter in expected_consenters:
-            actual_consenter = None
-            for consenter in actual_consenters:
-                if consenter['host'] == expected_consenter['host'] and consenter['port'] == expected_consenter['port']:
-                    actual_consenter = consenter
-                    break
-            if actual_consenter is None:
-                if changed:
-                    raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
-                actual_consenters.append(expected_consenter)
-                changed = True
-            else:
-                if actual_consenter['client_tls_cert'] == expected_consenter['client_tls_cert'] and actual_consenter['server_tls_cert'] == expected_consenter['server_tls_cert']:
-                    continue
-                elif changed:
-                    raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
-                actual_consenter['client_tls_cert'] = expected_consenter['client_tls_cert']
-                actual_consenter['server_tls_cert'] = expected_consenter['server_tls_cert']
-                changed = True
-
-        # Compare the actual consenters to the expected consenters.
-        # Look for a consenter that has been removed.
-        for idx, actual_consenter in enumerate(actual_consenters):
-            expected_consenter = None
-            for consenter in expected_consenters:
-                if consenter['host'] == actual_consenter['host'] and consenter['port'] == actual_consenter['port']:
-                    expected_consenter = consenter
-                    break
-            if expected_consenter is None:
-                if changed:
-                    raise Exception('Multiple changes to the consenters for the channel are required but cannot be made at the same time')
-                del actual_consenters[idx]
-                changed = True
-
-        # Build the expected list of orderer addresses.
-        expected_orderer_addresses = set()
-        for ordering_service_node in ordering_service_nodes:
-            parsed_api_url = urllib.parse.urlparse(ordering_service_node.api_url)
-            host = parsed_api_url.hostname
-            port = parsed_api_url.port or 443
-            expected_orderer_addresses.add(f'{host}:{port}')
-
-        # Get the actual list of orderer addresses.
-        channel_group = config_json['channel_group']
-        channel_values = channel_group['values']
-        orderer_addresses_value = channel_values['OrdererAddresses']['value']
-        orderer_addresses = orderer_addresses_value['addresses']
-        actual_orderer_addresses = set(orderer_addresses)
-
-        # Update the list of orderer addresses if required.
-        if expected_orderer_addresses != actual_orderer_addresses:
-            orderer_addresses_value['addresses'] = list(expected_orderer_addresses)
+        # Update the consenters and orderer addresses.
+        update_consenters(config_json, ordering_service_nodes)
 
         # If nothing changed, get out now.
         if equal_dicts(original_config_json, config_json):
             return module.exit_json(changed=False)
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True)
 
     # Notify Ansible of the exception.
@@ -6,12 +6,16 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_utils import (read_config,
+                                          reconcile_channel_members,
+                                          write_config)
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 from ..module_utils.dict_utils import copy_dict
+from ..module_utils.utils import ComponentListing, load_policy
 
 from ansible.module_utils._text import to_native
 
+
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
                     'supported_by': 'community'}
@@ -19,10 +23,12 @@ ANSIBLE_METADATA = {'metadata_version': '1.1',
 DOCUMENTATION = '''
 ---
 module: channel_members
-short_description: Manage anchor peers for a channel
+short_description: Manage the members and anchor peers for a channel
 description:
-    - Manage anchor peers for the whole channel.
+    - Manage the members and anchor peers for the whole channel.
     - Migrate anchor peer addresses to the newer open source format
+    - Reconcile all of the members of the channel in a single pass, rather than running the M(channel_member)
+      module once for each member.
     - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
       Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
 author: Simon Stone (@sstone1)
@@ -61,11 +67,63 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     operation:
         description:
             - C(migrate_addresses_to_os) - Convert the anchor peer addresses in the channel to open source standards
+            - C(reconcile) - Add or update the channel members specified by I(members), and remove any other
+              channel members if I(purge) is C(true).
         type: str
         required: true
+    members:
+        description:
+            - The expected members of the channel.
+            - Only used when I(operation) is C(reconcile).
+        type: list
+        elements: dict
+        suboptions:
+            organization:
+                description:
+                    - The organization that is a member of the channel.
+                    - You can pass a string, which is the display name of an organization registered
+                      with the Fabric operations console.
+                    - You can also pass a dictionary, which must match the result format of one of the
+                      M(organization_info) or M(organization) modules.
+                type: raw
+                required: true
+            anchor_peers:
+                description:
+                    - The anchor peers for this organization in this channel.
+                    - You can pass strings, which are the names of peers that are
+                      registered with the Fabric operations console.
+                    - You can also pass a dict, which must match the result format of one
+                      of the M(peer_info) or M(peer) modules.
+                    - If not specified, the existing anchor peers are not changed.
+                type: list
+                elements: raw
+            policies:
+                description:
+                    - The set of policies for the channel member. The keys are the policy
+                      names, and the values are the policies.
+                    - You can pass strings, which are paths to JSON files containing policies
+                      in the Hyperledger Fabric format (common.Policy).
+                    - You can also pass a dict, which must correspond to a parsed policy in the
+                      Hyperledger Fabric format (common.Policy).
+                type: dict
+    purge:
+        description:
+            - True if any channel members that are not specified in I(members) should be removed from the channel.
+            - Only used when I(operation) is C(reconcile).
+        type: bool
+        default: false
 notes: []
 requirements: []
 '''
@@ -80,11 +138,78 @@ EXAMPLES = '''
     api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
     path: updated_config.bin
     operation: 'migrate_addresses_to_os'
+
+- name: Reconcile the members of the channel
+  hyperledger.fabric_ansible_collection.channel_members:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    path: updated_config.bin
+    operation: reconcile
+    members:
+      - organization: Org1
+        anchor_peers:
+          - Org1 Peer
+      - organization: Org2
+    purge: true
 '''
 
 RETURN = '''
 ---
-{}
+plan:
+    description:
+        - The changes made to the members of the channel.
+        - Only returned when I(operation) is C(reconcile).
+    returned: when operation is reconcile
+    type: dict
+    contains:
+        added:
+            description:
+                - The channel members that were added.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org1MSP
+        updated:
+            description:
+                - The channel members that were updated, with the paths of the changes to each channel member,
+                  and the SHA-256 fingerprints of any certificates that were added or removed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org2MSP
+                  changes:
+                    - /values/MSP/value/config/root_certs
+                  certificates:
+                    root_certs:
+                      added:
+                        - 3c5d0aa7fb1f1b1b0f5b32c4e26e6d5f5e7d2d9a2e1e2c0c5b5b1d0e7c2d8f9a
+                      removed:
+                        - 9f8e7d6c5b4a39281706f5e4d3c2b1a09f8e7d6c5b4a39281706f5e4d3c2b1a0
+        removed:
+            description:
+                - The channel members that were removed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org3MSP
+        unchanged:
+            description:
+                - The channel members that were not changed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org4MSP
+        counts:
+            description:
+                - The number of channel members that were added, updated, removed, and not changed.
+            type: dict
+            sample:
+                added: 1
+                updated: 1
+                removed: 1
+                unchanged: 1
 '''
 
 
@@ -96,8 +221,7 @@ def migrate_addresses_to_os(module):
     path = module.params['path']
 
     # Read the config.
-    with open(path, 'rb') as file:
-        config_json = proto_to_json('common.Config', file.read())
+    config_json = read_config(path)
 
     original_config_json = copy_dict(config_json)
 
@@ -134,12 +258,46 @@ def migrate_addresses_to_os(module):
             organizations.append(msp_id)
 
     # Save the config.
-    config_proto = json_to_proto('common.Config', config_json)
-    with open(path, 'wb') as file:
-        file.write(config_proto)
+    write_config(path, config_json, module.params['session'])
     module.exit_json(changed=changed, organizations=organizations, original_config_json=original_config_json, updated_config_json=config_json)
 
 
+def resolve_members(module):
+
+    # Resolve all of the organizations, anchor peers, and policies for the expected members.
+    resolver = ComponentListing(module)
+    members = list()
+    for member in module.params['members']:
+        organization = resolver.get_organization(member['organization'])
+        anchor_peers = None
+        if member['anchor_peers']:
+            anchor_peers = [resolver.get_peer(anchor_peer) for anchor_peer in member['anchor_peers']]
+        policies = {policy_name: load_policy(policy_name, policy) for policy_name, policy in (member['policies'] or dict()).items()}
+        members.append(dict(organization=organization, anchor_peers=anchor_peers, policies=policies))
+    return members
+
+
+def reconcile(module):
+
+    # Resolve all of the expected members before reading the config.
+    members = resolve_members(module)
+    path = module.params['path']
+    config_json = read_config(path)
+
+    # Check to see if this is a system channel.
+    if 'Consortiums' in config_json['channel_group']['groups']:
+        raise Exception('The reconcile operation cannot be used with the system channel')
+
+    # Reconcile the members, and only save the config if something changed.
+    plan = reconcile_channel_members(config_json, members, module.params['purge'])
+    module.json_log({'msg': 'reconciled channel members', 'plan': plan})
+    counts = plan['counts']
+    changed = counts['added'] > 0 or counts['updated'] > 0 or counts['removed'] > 0
+    if changed and not module.check_mode:
+        write_config(path, config_json, module.params['session'])
+    module.exit_json(changed=changed, plan=plan)
+
+
 def main():
 
     # Create the module.
@@ -152,11 +310,19 @@ def main():
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
         path=dict(type='str', required=True),
-        operation=dict(type='str', required=True, choices=['migrate_addresses_to_os'])
+        session=dict(type='bool', default=False),
+        operation=dict(type='str', required=True, choices=['migrate_addresses_to_os', 'reconcile']),
+        members=dict(type='list', elements='dict', options=dict(
+            organization=dict(type='raw', required=True),
+            anchor_peers=dict(type='list', elements='raw'),
+            policies=dict(type='dict')
+        )),
+        purge=dict(type='bool', default=False)
     )
     required_if = [
         ('api_authtype', 'basic', ['api_secret']),
-        ('operation', 'migrate_addresses_to_os', ['api_endpoint', 'api_authtype', 'api_key', 'path'])
+        ('operation', 'migrate_addresses_to_os', ['api_endpoint', 'api_authtype', 'api_key', 'path']),
+        ('operation', 'reconcile', ['members'])
     ]
     module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
 
@@ -165,6 +331,8 @@ def main():
         operation = module.params['operation']
         if operation == 'migrate_addresses_to_os':
             migrate_addresses_to_os(module)
+        elif operation == 'reconcile':
+            reconcile(module)
         else:
             raise Exception(f'Invalid operation {operation}')
 
@@ -6,9 +6,9 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_utils import read_config, write_config
 from ..module_utils.dict_utils import equal_dicts, copy_dict
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 
 from ansible.module_utils._text import to_native
 
@@ -34,6 +34,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     batch_size:
         description:
             - The batch size parameters for the channel.
@@ -86,6 +95,7 @@ def main():
     # Create the module.
     argument_spec = dict(
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         batch_size=dict(type='dict', options=dict(
             max_message_count=dict(type='int'),
             absolute_max_bytes=dict(type='int'),
@@ -104,8 +114,7 @@ def main():
         batch_timeout = module.params['batch_timeout']
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
         original_config_json = copy_dict(config_json)
 
         # Handle the batch size.
@@ -129,9 +138,7 @@ def main():
             return module.exit_json(changed=False)
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True)
 
     # Notify Ansible of the exception.
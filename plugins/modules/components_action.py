@@ -0,0 +1,339 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.concurrency_utils import run_concurrently
+from ..module_utils.health_utils import wait_for_healthz, wait_for_recovery
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import ComponentListing, get_console
+
+from ansible.module_utils._text import to_native
+
+import threading
+import time
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: components_action
+short_description: Perform an action on many Hyperledger Fabric components
+description:
+    - Restart, enroll, reenroll, or renew many Hyperledger Fabric certificate authorities, peers,
+      and ordering service nodes.
+    - All components are looked up using a single request to the Fabric operations console, and the
+      actions are then submitted in parallel.
+    - If I(wait) is C(true), then no more than I(max_unavailable) components are acted on at the same
+      time, and the next component is only acted on once a previous component has recovered. A restarted
+      component has recovered once its health check has failed and then succeeded again; for the other
+      actions, which do not restart the component, a component has recovered once its health check
+      succeeds. If a component does not recover, no further components are acted on.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    certificate_authorities:
+        description:
+            - The names of the certificate authorities to act on.
+        type: list
+        elements: str
+        default: []
+    peers:
+        description:
+            - The names of the peers to act on.
+        type: list
+        elements: str
+        default: []
+    ordering_service_nodes:
+        description:
+            - The names of the ordering service nodes to act on.
+        type: list
+        elements: str
+        default: []
+    msp_ids:
+        description:
+            - Act on all of the peers and ordering service nodes with these MSP IDs.
+        type: list
+        elements: str
+        default: []
+    action:
+        description:
+            - The action to perform.
+            - C(restart) - Restart the components.
+            - C(enroll) - Enroll the peers and ordering service nodes again; requires I(type).
+            - C(reenroll) - Reenroll the peers and ordering service nodes; requires I(type).
+            - C(renew) - Renew the TLS certificates of the certificate authorities.
+        type: str
+        required: true
+        choices:
+            - restart
+            - enroll
+            - reenroll
+            - renew
+    type:
+        description:
+            - The type of enrollment or reenrollment.
+            - Only required when I(action) is C(enroll) or C(reenroll).
+        type: str
+        choices:
+            - ecert
+            - tls_cert
+    concurrency:
+        description:
+            - The maximum number of actions to submit at the same time, when I(wait) is C(false).
+        type: int
+        default: 5
+    wait:
+        description:
+            - True if the module should wait for each component to recover after the action, false otherwise.
+        type: bool
+        default: false
+    max_unavailable:
+        description:
+            - The maximum number of components that can be recovering at the same time, when I(wait) is C(true).
+        type: int
+        default: 1
+    wait_timeout:
+        description:
+            - The timeout, in seconds, to wait until each component has recovered.
+        type: int
+        default: 600
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Restart all Org1 peers, one at a time
+  hyperledger.fabric_ansible_collection.components_action:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    msp_ids:
+      - Org1MSP
+    action: restart
+    wait: true
+
+- name: Reenroll the TLS certificates of two peers
+  hyperledger.fabric_ansible_collection.components_action:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    peers:
+      - Org1 Peer 1
+      - Org1 Peer 2
+    action: reenroll
+    type: tls_cert
+'''
+
+RETURN = '''
+---
+components:
+    description:
+        - The result of the action on each component.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description:
+                - The name of the component.
+            type: str
+            sample: Org1 Peer 1
+        type:
+            description:
+                - The type of the component.
+            type: str
+            sample: fabric-peer
+        accepted:
+            description:
+                - True if the Fabric operations console accepted the action, false otherwise.
+            type: bool
+            sample: true
+        recovered:
+            description:
+                - True if the component recovered after the action, false otherwise.
+                - Only returned when I(wait) is C(true).
+            type: bool
+            sample: true
+        action_duration:
+            description:
+                - The time, in seconds, taken to submit the action.
+            type: float
+            sample: 0.8
+        recovery_duration:
+            description:
+                - The time, in seconds, between the action being accepted and the component recovering.
+                - Only returned when I(wait) is C(true).
+            type: float
+            sample: 35.2
+        error:
+            description:
+                - The error, if the action failed or the component did not recover.
+            type: str
+            sample: Component failed to recover within 600 seconds
+'''
+
+
+def wait_for_component(component, action, timeout):
+
+    # Restarting a component takes it down, so wait for it to go down and come back up
+    # again; the other actions do not restart the component, so wait until it is healthy.
+    if action == 'restart':
+        return wait_for_recovery(component['operations_url'], timeout)
+    entry = wait_for_healthz([(component['display_name'], component['operations_url'])], timeout)[0]
+    if not entry['ready']:
+        raise Exception(f'Component failed to recover within {timeout} seconds: {entry["error"]}')
+    return entry['elapsed']
+
+
+def get_action(component_type, action, enrollment_type):
+
+    # Build the action object for the type of component.
+    if action == 'restart':
+        return dict(restart=True)
+    elif action == 'renew':
+        if component_type != 'fabric-ca':
+            raise Exception('The renew action is only supported for certificate authorities')
+        return dict(renew=dict(tls_cert=True))
+    if component_type == 'fabric-ca':
+        raise Exception(f'The {action} action is not supported for certificate authorities')
+    elif enrollment_type not in ['ecert', 'tls_cert']:
+        raise Exception(f'type must be ecert or tls_cert for the {action} action')
+    return {action: {enrollment_type: True}}
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        certificate_authorities=dict(type='list', elements='str', default=list()),
+        peers=dict(type='list', elements='str', default=list()),
+        ordering_service_nodes=dict(type='list', elements='str', default=list()),
+        msp_ids=dict(type='list', elements='str', default=list()),
+        action=dict(type='str', required=True, choices=['restart', 'enroll', 'reenroll', 'renew']),
+        type=dict(type='str', choices=['ecert', 'tls_cert']),
+        concurrency=dict(type='int', default=5),
+        wait=dict(type='bool', default=False),
+        max_unavailable=dict(type='int', default=1),
+        wait_timeout=dict(type='int', default=600)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret']),
+        ('action', 'enroll', ['type']),
+        ('action', 'reenroll', ['type'])
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Log in to the console.
+        console = get_console(module)
+
+        # Look up all of the components, and build all of the actions up front
+        # so that we fail before doing anything if any of them are invalid.
+        components = ComponentListing(module, console).get_requested_components(set(module.params['msp_ids']))
+        actions = [get_action(component['type'], module.params['action'], module.params['type']) for component in components]
+        wait = module.params['wait']
+        results = list()
+        for component in components:
+            result = dict(name=component['display_name'], type=component['type'], accepted=False, action_duration=None, error=None)
+            if wait:
+                result.update(recovered=False, recovery_duration=None)
+            results.append(result)
+
+        # In check mode, we would act on every component.
+        if module.check_mode:
+            return module.exit_json(changed=bool(components), components=results)
+
+        # Act on each component and, if requested, wait for it to recover before
+        # moving on to the next component; at most concurrency (or max_unavailable,
+        # if waiting) components are in progress at the same time.
+        timeout = module.params['wait_timeout']
+        stopped = threading.Event()
+
+        def act(index):
+            component = components[index]
+            result = results[index]
+            if stopped.is_set():
+                raise Exception('Not attempted, as a previous component failed to recover')
+            module.json_log({'msg': 'submitting action', 'name': component['display_name'], 'action': actions[index]})
+            started = time.monotonic()
+            if component['type'] == 'fabric-ca':
+                response = console.action_ca(component['id'], actions[index])
+            elif component['type'] == 'fabric-peer':
+                response = console.action_peer(component['id'], actions[index])
+            else:
+                response = console.action_ordering_service_node(component['id'], actions[index])
+            result['action_duration'] = round(time.monotonic() - started, 3)
+            if response.get('message', None) != 'accepted':
+                raise Exception('The action was not accepted')
+            result['accepted'] = True
+            if wait:
+                try:
+                    result['recovery_duration'] = round(wait_for_component(component, module.params['action'], timeout), 3)
+                except Exception:
+                    # Don't take any more components down if this one did not come back.
+                    stopped.set()
+                    raise
+                result['recovered'] = True
+                module.json_log({'msg': 'component recovered', 'name': component['display_name'], 'recovery_duration': result['recovery_duration']})
+        window = module.params['max_unavailable'] if wait else module.params['concurrency']
+        for index, (_, e) in enumerate(run_concurrently(act, range(len(components)), window)):
+            if e is not None:
+                results[index]['error'] = str(e)
+
+        # Fail if any of the actions failed.
+        changed = any([result['accepted'] for result in results])
+        failed = [result['name'] for result in results if result['error'] is not None]
+        if failed:
+            return module.fail_json(msg=f'Failed to perform the {module.params["action"]} action on components: {", ".join(failed)}', changed=changed, components=results)
+        module.exit_json(changed=changed, components=results)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.concurrency_utils import poll_concurrently, run_concurrently
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import ComponentListing, get_console
+
+from ansible.module_utils._text import to_native
+
+import time
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: components_renew
+short_description: Renew the TLS certificates of many Hyperledger Fabric components
+description:
+    - Renew the TLS certificates of many Hyperledger Fabric certificate authorities, peers, and
+      ordering service nodes at the same time.
+    - All components are looked up using a single request to the Fabric operations console. The
+      renewals are then requested in parallel, and each component is polled by ID until its TLS
+      certificate has changed.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    certificate_authorities:
+        description:
+            - The names of the certificate authorities to renew.
+        type: list
+        elements: str
+        default: []
+    peers:
+        description:
+            - The names of the peers to renew.
+        type: list
+        elements: str
+        default: []
+    ordering_service_nodes:
+        description:
+            - The names of the ordering service nodes to renew.
+        type: list
+        elements: str
+        default: []
+    concurrency:
+        description:
+            - The maximum number of requests to the Fabric operations console to make at the same time.
+        type: int
+        default: 5
+    wait_timeout:
+        description:
+            - The timeout, in seconds, to wait until all of the TLS certificates have been renewed.
+        type: int
+        default: 600
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Renew the TLS certificates for all Org1 components
+  hyperledger.fabric_ansible_collection.components_renew:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    certificate_authorities:
+      - Org1 CA
+    peers:
+      - Org1 Peer 1
+      - Org1 Peer 2
+    ordering_service_nodes:
+      - Ordering Service_1
+'''
+
+RETURN = '''
+---
+components:
+    description:
+        - The result of renewing each component.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description:
+                - The name of the component.
+            type: str
+            sample: Org1 Peer 1
+        type:
+            description:
+                - The type of the component.
+            type: str
+            sample: fabric-peer
+        accepted:
+            description:
+                - True if the Fabric operations console accepted the renewal request, false otherwise.
+            type: bool
+            sample: true
+        renewed:
+            description:
+                - True if the TLS certificate was renewed within the timeout, false otherwise.
+            type: bool
+            sample: true
+        latency:
+            description:
+                - The time, in seconds, between the renewal being accepted and the new TLS certificate
+                  being visible in the Fabric operations console.
+            type: float
+            sample: 12.5
+        error:
+            description:
+                - The error, if the component could not be renewed.
+            type: str
+            sample: Failed to submit action to peer
+'''
+
+# The renew action for each type of component.
+RENEW_ACTIONS = {
+    'fabric-ca': dict(renew=dict(tls_cert=True)),
+    'fabric-peer': dict(reenroll=dict(tls_cert=True)),
+    'fabric-orderer': dict(reenroll=dict(tls_cert=True))
+}
+
+
+def get_tls_cert(component):
+    return component.get('msp', dict()).get('component', dict()).get('tls_cert', None)
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        certificate_authorities=dict(type='list', elements='str', default=list()),
+        peers=dict(type='list', elements='str', default=list()),
+        ordering_service_nodes=dict(type='list', elements='str', default=list()),
+        concurrency=dict(type='int', default=5),
+        wait_timeout=dict(type='int', default=600)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Log in to the console.
+        console = get_console(module)
+
+        # Look up all of the components using a single request.
+        components = ComponentListing(module, console).get_requested_components()
+        results = [dict(name=component['display_name'], type=component['type'], accepted=False, renewed=False, latency=None, error=None) for component in components]
+
+        # In check mode, we would renew every component.
+        if module.check_mode:
+            return module.exit_json(changed=bool(components), components=results)
+
+        # Submit all of the renew actions, saving a copy of each existing TLS certificate first.
+        existing_tls_certs = [get_tls_cert(component) for component in components]
+        accepted_at = [None] * len(components)
+
+        def submit_action(index):
+            component = components[index]
+            action = RENEW_ACTIONS[component['type']]
+            module.json_log({'msg': 'submitting renew action', 'name': component['display_name'], 'action': action})
+            if component['type'] == 'fabric-ca':
+                response = console.action_ca(component['id'], action)
+            elif component['type'] == 'fabric-peer':
+                response = console.action_peer(component['id'], action)
+            else:
+                response = console.action_ordering_service_node(component['id'], action)
+            accepted_at[index] = time.monotonic()
+            return response.get('message', None) == 'accepted'
+        action_results = run_concurrently(submit_action, range(len(components)), module.params['concurrency'])
+        accepted = list()
+        for index, (result, e) in enumerate(action_results):
+            if e is not None:
+                results[index]['error'] = str(e)
+            elif not result:
+                results[index]['error'] = 'The renew action was not accepted'
+            else:
+                results[index]['accepted'] = True
+                accepted.append(index)
+
+        # Poll each accepted component by ID until the TLS certificate changes.
+        def is_renewed(index):
+            component = console.get_component_by_id(components[index]['id'], 'omitted')
+            return get_tls_cert(component) != existing_tls_certs[index]
+        timeout = module.params['wait_timeout']
+        poll_started = time.monotonic()
+        poll_results = poll_concurrently(is_renewed, accepted, timeout, module.params['concurrency'])
+        for index, poll_result in zip(accepted, poll_results):
+            if poll_result['ready']:
+                results[index]['renewed'] = True
+                results[index]['latency'] = round(poll_result['elapsed'] + poll_started - accepted_at[index], 3)
+            else:
+                last_e = poll_result['error']
+                results[index]['error'] = f'Failed to renew the TLS certificate within {timeout} seconds: {str(last_e)}'
+
+        # Fail if any of the components were not renewed.
+        failed = [result['name'] for result in results if not result['renewed']]
+        if failed:
+            return module.fail_json(msg=f'Failed to renew the TLS certificates for components: {", ".join(failed)}', changed=bool(accepted), components=results)
+        module.exit_json(changed=bool(accepted), components=results)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
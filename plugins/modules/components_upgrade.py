@@ -0,0 +1,402 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.concurrency_utils import poll_concurrently, run_concurrently
+from ..module_utils.health_utils import HEALTHZ_INITIAL_INTERVAL, HEALTHZ_MAX_INTERVAL, check_healthz, check_version
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import get_console
+
+from ansible.module_utils._text import to_native
+
+import time
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: components_upgrade
+short_description: Upgrade many Hyperledger Fabric peers and ordering service nodes
+description:
+    - Upgrade many Hyperledger Fabric peers and ordering service nodes to a new version of
+      Hyperledger Fabric, in waves.
+    - All components are looked up using a single request to the Fabric operations console, and the
+      requested versions are resolved once for all components.
+    - Ordering service nodes are upgraded before peers. After each wave, the module waits until every
+      upgraded component reports the new version and is healthy before starting the next wave. If any
+      component fails this health check, no further waves are started.
+    - Ordering service nodes are upgraded one cluster at a time, and the number of ordering service
+      nodes upgraded at the same time is limited so that the cluster does not lose Raft quorum.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    peers:
+        description:
+            - The names of the peers to upgrade.
+        type: list
+        elements: str
+        default: []
+    ordering_service_nodes:
+        description:
+            - The names of the ordering service nodes to upgrade.
+        type: list
+        elements: str
+        default: []
+    msp_ids:
+        description:
+            - Upgrade all of the peers and ordering service nodes with these MSP IDs.
+        type: list
+        elements: str
+        default: []
+    ordering_services:
+        description:
+            - Upgrade all of the ordering service nodes in these ordering services.
+        type: list
+        elements: str
+        default: []
+    peer_version:
+        description:
+            - The version of Hyperledger Fabric to upgrade the peers to.
+            - The version can also be specified as a version range specification, for example C(>=2.2,<3.0), which will match Hyperledger Fabric v2.2 and greater, but not Hyperledger Fabric v3.0 and greater.
+            - If not specified, the peers are not upgraded.
+        type: str
+    ordering_service_node_version:
+        description:
+            - The version of Hyperledger Fabric to upgrade the ordering service nodes to.
+            - The version can also be specified as a version range specification, for example C(>=2.2,<3.0), which will match Hyperledger Fabric v2.2 and greater, but not Hyperledger Fabric v3.0 and greater.
+            - If not specified, the ordering service nodes are not upgraded.
+        type: str
+    max_unavailable:
+        description:
+            - The maximum number of components to upgrade at the same time.
+            - For ordering service nodes, this is further limited so that a majority of the
+              ordering service nodes in each cluster remain available.
+        type: int
+        default: 1
+    ignore_warnings:
+        description:
+            - Ignore warnings from the Fabric operations console when upgrading peers.
+        type: bool
+        default: false
+    wait_timeout:
+        description:
+            - The timeout, in seconds, to wait until each wave of components is running the new
+              version and is healthy.
+        type: int
+        default: 600
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Upgrade all Org1 peers, two at a time
+  hyperledger.fabric_ansible_collection.components_upgrade:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    msp_ids:
+      - Org1MSP
+    peer_version: ">=2.5,<3.0"
+    max_unavailable: 2
+
+- name: Upgrade an ordering service
+  hyperledger.fabric_ansible_collection.components_upgrade:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    ordering_services:
+      - Ordering Service
+    ordering_service_node_version: ">=2.5,<3.0"
+'''
+
+RETURN = '''
+---
+waves:
+    description:
+        - The number of waves of upgrades that were started.
+    type: int
+    returned: always
+    sample: 3
+components:
+    description:
+        - The result of upgrading each component that was not already running the requested version.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description:
+                - The name of the component.
+            type: str
+            sample: Org1 Peer 1
+        type:
+            description:
+                - The type of the component.
+            type: str
+            sample: fabric-peer
+        wave:
+            description:
+                - The wave in which the component is upgraded, starting from 1.
+            type: int
+            sample: 1
+        from_version:
+            description:
+                - The version of the component before the upgrade.
+            type: str
+            sample: 2.2.5-1
+        to_version:
+            description:
+                - The version of the component after the upgrade.
+            type: str
+            sample: 2.5.4-1
+        upgraded:
+            description:
+                - True if the component was upgraded and became healthy, false otherwise.
+            type: bool
+            sample: true
+        elapsed:
+            description:
+                - The time, in seconds, between requesting the upgrade and the component becoming healthy.
+            type: float
+            sample: 42.5
+        error:
+            description:
+                - The error, if the component could not be upgraded.
+            type: str
+            sample: Component is running version 2.2.5, not 2.5.4-1
+'''
+
+
+def select_components(module, components):
+
+    # Select the peers and ordering service nodes that match any of the selectors.
+    peer_names = set(module.params['peers'])
+    ordering_service_node_names = set(module.params['ordering_service_nodes'])
+    msp_ids = set(module.params['msp_ids'])
+    ordering_services = set(module.params['ordering_services'])
+    found = set()
+    peers = list()
+    ordering_service_nodes = list()
+    for component in components:
+        component_type = component.get('type', None)
+        name = component.get('display_name', None)
+        msp_id = component.get('msp_id', None)
+        if component_type == 'fabric-peer':
+            if name in peer_names or msp_id in msp_ids:
+                found.add(('fabric-peer', name))
+                peers.append(component)
+        elif component_type == 'fabric-orderer':
+            if name in ordering_service_node_names or msp_id in msp_ids or component.get('cluster_name', None) in ordering_services:
+                found.add(('fabric-orderer', name))
+                ordering_service_nodes.append(component)
+    for name in peer_names:
+        if ('fabric-peer', name) not in found:
+            raise Exception(f'The peer {name} does not exist')
+    for name in ordering_service_node_names:
+        if ('fabric-orderer', name) not in found:
+            raise Exception(f'The ordering service node {name} does not exist')
+    return (peers, ordering_service_nodes)
+
+
+def plan_waves(module, peers, ordering_service_nodes, all_ordering_service_nodes):
+
+    # Ordering service nodes go first, one cluster at a time. Raft can tolerate
+    # a minority of the consenters being unavailable, so we limit each wave to
+    # the number of nodes that can be lost while keeping a majority; a cluster
+    # with fewer than three nodes cannot keep a majority, so go one at a time.
+    max_unavailable = max(1, module.params['max_unavailable'])
+    waves = list()
+    clusters = dict()
+    for component in ordering_service_nodes:
+        clusters.setdefault(component.get('cluster_id', None), list()).append(component)
+    for cluster_id, components in clusters.items():
+        cluster_size = len([component for component in all_ordering_service_nodes if component.get('cluster_id', None) == cluster_id and component.get('consenter_proposal_fin', True)])
+        tolerated = max(1, (cluster_size - 1) // 2)
+        wave_size = min(max_unavailable, tolerated)
+        module.json_log({'msg': 'planning ordering service upgrade', 'cluster_id': cluster_id, 'cluster_size': cluster_size, 'wave_size': wave_size})
+        for i in range(0, len(components), wave_size):
+            waves.append((cluster_id, components[i:i + wave_size]))
+
+    # Then the peers.
+    for i in range(0, len(peers), max_unavailable):
+        waves.append((None, peers[i:i + max_unavailable]))
+    return waves
+
+
+def check_quorum(module, cluster_id, all_ordering_service_nodes, wave):
+
+    # Before taking ordering service nodes down, make sure that enough of the
+    # other nodes in the cluster are healthy that it will still have a majority.
+    cluster = [component for component in all_ordering_service_nodes if component.get('cluster_id', None) == cluster_id and component.get('consenter_proposal_fin', True)]
+    if len(cluster) < 3:
+        return
+    upgrading = set([component['id'] for component in wave])
+    others = [component for component in cluster if component['id'] not in upgrading]
+    healthy = len([result for (result, e) in run_concurrently(lambda component: check_healthz(component['operations_url']), others, len(others)) if result])
+    required = len(cluster) // 2 + 1
+    module.json_log({'msg': 'checked ordering service quorum', 'cluster_id': cluster_id, 'healthy': healthy, 'required': required})
+    if healthy < required:
+        raise Exception(f'Upgrading {len(wave)} ordering service nodes would break quorum, as only {healthy} of the other {len(others)} ordering service nodes are healthy and {required} are required')
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        peers=dict(type='list', elements='str', default=list()),
+        ordering_service_nodes=dict(type='list', elements='str', default=list()),
+        msp_ids=dict(type='list', elements='str', default=list()),
+        ordering_services=dict(type='list', elements='str', default=list()),
+        peer_version=dict(type='str'),
+        ordering_service_node_version=dict(type='str'),
+        max_unavailable=dict(type='int', default=1),
+        ignore_warnings=dict(type='bool', default=False),
+        wait_timeout=dict(type='int', default=600)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Log in to the console.
+        console = get_console(module)
+
+        # Resolve the versions once for all of the components.
+        peer_version = module.params['peer_version']
+        if peer_version is not None:
+            peer_version = console.resolve_peer_version(peer_version)
+        ordering_service_node_version = module.params['ordering_service_node_version']
+        if ordering_service_node_version is not None:
+            ordering_service_node_version = console.resolve_ordering_service_node_version(ordering_service_node_version)
+
+        # Look up all of the components using a single request, select the
+        # components to upgrade, and skip any already running the requested version.
+        components = console.get_all_components('omitted')
+        (peers, ordering_service_nodes) = select_components(module, components)
+        all_ordering_service_nodes = [component for component in components if component.get('type', None) == 'fabric-orderer']
+        peers = [peer for peer in peers if peer_version is not None and peer.get('version', None) != peer_version]
+        ordering_service_nodes = [node for node in ordering_service_nodes if ordering_service_node_version is not None and node.get('version', None) != ordering_service_node_version]
+        versions = {'fabric-peer': peer_version, 'fabric-orderer': ordering_service_node_version}
+
+        # Plan the waves.
+        waves = plan_waves(module, peers, ordering_service_nodes, all_ordering_service_nodes)
+        results = list()
+        for number, (_, wave) in enumerate(waves, start=1):
+            for component in wave:
+                results.append(dict(
+                    name=component['display_name'],
+                    type=component['type'],
+                    wave=number,
+                    from_version=component.get('version', None),
+                    to_version=versions[component['type']],
+                    upgraded=False,
+                    elapsed=None,
+                    error=None
+                ))
+        module.json_log({'msg': 'planned upgrade', 'waves': len(waves), 'components': results})
+
+        # In check mode, we would upgrade every component.
+        if module.check_mode:
+            return module.exit_json(changed=bool(results), waves=len(waves), components=results)
+
+        # Go through each wave.
+        timeout = module.params['wait_timeout']
+        ignore_warnings = module.params['ignore_warnings']
+        offset = 0
+        for number, (cluster_id, wave) in enumerate(waves, start=1):
+            wave_results = results[offset:offset + len(wave)]
+            offset += len(wave)
+            if cluster_id is not None:
+                check_quorum(module, cluster_id, all_ordering_service_nodes, wave)
+
+            # Request the upgrades.
+            def upgrade(component):
+                if component['type'] == 'fabric-peer':
+                    console.update_peer_version(component['id'], peer_version, ignore_warnings)
+                else:
+                    console.update_ordering_service_node_version(component['id'], ordering_service_node_version)
+                return time.monotonic()
+            module.json_log({'msg': 'starting upgrade wave', 'wave': number, 'components': [component['display_name'] for component in wave]})
+            upgrade_results = run_concurrently(upgrade, wave, len(wave))
+
+            # Wait for the upgraded components to be running the new version and to be healthy.
+            waiting = list()
+            for index, (upgraded_at, e) in enumerate(upgrade_results):
+                if e is not None:
+                    wave_results[index]['error'] = str(e)
+                elif wave[index]['type'] == 'fabric-orderer' and not wave[index].get('consenter_proposal_fin', True):
+                    # Pre-created ordering service nodes are not running.
+                    wave_results[index]['upgraded'] = True
+                else:
+                    waiting.append((index, upgraded_at))
+            poll_started = time.monotonic()
+            poll_results = poll_concurrently(
+                lambda item: check_version(wave[item[0]]['operations_url'], versions[wave[item[0]]['type']]),
+                waiting, timeout, len(wave), HEALTHZ_INITIAL_INTERVAL, HEALTHZ_MAX_INTERVAL
+            )
+            for (index, upgraded_at), poll_result in zip(waiting, poll_results):
+                if poll_result['ready']:
+                    wave_results[index]['upgraded'] = True
+                    wave_results[index]['elapsed'] = round(poll_result['elapsed'] + poll_started - upgraded_at, 3)
+                else:
+                    wave_results[index]['error'] = f'Failed to start the new version within {timeout} seconds: {str(poll_result["error"])}'
+
+            # Stop if any of the components in this wave failed.
+            failed = [result['name'] for result in wave_results if not result['upgraded']]
+            if failed:
+                return module.fail_json(msg=f'Failed to upgrade components in wave {number}, no further waves started: {", ".join(failed)}', changed=True, waves=number, components=results)
+
+        # Return the results.
+        module.exit_json(changed=bool(results), waves=len(waves), components=results)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.health_utils import HEALTHZ_PROBE_TIMEOUT, get_last_error, wait_for_healthz
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import ComponentListing
+
+from ansible.module_utils._text import to_native
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: components_wait
+short_description: Wait for many Hyperledger Fabric components to start
+description:
+    - Wait for many Hyperledger Fabric certificate authorities, peers, and ordering service nodes
+      to start at the same time.
+    - All components specified by name are looked up using a single request to the Fabric operations
+      console. The health endpoints of all of the components are then checked in parallel.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    components:
+        description:
+            - The certificate authorities, peers, and ordering service nodes to wait for.
+            - You can pass strings, which are the display names of components registered
+              with the Fabric operations console.
+            - You can also pass dictionaries, which must match the result format of one of the
+              M(certificate_authority_info), M(certificate_authority), M(peer_info), M(peer),
+              M(ordering_service_node_info), or M(ordering_service_node) modules.
+            - You can also pass lists, which must match the result format of the
+              M(ordering_service_info) or M(ordering_service) modules.
+            - Ordering service nodes that have been pre-created, but not yet added to the
+              system channel, are not waited for.
+        type: list
+        elements: raw
+        required: true
+    concurrency:
+        description:
+            - The maximum number of components to check at the same time.
+        type: int
+        default: 10
+    probe_timeout:
+        description:
+            - The timeout, in seconds, for a single check of the health of a component.
+        type: int
+        default: 5
+    wait_timeout:
+        description:
+            - The timeout, in seconds, to wait until all of the components are available.
+        type: int
+        default: 60
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Wait for all Org1 components to start
+  hyperledger.fabric_ansible_collection.components_wait:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    components:
+      - Org1 CA
+      - Org1 Peer 1
+      - Org1 Peer 2
+    wait_timeout: 600
+
+- name: Wait for the components created by earlier tasks to start
+  hyperledger.fabric_ansible_collection.components_wait:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    components:
+      - "{{ org1_ca.certificate_authority }}"
+      - "{{ org1_peer.peer }}"
+      - "{{ ordering_service.ordering_service }}"
+'''
+
+RETURN = '''
+---
+readiness:
+    description:
+        - The readiness timeline, with an entry for each component.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description:
+                - The name of the component.
+            type: str
+            sample: Org1 Peer 1
+        type:
+            description:
+                - The type of the component.
+            type: str
+            sample: fabric-peer
+        ready:
+            description:
+                - True if the component was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the component was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the component was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the component.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the component was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
+'''
+
+
+def flatten_components(components):
+
+    # Ordering services are passed as lists of ordering service nodes.
+    result = list()
+    for component in components:
+        if isinstance(component, list):
+            result.extend(flatten_components(component))
+        else:
+            result.append(component)
+    return result
+
+
+def resolve_components(listing, components):
+
+    # Build the list of (name, type, operations URL, wait) tuples.
+    result = list()
+    for component in components:
+        if isinstance(component, dict):
+            name = component['name']
+        else:
+            name = str(component)
+            matches = listing.find_components(name, ['fabric-ca', 'fabric-peer', 'fabric-orderer'])
+            if not matches:
+                raise Exception(f'The component {name} does not exist')
+            elif len(matches) > 1:
+                raise Exception(f'The component name {name} is ambiguous, as it matches more than one component')
+            component = matches[0]
+        if 'type' not in component or 'operations_url' not in component:
+            raise Exception(f'The component {name} does not have a type and operations URL')
+        wait = component['type'] != 'fabric-orderer' or component.get('consenter_proposal_fin', True)
+        result.append((name, component['type'], component['operations_url'], wait))
+    return result
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        components=dict(type='list', elements='raw', required=True),
+        concurrency=dict(type='int', default=10),
+        probe_timeout=dict(type='int', default=HEALTHZ_PROBE_TIMEOUT),
+        wait_timeout=dict(type='int', default=60)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Look up all of the components, only logging in to the console if any of them were specified by name.
+        components = resolve_components(ComponentListing(module), flatten_components(module.params['components']))
+        waiting = [(name, operations_url) for (name, _, operations_url, wait) in components if wait]
+
+        # Wait for all of the components at the same time.
+        timeout = module.params['wait_timeout']
+        timeline = wait_for_healthz(waiting, timeout, probe_timeout=module.params['probe_timeout'], concurrency=module.params['concurrency'])
+        timeline.reverse()
+        readiness = list()
+        for (name, component_type, _, wait) in components:
+            if wait:
+                entry = timeline.pop()
+            else:
+                entry = dict(name=name, ready=False, skipped=True, elapsed=None, attempts=0, error=None)
+            entry['type'] = component_type
+            readiness.append(entry)
+        module.json_log({'msg': 'waited for components', 'readiness': readiness})
+
+        # Fail if any of the components did not start.
+        failed = [entry['name'] for entry in readiness if not entry['ready'] and not entry['skipped']]
+        if failed:
+            return module.fail_json(msg=f'Components failed to start within {timeout} seconds: {", ".join(failed)}: {get_last_error(readiness)}', readiness=readiness)
+        module.exit_json(changed=False, readiness=readiness)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
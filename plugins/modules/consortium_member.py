@@ -6,11 +6,10 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
-from ..module_utils.channel_utils import get_highest_capability
+from ..module_utils.channel_utils import get_highest_capability, read_config, write_config
 from ..module_utils.dict_utils import equal_dicts, merge_dicts, copy_dict
 from ..module_utils.module import BlockchainModule
 from ..module_utils.msp_utils import organization_to_msp
-from ..module_utils.proto_utils import proto_to_json, json_to_proto
 from ..module_utils.utils import get_console, get_organization_by_module
 
 from ansible.module_utils._text import to_native
@@ -77,6 +76,15 @@ options:
               update.
         type: str
         required: true
+    session:
+        description:
+            - True if the change should be saved to a config editing session alongside the configuration file, rather
+              than being encoded into the configuration file.
+            - Subsequent tasks that use the same configuration file will use the config editing session, and the
+              configuration is only encoded into the configuration file when the configuration update is computed by
+              the M(channel_config) module. This avoids decoding and encoding the configuration for every change.
+        type: bool
+        default: false
     organization:
         description:
             - The organization to add, update, or remove from the consortium.
@@ -142,6 +150,7 @@ def main():
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
         path=dict(type='str', required=True),
+        session=dict(type='bool', default=False),
         organization=dict(type='raw', required=True),
         policies=dict(type='dict', default=dict())
     )
@@ -173,8 +182,7 @@ def main():
                 raise Exception(f'The policy {policyName} is invalid')
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        config_json = read_config(path)
 
         # Determine the capabilities for this channel.
         highest_capability = get_highest_capability(config_json['channel_group'])
@@ -215,9 +223,7 @@ def main():
             del consortium_groups[organization.msp_id]
 
         # Save the config.
-        config_proto = json_to_proto('common.Config', config_json)
-        with open(path, 'wb') as file:
-            file.write(config_proto)
+        write_config(path, config_json, module.params['session'])
         module.exit_json(changed=True)
 
     # Notify Ansible of the exception.
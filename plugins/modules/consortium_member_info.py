@@ -6,9 +6,8 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+from ..module_utils.channel_configs import ChannelConfig
 from ..module_utils.module import BlockchainModule
-from ..module_utils.msp_utils import msp_to_organization
-from ..module_utils.proto_utils import proto_to_json
 
 from ansible.module_utils._text import to_native
 
@@ -223,19 +222,16 @@ def main():
         msp_id = module.params['msp_id']
 
         # Read the config.
-        with open(path, 'rb') as file:
-            config_json = proto_to_json('common.Config', file.read())
+        channel_config = ChannelConfig.from_path(path)
 
         # Check to see if the consortium member exists.
-        consortium_groups = config_json['channel_group']['groups']['Consortiums']['groups']['SampleConsortium']['groups']
-        msp = consortium_groups.get(msp_id, None)
+        organization = channel_config.get_consortium_member(msp_id)
 
         # If it doesn't exist, return now.
-        if msp is None:
+        if organization is None:
             return module.exit_json(exists=False)
 
         # Return organization information.
-        organization = msp_to_organization(msp_id, msp)
         return module.exit_json(exists=True, organization=organization.to_json())
 
     # Notify Ansible of the exception.
@@ -0,0 +1,296 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.channel_utils import (read_config,
+                                          reconcile_consortium_members,
+                                          update_config)
+from ..module_utils.dict_utils import copy_dict
+from ..module_utils.module import BlockchainModule
+from ..module_utils.utils import ComponentListing, load_policy
+
+from ansible.module_utils._text import to_native
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: consortium_members
+short_description: Manage the consortium members for a Hyperledger Fabric ordering service
+description:
+    - Add, update, and remove many consortium members for a Hyperledger Fabric ordering service in a single
+      configuration update.
+    - The system channel configuration is read once, all of the changes to the consortium members are made
+      to it, and the updated configuration is encoded once. The consortium members are built in the same way
+      as the M(consortium_member) module.
+    - The resulting configuration update envelope is ready for signing by using the M(channel_config) module.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+            - Only required when organizations are specified by name.
+        type: str
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+            - Only required when organizations are specified by name.
+        type: str
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+            - Only required when organizations are specified by name.
+        type: str
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    name:
+        description:
+            - The name of the system channel.
+        type: str
+        required: true
+    original:
+        description:
+            - The path to the file where the original system channel configuration is stored.
+            - This file can be fetched by using the M(channel_config) module.
+            - This file is not modified.
+        type: str
+        required: true
+    path:
+        description:
+            - The path to the file where the configuration update envelope will be stored.
+            - If there are no changes to the consortium members, then this file will be removed.
+        type: str
+        required: true
+    consortium:
+        description:
+            - The name of the consortium.
+        type: str
+        default: SampleConsortium
+    members:
+        description:
+            - The organizations to add, update, or remove from the consortium.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+            state:
+                description:
+                    - C(absent) - The organization will be removed from the consortium.
+                    - C(present) - The organization will be added to the consortium, or updated if it is already
+                      a member of the consortium.
+                type: str
+                default: present
+                choices:
+                    - absent
+                    - present
+            organization:
+                description:
+                    - The organization to add, update, or remove from the consortium.
+                    - You can pass a string, which is the display name of an organization registered
+                      with the Fabric operations console.
+                    - You can also pass a dictionary, which must match the result format of one of the
+                      M(organization_info) or M(organization) modules.
+                type: raw
+                required: true
+            policies:
+                description:
+                    - The set of policies for the consortium member. The keys are the policy
+                      names, and the values are the policies.
+                    - You can pass strings, which are paths to JSON files containing policies
+                      in the Hyperledger Fabric format (common.Policy).
+                    - You can also pass a dict, which must correspond to a parsed policy in the
+                      Hyperledger Fabric format (common.Policy).
+                    - Default policies are provided for the Admins, Writers, Readers, and Endorsement
+                      policies. You only need to provide policies if you want to override these default
+                      policies, or add additional policies.
+                type: dict
+    purge:
+        description:
+            - True if any consortium members that are not specified in I(members) should be removed from the consortium.
+        type: bool
+        default: false
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Fetch the system channel configuration
+  hyperledger.fabric_ansible_collection.channel_config:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    operation: fetch
+    ordering_service: Ordering Service
+    identity: Ordering Org Admin.json
+    msp_id: OrdererMSP
+    name: testchainid
+    path: system_channel_config.bin
+
+- name: Compute the configuration update for all of the consortium members
+  hyperledger.fabric_ansible_collection.consortium_members:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    name: testchainid
+    original: system_channel_config.bin
+    path: system_channel_config_update.bin
+    members:
+      - organization: Org1
+      - organization: Org2
+      - organization: Org3
+        state: absent
+'''
+
+RETURN = '''
+---
+path:
+    description:
+        - The path to the file where the configuration update envelope is stored.
+        - Is not returned if there are no changes to the consortium members.
+    type: str
+    returned: when there are changes to the consortium members
+    sample: system_channel_config_update.bin
+plan:
+    description:
+        - The changes made to the consortium members.
+    returned: always
+    type: dict
+    contains:
+        added:
+            description:
+                - The consortium members that were added.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org1MSP
+        updated:
+            description:
+                - The consortium members that were updated, with the paths of the changes to each consortium member,
+                  and the SHA-256 fingerprints of any certificates that were added or removed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org2MSP
+                  changes:
+                    - /values/MSP/value/config/admins
+                  certificates:
+                    admins:
+                      added:
+                        - 3c5d0aa7fb1f1b1b0f5b32c4e26e6d5f5e7d2d9a2e1e2c0c5b5b1d0e7c2d8f9a
+                      removed: []
+        removed:
+            description:
+                - The consortium members that were removed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org3MSP
+        unchanged:
+            description:
+                - The consortium members that were not changed.
+            type: list
+            elements: dict
+            sample:
+                - msp_id: Org4MSP
+        counts:
+            description:
+                - The number of consortium members that were added, updated, removed, and not changed.
+            type: dict
+            sample:
+                added: 1
+                updated: 1
+                removed: 1
+                unchanged: 1
+'''
+
+
+def resolve_members(module):
+
+    # Resolve all of the organizations and policies for the consortium members.
+    resolver = ComponentListing(module)
+    members = list()
+    for member in module.params['members']:
+        organization = resolver.get_organization(member['organization'])
+        policies = {policy_name: load_policy(policy_name, policy) for policy_name, policy in (member['policies'] or dict()).items()}
+        members.append(dict(organization=organization, state=member['state'], policies=policies))
+    return members
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str'),
+        api_authtype=dict(type='str', choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        name=dict(type='str', required=True),
+        original=dict(type='str', required=True),
+        path=dict(type='str', required=True),
+        consortium=dict(type='str', default='SampleConsortium'),
+        members=dict(type='list', elements='dict', required=True, options=dict(
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            organization=dict(type='raw', required=True),
+            policies=dict(type='dict', default=dict())
+        )),
+        purge=dict(type='bool', default=False)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    required_together = [
+        ['api_endpoint', 'api_authtype', 'api_key']
+    ]
+    module = BlockchainModule(argument_spec=argument_spec, supports_check_mode=True, required_if=required_if, required_together=required_together)
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Get the channel and paths.
+        name = module.params['name']
+        original = module.params['original']
+        path = module.params['path']
+
+        # Resolve all of the consortium members before reading the config.
+        members = resolve_members(module)
+
+        # Read the config, and apply all of the changes to a copy of it.
+        original_config_json = read_config(original)
+        config_json = copy_dict(original_config_json)
+        plan = reconcile_consortium_members(config_json, members, module.params['purge'], module.params['consortium'])
+        module.json_log({'msg': 'reconciled consortium members', 'plan': plan})
+
+        # Compute and save the configuration update, or remove it if nothing changed.
+        counts = plan['counts']
+        unchanged = counts['added'] == 0 and counts['updated'] == 0 and counts['removed'] == 0
+        (changed, path) = update_config(name, original, config_json, path, unchanged, module.check_mode, 'consortium members')
+        module.exit_json(changed=changed, path=path, plan=plan)
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,466 @@
+#!/usr/bin/python
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ..module_utils.chaincode_utils import get_package_id
+from ..module_utils.concurrency_utils import run_concurrently
+from ..module_utils.module import BlockchainModule
+from ..module_utils.peers import ChannelConfigCache
+from ..module_utils.utils import (ComponentListing, get_console,
+                                  get_identity_by_value, resolve_identity)
+
+from ansible.module_utils._text import to_native
+
+import time
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: deployed_chaincode
+short_description: Deploy a chaincode across many organizations using the new lifecycle
+description:
+    - Install, approve, and commit a chaincode package for many organizations in a single task,
+      using the Hyperledger Fabric v2.x chaincode lifecycle.
+    - The chaincode package is installed on all of the peers at the same time, skipping any peers
+      that already have it installed. The chaincode definition is then approved for all of the
+      organizations that have not already approved it at the same time, and committed once all of
+      the organizations have approved it.
+    - All peers are looked up using a single request to the Fabric operations console, and the channel
+      configuration is fetched once and shared by all of the approvals and the commit.
+    - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
+      Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
+author: Simon Stone (@sstone1)
+options:
+    api_endpoint:
+        description:
+            - The URL for the Fabric operations console.
+        type: str
+        required: true
+    api_authtype:
+        description:
+            - C(basic) - Authenticate to the Fabric operations console using basic authentication.
+              You must provide both a valid API key using I(api_key) and API secret using I(api_secret).
+        type: str
+        required: true
+    api_key:
+        description:
+            - The API key for the Fabric operations console.
+        type: str
+        required: true
+    api_secret:
+        description:
+            - The API secret for the Fabric operations console.
+            - Only required when I(api_authtype) is C(basic).
+        type: str
+    api_timeout:
+        description:
+            - The timeout, in seconds, to use when interacting with the Fabric operations console.
+        type: int
+        default: 60
+    organizations:
+        description:
+            - The organizations that should install and approve the chaincode.
+            - The first organization is also used to commit the chaincode definition, and all of the
+              organizations are used to endorse the commit.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+            msp_id:
+                description:
+                    - The MSP ID of the organization.
+                type: str
+                required: true
+            identity:
+                description:
+                    - The identity to use when interacting with the peers of this organization.
+                    - You can pass a string, which is the path to the JSON file where the enrolled
+                      identity is stored.
+                    - You can also pass a dict, which must match the result format of one of the
+                      M(enrolled_identity_info) or M(enrolled_identity) modules.
+                type: raw
+                required: true
+            hsm:
+                description:
+                    - "The PKCS #11 compliant HSM configuration to use for digital signatures."
+                    - Only required if the identity specified in I(identity) was enrolled using an HSM.
+                type: dict
+                suboptions:
+                    pkcs11library:
+                        description:
+                            - "The PKCS #11 library that should be used for digital signatures."
+                        type: str
+                    label:
+                        description:
+                            - The HSM label that should be used for digital signatures.
+                        type: str
+                    pin:
+                        description:
+                            - The HSM pin that should be used for digital signatures.
+                        type: str
+            peers:
+                description:
+                    - The peers of this organization to install the chaincode on. The first peer is
+                      used to approve the chaincode definition.
+                    - You can pass strings, which are the display names of peers registered
+                      with the Fabric operations console.
+                    - You can also pass dicts, which must match the result format of one of the
+                      M(peer_info) or M(peer) modules.
+                type: list
+                elements: raw
+                required: true
+    channel:
+        description:
+            - The name of the channel.
+        type: str
+        required: true
+    path:
+        description:
+            - The path to the chaincode package.
+        type: str
+        required: true
+    name:
+        description:
+            - The name of the chaincode definition.
+        type: str
+        required: true
+    version:
+        description:
+            - The version of the chaincode definition.
+        type: str
+        required: true
+    sequence:
+        description:
+            - The sequence number of the chaincode definition.
+        type: int
+        required: true
+    endorsement_policy_ref:
+        description:
+            - A reference to a channel policy to use as the endorsement policy for this chaincode definition, for example I(/Channel/Application/MyEndorsementPolicy).
+        type: str
+    endorsement_policy:
+        description:
+            - The endorsement policy for this chaincode definition.
+        type: str
+    endorsement_plugin:
+        description:
+            - The endorsement plugin for this chaincode definition.
+        type: str
+    validation_plugin:
+        description:
+            - The validation plugin for this chaincode definition.
+        type: str
+    init_required:
+        description:
+            - True if this chaincode definition requires called the I(Init) method before the I(Invoke) method,
+              false otherwise.
+        type: bool
+    init_json_str:
+        description:
+            - The JSON string to pass to the Init method.
+            - If init_required is true, then the transaction will be submitted immediately after the commit
+              completes successfully.
+        type: str
+    collections_config:
+        description:
+            - The path to the collections configuration file for the chaincode definition.
+        type: str
+    orderer_name:
+        description:
+            - The name of the ordering service to submit the transactions to.
+            - If not specified, the ordering service will be found from the channel configuration.
+        type: str
+    concurrency:
+        description:
+            - The maximum number of peers to install the chaincode on, or organizations to approve
+              the chaincode for, at the same time.
+        type: int
+        default: 5
+notes: []
+requirements: []
+'''
+
+EXAMPLES = '''
+- name: Deploy the chaincode for Org1 and Org2
+  hyperledger.fabric_ansible_collection.deployed_chaincode:
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    organizations:
+      - msp_id: Org1MSP
+        identity: Org1 Admin.json
+        peers:
+          - Org1 Peer 1
+          - Org1 Peer 2
+      - msp_id: Org2MSP
+        identity: Org2 Admin.json
+        hsm:
+          pkcs11library: /usr/local/lib/libpkcs11-proxy.so
+          label: Org2 HSM
+          pin: 1234
+        peers:
+          - Org2 Peer
+    channel: mychannel
+    path: fabcar@1.0.0.tgz
+    name: fabcar
+    version: 1.0.0
+    sequence: 1
+'''
+
+RETURN = '''
+---
+deployed_chaincode:
+    description:
+        - The deployed chaincode.
+    type: dict
+    returned: always
+    contains:
+        channel:
+            description:
+                - The name of the channel.
+            type: str
+            sample: mychannel
+        name:
+            description:
+                - The name of the chaincode definition.
+            type: str
+            sample: fabcar
+        version:
+            description:
+                - The version of the chaincode definition.
+            type: str
+            sample: 1.0.0
+        sequence:
+            description:
+                - The sequence number of the chaincode definition.
+            type: int
+            sample: 1
+        package_id:
+            description:
+                - The package ID of the chaincode package.
+            type: str
+            sample: fabcar@1.0.0:cb4d5c1a28a0e3b0ea3a9d9c6f8d5e2ec3b9b3e1de4b5b2e3c9a0d0a7f8e1b2c
+        installed:
+            description:
+                - The names of the peers that the chaincode package was installed on.
+            type: list
+            elements: str
+            sample: [Org1 Peer 1]
+        approved:
+            description:
+                - The MSP IDs of the organizations that approved the chaincode definition.
+            type: list
+            elements: str
+            sample: [Org1MSP, Org2MSP]
+        committed:
+            description:
+                - True if the chaincode definition was committed by this task, false otherwise.
+            type: bool
+            sample: true
+phases:
+    description:
+        - The time, in seconds, taken by each phase of the deployment.
+    type: dict
+    returned: always
+    sample:
+        resolve: 1.2
+        install: 35.3
+        approve: 4.1
+        commit_readiness: 0.6
+        commit: 3.9
+'''
+
+
+def resolve_organizations(listing, module):
+
+    # Look up all of the peers using a single request, and load all of the identities.
+    organizations = list()
+    for organization in module.params['organizations']:
+        msp_id = organization['msp_id']
+        peers = [listing.get_peer(peer) for peer in organization['peers']]
+        if not peers:
+            raise Exception(f'No peers specified for organization {msp_id}')
+        identity = resolve_identity(listing.get_console(), module, get_identity_by_value(organization['identity']), msp_id)
+        organizations.append(dict(msp_id=msp_id, identity=identity, hsm=organization['hsm'], peers=peers))
+    return organizations
+
+
+def main():
+
+    # Create the module.
+    argument_spec = dict(
+        api_endpoint=dict(type='str', required=True),
+        api_authtype=dict(type='str', required=True, choices=['ibmcloud', 'basic']),
+        api_key=dict(type='str', required=True, no_log=True),
+        api_secret=dict(type='str', no_log=True),
+        api_timeout=dict(type='int', default=60),
+        api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
+        organizations=dict(type='list', elements='dict', required=True, options=dict(
+            msp_id=dict(type='str', required=True),
+            identity=dict(type='raw', required=True),
+            hsm=dict(type='dict', options=dict(
+                pkcs11library=dict(type='str', required=True),
+                label=dict(type='str', required=True, no_log=True),
+                pin=dict(type='str', required=True, no_log=True)
+            )),
+            peers=dict(type='list', elements='raw', required=True)
+        )),
+        channel=dict(type='str', required=True),
+        path=dict(type='str', required=True),
+        name=dict(type='str', required=True),
+        version=dict(type='str', required=True),
+        sequence=dict(type='int', required=True),
+        endorsement_policy_ref=dict(type='str'),
+        endorsement_policy=dict(type='str'),
+        endorsement_plugin=dict(type='str'),
+        validation_plugin=dict(type='str'),
+        init_required=dict(type='bool'),
+        init_json_str=dict(type='str'),
+        collections_config=dict(type='str'),
+        orderer_name=dict(type='str'),
+        concurrency=dict(type='int', default=5)
+    )
+    required_if = [
+        ('api_authtype', 'basic', ['api_secret'])
+    ]
+    mutually_exclusive = [['endorsement_policy_ref', 'endorsement_policy']]
+    module = BlockchainModule(min_fabric_version='2.1.1', argument_spec=argument_spec, supports_check_mode=True, required_if=required_if, mutually_exclusive=mutually_exclusive)
+
+    # Validate HSM requirements if HSM is specified.
+    if any([organization['hsm'] for organization in module.params['organizations']]):
+        module.check_for_missing_hsm_libs()
+
+    # Ensure all exceptions are caught.
+    try:
+
+        # Log in to the console, and look up everything we need.
+        phases = dict()
+        started = time.monotonic()
+        listing = ComponentListing(module, get_console(module))
+        organizations = resolve_organizations(listing, module)
+        if module.params['orderer_name']:
+            orderer = listing.get_ordering_service(module.params['orderer_name'])
+        else:
+            orderer = None
+
+        # Extract the chaincode information.
+        channel = module.params['channel']
+        name = module.params['name']
+        version = module.params['version']
+        sequence = module.params['sequence']
+        endorsement_policy_ref = module.params['endorsement_policy_ref']
+        endorsement_policy = module.params['endorsement_policy']
+        endorsement_plugin = module.params['endorsement_plugin']
+        validation_plugin = module.params['validation_plugin']
+        init_required = module.params['init_required']
+        collections_config = module.params['collections_config']
+        timeout = module.params['api_timeout']
+        concurrency = module.params['concurrency']
+        path = module.params['path']
+        package_id = get_package_id(path)['package_id']
+        definition = (channel, name, version, package_id, sequence, endorsement_policy_ref, endorsement_policy, endorsement_plugin, validation_plugin, init_required, collections_config)
+
+        # All of the connections share a single fetched and decoded channel configuration.
+        channel_configs = ChannelConfigCache()
+
+        def connect(organization, peer=None):
+            if peer is None:
+                peer = organization['peers'][0]
+            return peer.connect(module, organization['identity'], organization['msp_id'], organization['hsm'], channel_configs=channel_configs)
+        phases['resolve'] = round(time.monotonic() - started, 3)
+
+        # Install the chaincode package on every peer that does not already have it.
+        started = time.monotonic()
+        targets = [(organization, peer) for organization in organizations for peer in organization['peers']]
+
+        def install(target):
+            (organization, peer) = target
+            with connect(organization, peer) as peer_connection:
+                installed_chaincodes = peer_connection.list_installed_chaincodes_newlc()
+                if any([installed_chaincode['package_id'] == package_id for installed_chaincode in installed_chaincodes]):
+                    return False
+                if not module.check_mode:
+                    peer_connection.install_chaincode_newlc(path)
+                return True
+        installed = list()
+        for (organization, peer), (result, e) in zip(targets, run_concurrently(install, targets, concurrency)):
+            if e is not None:
+                raise Exception(f'Failed to install chaincode on peer {peer.name}: {e}')
+            elif result:
+                installed.append(peer.name)
+        phases['install'] = round(time.monotonic() - started, 3)
+
+        # Check whether the chaincode definition has already been committed.
+        started = time.monotonic()
+        committer = organizations[0]
+        with connect(committer) as peer_connection:
+            committed_chaincodes = peer_connection.query_committed_chaincodes(channel)
+        committed = any([committed_chaincode['name'] == name and committed_chaincode['version'] == version and committed_chaincode['sequence'] == sequence for committed_chaincode in committed_chaincodes])
+
+        # Find out which organizations still need to approve the chaincode definition; if it has
+        # been committed, then approvals are still permitted for the organizations that have not.
+        with connect(committer) as peer_connection:
+            if committed:
+                approvals = peer_connection.query_committed_chaincode(channel, name).get('approvals', dict())
+            else:
+                approvals = peer_connection.check_commit_readiness(*definition)
+        pending = [organization for organization in organizations if not approvals.get(organization['msp_id'], False)]
+
+        # Approve the chaincode definition for all of those organizations at the same time.
+        def approve(organization):
+            with connect(organization) as peer_connection:
+                peer_connection.approve_chaincode(*definition, timeout, orderer)
+        approved = [organization['msp_id'] for organization in pending]
+        if pending and not module.check_mode:
+            for organization, (_, e) in zip(pending, run_concurrently(approve, pending, concurrency)):
+                if e is not None:
+                    raise Exception(f'Failed to approve chaincode for organization {organization["msp_id"]}: {e}')
+        phases['approve'] = round(time.monotonic() - started, 3)
+
+        # Check that every organization has now approved the chaincode definition, and commit it.
+        committing = not committed and not module.check_mode
+        if committing:
+            started = time.monotonic()
+            with connect(committer) as peer_connection:
+                approvals = peer_connection.check_commit_readiness(*definition)
+            missing = [organization['msp_id'] for organization in organizations if not approvals.get(organization['msp_id'], False)]
+            if missing:
+                raise Exception(f'Chaincode definition has not been approved by organizations: {", ".join(missing)}')
+            phases['commit_readiness'] = round(time.monotonic() - started, 3)
+            started = time.monotonic()
+            msp_ids = [organization['msp_id'] for organization in organizations]
+            with connect(committer) as peer_connection:
+                peer_connection.commit_chaincode(channel, msp_ids, name, version, sequence, endorsement_policy_ref, endorsement_policy, endorsement_plugin, validation_plugin, init_required, collections_config, timeout, orderer)
+                if init_required:
+                    peer_connection.init_chaincode(channel, msp_ids, name, module.params['init_json_str'], timeout, orderer)
+            phases['commit'] = round(time.monotonic() - started, 3)
+        module.json_log({'msg': 'deployed chaincode', 'phases': phases})
+
+        # Return the deployed chaincode.
+        changed = bool(installed or approved or not committed)
+        return module.exit_json(changed=changed, phases=phases, deployed_chaincode=dict(
+            channel=channel,
+            name=name,
+            version=version,
+            sequence=sequence,
+            package_id=package_id,
+            installed=installed,
+            approved=approved,
+            committed=committing
+        ))
+
+    # Notify Ansible of the exception.
+    except Exception as e:
+        module.fail_json(msg=to_native(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,18 +7,18 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import base64
-import hashlib
-import json
 import tarfile
 
 from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params
 
+from ..module_utils.chaincode_utils import get_chaincode_deployment_spec_id, get_package_id
+from ..module_utils.concurrency_utils import run_concurrently
+from ..module_utils.health_utils import get_last_error
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json
-from ..module_utils.utils import (get_console, get_identity_by_module,
-                                  get_peer_by_module, resolve_identity)
+from ..module_utils.utils import (ComponentListing, get_console,
+                                  get_identity_by_module, get_peer_by_module,
+                                  resolve_identity)
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -30,6 +30,9 @@ module: installed_chaincode
 short_description: Manage a chaincode installed on a Hyperledger Fabric peer
 description:
     - Install a chaincode on a Hyperledger Fabric peer.
+    - When using the chaincode lifecycle in Hyperledger Fabric v2.x, the chaincode can be installed on
+      many peers at the same time by specifying I(peers) instead of I(peer). The package ID is computed
+      once, and the chaincode is only installed on the peers that do not already have it installed.
     - This module works with the IBM Support for Hyperledger Fabric software or the Hyperledger Fabric
       Open Source Stack running in a Red Hat OpenShift or Kubernetes cluster.
 author: Simon Stone (@sstone1)
@@ -81,8 +84,25 @@ options:
               with the Fabric operations console.
             - You can also pass a dict, which must match the result format of one of the
               M(peer_info) or M(peer) modules.
+            - You must specify one of I(peer) or I(peers).
         type: raw
-        required: true
+    peers:
+        description:
+            - The peers to use to manage the installed chaincode.
+            - You can pass strings, which are the display names of peers registered
+              with the Fabric operations console.
+            - You can also pass dicts, which must match the result format of one of the
+              M(peer_info) or M(peer) modules.
+            - All of the peers must belong to the organization specified by I(msp_id).
+            - Only supported when using the chaincode lifecycle in Hyperledger Fabric v2.x.
+        type: list
+        elements: raw
+    concurrency:
+        description:
+            - The maximum number of peers to manage the installed chaincode on at the same time.
+            - Only used when I(peers) is specified.
+        type: int
+        default: 5
     identity:
         description:
             - The identity to use when interacting with the peer.
@@ -174,6 +194,20 @@ EXAMPLES = '''
     msp_id: Org1MSP
     path: fabcar@1.0.0.tgz
 
+- name: Install the chaincode on many peers using Hyperledger Fabric v2.x lifecycle
+  hyperledger.fabric_ansible_collection.installed_chaincode:
+    state: present
+    api_endpoint: https://console.example.org:32000
+    api_authtype: basic
+    api_key: xxxxxxxx
+    api_secret: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+    peers:
+      - Org1 Peer 1
+      - Org1 Peer 2
+    identity: Org1 Admin.json
+    msp_id: Org1MSP
+    path: fabcar@1.0.0.tgz
+
 - name: Ensure the chaincode is not installed on the peer using Hyperledger Fabric v1.4 lifecycle
   hyperledger.fabric_ansible_collection.installed_chaincode:
     state: absent
@@ -238,6 +272,28 @@ installed_chaincode:
             type: str
             sample: fabcar-1.0.0:5891b5b522d5df086d0ff0b110fbd9d21bb4fc7163af34d08286a2e846f6be03
             returned: when using the chaincode lifecycle in Hyperledger Fabric v2.x
+peers:
+    description:
+        - The result for each peer.
+    type: list
+    elements: dict
+    returned: when I(peers) is specified
+    contains:
+        name:
+            description:
+                - The name of the peer.
+            type: str
+            sample: Org1 Peer 1
+        changed:
+            description:
+                - True if the chaincode was installed on the peer, false otherwise.
+            type: bool
+            sample: true
+        error:
+            description:
+                - The error, if the installed chaincode could not be managed on the peer.
+            type: str
+            sample: cannot remove installed chaincode fabcar-1.0.0:5891b5b5 from peer
 '''
 
 
@@ -251,18 +307,10 @@ def do_old_lifecycle(module, console, peer, identity, msp_id, hsm):
 
     # If the path is provided, name and version won't be, so we need to extract them from the package.
     if path is not None:
-        with open(path, 'rb') as file:
-            cds = proto_to_json('protos.ChaincodeDeploymentSpec', file.read())
-        name = cds['chaincode_spec']['chaincode_id']['name']
-        version = cds['chaincode_spec']['chaincode_id']['version']
-        code_package = base64.b64decode(cds['code_package'])
-        code_package_hash = hashlib.sha256(code_package).digest()
-        hasher = hashlib.sha256(name.encode('utf-8'))
-        hasher.update(version.encode('utf-8'))
-        metadata_hash = hasher.digest()
-        hasher = hashlib.sha256(code_package_hash)
-        hasher.update(metadata_hash)
-        id = hasher.hexdigest()
+        cds = get_chaincode_deployment_spec_id(path)
+        name = cds['name']
+        version = cds['version']
+        id = cds['id']
 
     # Determine the chaincodes installed on the peer.
     with peer.connect(module, identity, msp_id, hsm) as peer_connection:
@@ -302,7 +350,7 @@ def do_old_lifecycle(module, console, peer, identity, msp_id, hsm):
         return module.exit_json(changed=True, installed_chaincode=dict(name=name, version=version, id=id))
 
 
-def do_new_lifecycle(module, console, peer, identity, msp_id, hsm):
+def do_new_lifecycle(module, console, peers, identity, msp_id, hsm):
 
     # Ensure we have the Fabric v2.x binaries available.
     module.check_for_missing_bins(min_fabric_version='2.1.1')
@@ -310,50 +358,68 @@ def do_new_lifecycle(module, console, peer, identity, msp_id, hsm):
     # Extract the chaincode information.
     path = module.params['path']
     package_id = module.params['package_id']
+    label = None
 
     # If the path is provided, name and version won't be, so we need to extract them from the package.
+    # This is only done once, no matter how many peers we are installing the chaincode on.
     if path is not None:
-        with tarfile.open(path, 'r') as tar:
-            metadata_file = tar.extractfile('metadata.json')
-            metadata = json.load(metadata_file)
-        label = metadata['label']
-        with open(path, 'rb') as f:
-            hash = hashlib.sha256(f.read()).hexdigest()
-        package_id = f'{label}:{hash}'
-
-    # Determine the chaincodes installed on the peer.
-    with peer.connect(module, identity, msp_id, hsm) as peer_connection:
-        installed_chaincodes = peer_connection.list_installed_chaincodes_newlc()
+        package = get_package_id(path)
+        label = package['label']
+        package_id = package['package_id']
 
-    # Find a matching chaincode, if one exists.
-    installed_chaincode = next((installed_chaincode for installed_chaincode in installed_chaincodes if installed_chaincode['package_id'] == package_id), None)
-    chaincode_installed = installed_chaincode is not None
-
-    # Handle the chaincode appropriately based on state.
+    # Determine the chaincodes installed on each peer and, if required, install the
+    # chaincode using the same connection. All of the peers are handled at the same time.
     state = module.params['state']
-    if state == 'absent' and chaincode_installed:
-
-        # The chaincode should not be installed, but it is.
-        # We can't remove it, so throw an exception.
-        raise Exception(f'cannot remove installed chaincode {package_id} from peer')
-
-    elif state == 'absent' and not chaincode_installed:
-
-        # The chaincode should not be installed and isn't.
-        return module.exit_json(changed=False)
-
-    elif state == 'present' and chaincode_installed:
-
-        # The chaincode should be installed and is.
-        label = installed_chaincode['label']
-        return module.exit_json(changed=False, installed_chaincode=dict(package_id=package_id, label=label))
 
+    def handle_peer(peer):
+        with peer.connect(module, identity, msp_id, hsm) as peer_connection:
+            installed_chaincodes = peer_connection.list_installed_chaincodes_newlc()
+
+            # Find a matching chaincode, if one exists.
+            installed_chaincode = next((installed_chaincode for installed_chaincode in installed_chaincodes if installed_chaincode['package_id'] == package_id), None)
+            chaincode_installed = installed_chaincode is not None
+
+            # Handle the chaincode appropriately based on state.
+            if state == 'absent' and chaincode_installed:
+                # The chaincode should not be installed, but it is.
+                # We can't remove it, so throw an exception.
+                raise Exception(f'cannot remove installed chaincode {package_id} from peer')
+            elif state == 'absent' and not chaincode_installed:
+                # The chaincode should not be installed and isn't.
+                return (False, None)
+            elif state == 'present' and chaincode_installed:
+                # The chaincode should be installed and is.
+                return (False, installed_chaincode['label'])
+            elif not module.check_mode:
+                # Install the chaincode.
+                peer_connection.install_chaincode_newlc(path)
+            return (True, label)
+    results = list()
+    for peer, (result, e) in zip(peers, run_concurrently(handle_peer, peers, module.params['concurrency'])):
+        (changed, installed_label) = result if e is None else (False, None)
+        label = label or installed_label
+        results.append(dict(name=peer.name, changed=changed, error=str(e) if e is not None else None))
+    changed = any([result['changed'] for result in results])
+    if state == 'present':
+        installed_chaincode = dict(package_id=package_id, label=label)
     else:
+        installed_chaincode = None
 
-        # Install the chaincode.
-        with peer.connect(module, identity, msp_id, hsm) as peer_connection:
-            peer_connection.install_chaincode_newlc(path)
-        return module.exit_json(changed=True, installed_chaincode=dict(package_id=package_id, label=label))
+    # If only one peer was specified, report the error as before.
+    if module.params['peer'] is not None:
+        if results[0]['error'] is not None:
+            raise Exception(results[0]['error'])
+        elif installed_chaincode is None:
+            return module.exit_json(changed=changed)
+        return module.exit_json(changed=changed, installed_chaincode=installed_chaincode)
+
+    # Otherwise, report the result for each peer.
+    failed = [result['name'] for result in results if result['error'] is not None]
+    if failed:
+        return module.fail_json(msg=f'Failed to manage installed chaincode {package_id} on peers: {", ".join(failed)}: {get_last_error(results)}', changed=changed, peers=results)
+    elif installed_chaincode is None:
+        return module.exit_json(changed=changed, peers=results)
+    return module.exit_json(changed=changed, installed_chaincode=installed_chaincode, peers=results)
 
 
 def main():
@@ -367,7 +433,9 @@ def main():
         api_secret=dict(type='str', no_log=True),
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
-        peer=dict(type='raw', required=True),
+        peer=dict(type='raw'),
+        peers=dict(type='list', elements='raw'),
+        concurrency=dict(type='int', default=5),
         identity=dict(type='raw', required=True),
         msp_id=dict(type='str', required=True),
         hsm=dict(type='dict', options=dict(
@@ -389,10 +457,13 @@ def main():
     actual_params = _load_params()
     if actual_params.get('state', 'present') == 'absent':
         required_one_of = [
-            ['name', 'package_id']
+            ['name', 'package_id'],
+            ['peer', 'peers']
         ]
     else:
-        required_one_of = []
+        required_one_of = [
+            ['peer', 'peers']
+        ]
     required_together = [
         ['name', 'version']
     ]
@@ -400,7 +471,8 @@ def main():
         ['name', 'path'],
         ['version', 'path'],
         ['package_id', 'path'],
-        ['package_id', 'name']
+        ['package_id', 'name'],
+        ['peer', 'peers']
     ]
     module = BlockchainModule(
         argument_spec=argument_spec,
@@ -420,8 +492,15 @@ def main():
         # Log in to the console.
         console = get_console(module)
 
-        # Get the peer, identity, and MSP ID.
-        peer = get_peer_by_module(console, module)
+        # Get the peers, identity, and MSP ID.
+        if module.params['peer'] is not None:
+            peers = [get_peer_by_module(console, module)]
+        else:
+            # Look up all of the peers specified by name using a single request.
+            listing = ComponentListing(module, console)
+            peers = [listing.get_peer(peer) for peer in module.params['peers']]
+            if not peers:
+                raise Exception('No peers specified')
         identity = get_identity_by_module(module)
         msp_id = module.params['msp_id']
         hsm = module.params['hsm']
@@ -437,9 +516,11 @@ def main():
 
         # Switch to new lifecycle code if requird.
         if new_lifecycle:
-            return do_new_lifecycle(module, console, peer, identity, msp_id, hsm)
+            return do_new_lifecycle(module, console, peers, identity, msp_id, hsm)
+        elif module.params['peers'] is not None:
+            raise Exception('peers is only supported when using the chaincode lifecycle in Hyperledger Fabric v2.x')
         else:
-            return do_old_lifecycle(module, console, peer, identity, msp_id, hsm)
+            return do_old_lifecycle(module, console, peers[0], identity, msp_id, hsm)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -242,6 +242,13 @@ options:
             - The timeout, in seconds, to wait until the ordering service is available.
         type: int
         default: 60
+    wait_quorum:
+        description:
+            - The number of ordering service nodes that must be available before the ordering service is considered available.
+            - All of the ordering service nodes are checked at the same time, and the wait stops as soon as this number of ordering service nodes are available.
+            - For example, specify C(3) to wait for a majority of the consenters in a five node ordering service.
+        type: int
+        default: 1
 notes: []
 requirements: []
 '''
@@ -410,6 +417,43 @@ ordering_service:
                   are not ready for use.
             type: boolean
             sample: true
+readiness:
+    description:
+        - The readiness timeline, with an entry for each ordering service node that was waited for.
+    type: list
+    elements: dict
+    returned: when I(state) is C(present)
+    contains:
+        name:
+            description:
+                - The name of the ordering service node.
+            type: str
+            sample: Ordering Service_1
+        ready:
+            description:
+                - True if the ordering service node was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the ordering service node was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the ordering service node was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the ordering service node.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the ordering service node was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -542,7 +586,8 @@ def main():
         )),
         zones=dict(type='list', elements='str', aliases=['zone']),
         version=dict(type='str'),
-        wait_timeout=dict(type='int', default=60)
+        wait_timeout=dict(type='int', default=60),
+        wait_quorum=dict(type='int', default=1)
     )
     required_if = [
         ('api_authtype', 'basic', ['api_secret']),
@@ -732,10 +777,10 @@ def main():
         # Wait for the ordering service to start.
         ordering_service = OrderingService.from_json(console.extract_ordering_service_info(ordering_service))
         timeout = module.params['wait_timeout']
-        ordering_service.wait_for(timeout)
+        readiness = ordering_service.wait_for(timeout, quorum=module.params['wait_quorum'])
 
         # Return the ordering service.
-        module.exit_json(changed=changed, ordering_service=ordering_service.to_json())
+        module.exit_json(changed=changed, ordering_service=ordering_service.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -56,6 +56,13 @@ options:
             - The timeout, in seconds, to wait until the ordering service is available.
         type: int
         default: 60
+    wait_quorum:
+        description:
+            - The number of ordering service nodes that must be available before the ordering service is considered available.
+            - All of the ordering service nodes are checked at the same time, and the wait stops as soon as this number of ordering service nodes are available.
+            - For example, specify C(3) to wait for a majority of the consenters in a five node ordering service.
+        type: int
+        default: 1
 notes: []
 requirements: []
 '''
@@ -166,6 +173,43 @@ ordering_service:
                   are not ready for use.
             type: boolean
             sample: true
+readiness:
+    description:
+        - The readiness timeline, with an entry for each ordering service node that was waited for.
+    type: list
+    elements: dict
+    returned: if ordering service exists
+    contains:
+        name:
+            description:
+                - The name of the ordering service node.
+            type: str
+            sample: Ordering Service_1
+        ready:
+            description:
+                - True if the ordering service node was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the ordering service node was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the ordering service node was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the ordering service node.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the ordering service node was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -180,7 +224,8 @@ def main():
         api_timeout=dict(type='int', default=60),
         api_token_endpoint=dict(type='str', default='https://iam.cloud.ibm.com/identity/token'),
         name=dict(type='str', required=True),
-        wait_timeout=dict(type='int', default=60)
+        wait_timeout=dict(type='int', default=60),
+        wait_quorum=dict(type='int', default=1)
     )
     required_if = [
         ('api_authtype', 'basic', ['api_secret'])
@@ -202,10 +247,10 @@ def main():
 
         # Wait for the peer to start.
         wait_timeout = module.params['wait_timeout']
-        ordering_service.wait_for(wait_timeout)
+        readiness = ordering_service.wait_for(wait_timeout, quorum=module.params['wait_quorum'])
 
         # Return peer information.
-        module.exit_json(exists=True, ordering_service=ordering_service.to_json())
+        module.exit_json(exists=True, ordering_service=ordering_service.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -14,8 +14,8 @@ from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params
 
 from ..module_utils.cert_utils import normalize_whitespace
-from ..module_utils.dict_utils import (copy_dict, diff_dicts, equal_dicts,
-                                       merge_dicts)
+from ..module_utils.dict_utils import (changes_to_dict, copy_dict,
+                                       diff_paths, merge_dicts)
 from ..module_utils.module import BlockchainModule
 from ..module_utils.ordering_services import OrderingServiceNode
 from ..module_utils.utils import (get_certificate_authority_by_module,
@@ -493,6 +493,43 @@ ordering_service_node:
                   are not ready for use.
             type: boolean
             sample: true
+readiness:
+    description:
+        - The readiness timeline, with an entry for each ordering service node that was waited for.
+    type: list
+    elements: dict
+    returned: when I(state) is C(present)
+    contains:
+        name:
+            description:
+                - The name of the ordering service node.
+            type: str
+            sample: Ordering Service_1
+        ready:
+            description:
+                - True if the ordering service node was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the ordering service node was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the ordering service node was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the ordering service node.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the ordering service node was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -830,7 +867,8 @@ def main():
             # Check to see if any banned changes have been made.
             # HACK: zone is documented as a permitted change, but it has no effect.
             permitted_changes = ['resources', 'config_override', 'version', 'crypto']
-            diff = diff_dicts(ordering_service_node, new_ordering_service_node)
+            changes = diff_paths(ordering_service_node, new_ordering_service_node)
+            diff = changes_to_dict(changes)
             for change in diff:
                 if change not in permitted_changes:
                     raise Exception(f'{change} cannot be changed from {ordering_service_node[change]} to {new_ordering_service_node[change]} for existing ordering service node')
@@ -840,7 +878,7 @@ def main():
                 diff['resources'] = new_ordering_service_node['resources']
 
             # If the ordering service node has changed, apply the changes.
-            ordering_service_node_changed = not equal_dicts(ordering_service_node, new_ordering_service_node)
+            ordering_service_node_changed = bool(changes)
             if ordering_service_node_changed:
 
                 # Log the differences.
@@ -848,7 +886,8 @@ def main():
                     'msg': 'differences detected, updating ordering service node',
                     'ordering_service_node': ordering_service_node,
                     'new_ordering_service_node': new_ordering_service_node,
-                    'diff': diff
+                    'diff': diff,
+                    'changes': [change['path'] for change in changes]
                 })
 
                 # Remove anything that hasn't changed from the updates.
@@ -907,12 +946,13 @@ def main():
 
         # Wait for the ordering service node to start, but only if it has been added to the system channel.
         ordering_service_node = OrderingServiceNode.from_json(console.extract_ordering_service_node_info(ordering_service_node))
+        readiness = list()
         if ordering_service_node.consenter_proposal_fin:
             timeout = module.params['wait_timeout']
-            ordering_service_node.wait_for(timeout)
+            readiness = ordering_service_node.wait_for(timeout)
 
         # Return the ordering service node.
-        module.exit_json(changed=changed, ordering_service_node=ordering_service_node.to_json())
+        module.exit_json(changed=changed, ordering_service_node=ordering_service_node.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -165,6 +165,43 @@ ordering_service_node:
                   are not ready for use.
             type: boolean
             sample: true
+readiness:
+    description:
+        - The readiness timeline, with an entry for each ordering service node that was waited for.
+    type: list
+    elements: dict
+    returned: if ordering service node exists
+    contains:
+        name:
+            description:
+                - The name of the ordering service node.
+            type: str
+            sample: Ordering Service_1
+        ready:
+            description:
+                - True if the ordering service node was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the ordering service node was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the ordering service node was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the ordering service node.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the ordering service node was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -201,10 +238,10 @@ def main():
 
         # Wait for the ordering service node to start.
         wait_timeout = module.params['wait_timeout']
-        ordering_service_node.wait_for(wait_timeout)
+        readiness = ordering_service_node.wait_for(wait_timeout)
 
         # Return peer information.
-        module.exit_json(exists=True, ordering_service_node=ordering_service_node.to_json())
+        module.exit_json(exists=True, ordering_service_node=ordering_service_node.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
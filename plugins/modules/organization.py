@@ -9,7 +9,7 @@ __metaclass__ = type
 
 from ansible.module_utils._text import to_native
 
-from ..module_utils.cert_utils import equal_crls, split_ca_chain
+from ..module_utils.cert_utils import diff_crls, equal_crls, split_ca_chain
 from ..module_utils.dict_utils import (copy_dict, diff_dicts, equal_dicts,
                                        merge_dicts)
 from ..module_utils.module import BlockchainModule
@@ -634,6 +634,13 @@ def main():
             if 'revocation_list' in organization and 'revocation_list' in new_organization:
                 if equal_crls(organization['revocation_list'], new_organization['revocation_list']):
                     new_organization['revocation_list'] = organization['revocation_list']
+                else:
+                    (added_serials, removed_serials) = diff_crls(organization['revocation_list'], new_organization['revocation_list'])
+                    module.json_log({
+                        'msg': 'revocation list changed',
+                        'added_serials': [format(serial, 'x') for serial in sorted(added_serials)],
+                        'removed_serials': [format(serial, 'x') for serial in sorted(removed_serials)]
+                    })
 
             # If the organization has changed, apply the changes.
             organization_changed = not equal_dicts(organization, new_organization)
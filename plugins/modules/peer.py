@@ -13,8 +13,8 @@ from ansible.module_utils._text import to_native
 from ansible.module_utils.basic import _load_params
 
 from ..module_utils.cert_utils import normalize_whitespace
-from ..module_utils.dict_utils import (copy_dict, diff_dicts, equal_dicts,
-                                       merge_dicts)
+from ..module_utils.dict_utils import (changes_to_dict, copy_dict,
+                                       diff_paths, merge_dicts)
 from ..module_utils.module import BlockchainModule
 from ..module_utils.peers import Peer
 from ..module_utils.utils import (get_certificate_authority_by_module,
@@ -569,6 +569,43 @@ peer:
                 - The location of the peer.
             type: str
             sample: ibmcloud
+readiness:
+    description:
+        - The readiness timeline, with an entry for each peer that was waited for.
+    type: list
+    elements: dict
+    returned: when I(state) is C(present)
+    contains:
+        name:
+            description:
+                - The name of the peer.
+            type: str
+            sample: Org1 Peer
+        ready:
+            description:
+                - True if the peer was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the peer was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the peer was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the peer.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the peer was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -901,7 +938,8 @@ def main():
             # Check to see if any banned changes have been made.
             # HACK: zone is documented as a permitted change, but it has no effect.
             permitted_changes = ['resources', 'config_override', 'version', 'crypto']
-            diff = diff_dicts(peer, new_peer)
+            changes = diff_paths(peer, new_peer)
+            diff = changes_to_dict(changes)
             for change in diff:
                 if change not in permitted_changes:
                     raise Exception(f'{change} cannot be changed from {peer[change]} to {new_peer[change]} for existing peer')
@@ -911,13 +949,14 @@ def main():
                 diff['resources'] = new_peer['resources']
 
             # If the peer has changed, apply the changes.
-            peer_changed = not equal_dicts(peer, new_peer)
+            peer_changed = bool(changes)
             if peer_changed:
 
                 # Log the differences.
                 module.json_log({
                     'msg': 'differences detected, updating peer',
-                    'diff': diff
+                    'diff': diff,
+                    'changes': [change['path'] for change in changes]
                 })
 
                 ignore_warnings = module.params['ignore_warnings']
@@ -956,10 +995,10 @@ def main():
         # Wait for the peer to start.
         peer = Peer.from_json(console.extract_peer_info(peer))
         timeout = module.params['wait_timeout']
-        peer.wait_for(timeout)
+        readiness = peer.wait_for(timeout)
 
         # Return the peer.
-        module.exit_json(changed=changed, peer=peer.to_json())
+        module.exit_json(changed=changed, peer=peer.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
@@ -10,7 +10,7 @@ __metaclass__ = type
 from ansible.module_utils._text import to_native
 
 from ..module_utils.module import BlockchainModule
-from ..module_utils.proto_utils import proto_to_json
+from ..module_utils.proto_utils import get_block_info
 from ..module_utils.utils import (get_console, get_identity_by_module,
                                   get_peer_by_module, resolve_identity)
 
@@ -215,8 +215,7 @@ def main():
             # Load the block to determine what channel it is for.
             if not name:
                 with open(path, 'rb') as file:
-                    block_json = proto_to_json('common.Block', file.read())
-                name = block_json['data']['data'][0]['payload']['header']['channel_header']['channel_id']
+                    name = get_block_info(file.read())['channel_id']
 
             # Determine if the channel exists.
             channel_exists = name in channels
@@ -133,6 +133,43 @@ peer:
                 - The location of the peer.
             type: str
             sample: ibmcloud
+readiness:
+    description:
+        - The readiness timeline, with an entry for each peer that was waited for.
+    type: list
+    elements: dict
+    returned: if peer exists
+    contains:
+        name:
+            description:
+                - The name of the peer.
+            type: str
+            sample: Org1 Peer
+        ready:
+            description:
+                - True if the peer was ready within the timeout, false otherwise.
+            type: bool
+            sample: true
+        skipped:
+            description:
+                - True if the peer was not waited for, false otherwise.
+            type: bool
+            sample: false
+        elapsed:
+            description:
+                - The time, in seconds, from the start of the wait until the peer was ready.
+            type: float
+            sample: 2.5
+        attempts:
+            description:
+                - The number of health checks made against the peer.
+            type: int
+            sample: 2
+        error:
+            description:
+                - The error from the last failed health check, if the peer was not ready.
+            type: str
+            sample: <urlopen error [Errno 111] Connection refused>
 '''
 
 
@@ -169,10 +206,10 @@ def main():
 
         # Wait for the peer to start.
         wait_timeout = module.params['wait_timeout']
-        peer.wait_for(wait_timeout)
+        readiness = peer.wait_for(wait_timeout)
 
         # Return peer information.
-        module.exit_json(exists=True, peer=peer.to_json())
+        module.exit_json(exists=True, peer=peer.to_json(), readiness=readiness)
 
     # Notify Ansible of the exception.
     except Exception as e:
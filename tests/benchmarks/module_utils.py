@@ -0,0 +1,168 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Micro-benchmarks for the caches and fast paths in module_utils, each compared against
+# the approach that it replaced. Run them from the directory containing the
+# ansible_collections directory, optionally passing the names of the benchmarks to run:
+#
+#   python -m ansible_collections.hyperledger.fabric_ansible_collection.tests.benchmarks.module_utils
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.cert_utils import (
+    cert_cache, normalize_whitespace, split_ca_chain)
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.dict_utils import copy_dict, equal_dicts
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.enrolled_identities import EnrolledIdentity
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.file_utils import get_ram_temp_dir
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.msp_utils import (
+    acquire_msp_path, convert_identity_to_msp_path, release_msp_path)
+from ansible_collections.hyperledger.fabric_ansible_collection.tests.unit.plugins.module_utils.test_cert_utils import (
+    create_cert, to_base64)
+
+BENCHMARKS = dict()
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__[len('bench_'):]] = func
+    return func
+
+
+def measure(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - started
+
+
+@benchmark
+def bench_certs(iterations):
+
+    # Split a chain of three certificates and normalize each of them, parsing every
+    # certificate every time (as before the certificate cache), and then with the cache.
+    root = create_cert('root')
+    intermediate = create_cert('intermediate', root)
+    leaf = create_cert('leaf', intermediate, False)
+    chain = to_base64(leaf[0], intermediate[0], root[0])
+    certs = [to_base64(cert) for (cert, _) in [leaf, intermediate, root]]
+    operations = [lambda: split_ca_chain(chain)] + [lambda cert=cert: normalize_whitespace(cert) for cert in certs]
+
+    def uncached():
+        for operation in operations:
+            cert_cache.clear()
+            operation()
+
+    def cached():
+        for operation in operations:
+            operation()
+    cert_cache.clear()
+    return [('uncached', measure(uncached, iterations)), ('cached', measure(cached, iterations))]
+
+
+@benchmark
+def bench_msp(iterations):
+
+    # Set up and tear down an MSP directory for a connection: in the default temporary
+    # directory (as before), in a RAM-backed directory if there is one, and when an
+    # identical identity already has an MSP directory.
+    root = create_cert('root')
+    identity = EnrolledIdentity('admin', to_base64(root[0]).encode('utf-8'), b'key', to_base64(root[0]).encode('utf-8'), False)
+
+    def setup(dir):
+        shutil.rmtree(convert_identity_to_msp_path(identity, tempfile.mkdtemp(prefix='msp-', dir=dir)))
+
+    def shared():
+        release_msp_path(acquire_msp_path(identity))
+    results = [('temp', measure(lambda: setup(None), iterations))]
+    ram_temp_dir = get_ram_temp_dir()
+    if ram_temp_dir is not None:
+        results.append(('ram', measure(lambda: setup(ram_temp_dir), iterations)))
+    msp_path = acquire_msp_path(identity)
+    try:
+        results.append(('shared', measure(shared, iterations)))
+    finally:
+        release_msp_path(msp_path)
+    return results
+
+
+def channel_config(count):
+
+    # Build a decoded channel config with the given number of organizations, each with
+    # its own CA and TLS CA, an admin certificate, node OUs and an anchor peer.
+    organizations = dict()
+    for index in range(count):
+        msp_id = f'Org{index}MSP'
+        ca = create_cert(f'ca.org{index}')
+        root = to_base64(ca[0])
+        tls_root = to_base64(create_cert(f'tlsca.org{index}')[0])
+        admin = to_base64(create_cert(f'admin.org{index}', ca, False)[0])
+        node_ous = {f'{role}_ou_identifier': dict(certificate=root, organizational_unit_identifier=role) for role in ['admin', 'client', 'orderer', 'peer']}
+        organizations[msp_id] = dict(
+            mod_policy='Admins',
+            policies={name: dict(mod_policy='Admins', policy=dict(type=1, value=dict(rule=dict(n_out_of=dict(n=1, rules=[dict(signed_by=0)])), identities=[dict(principal=dict(msp_identifier=msp_id, role='ADMIN'), principal_classification='ROLE')]))) for name in ['Admins', 'Endorsement', 'Readers', 'Writers']},
+            values=dict(
+                AnchorPeers=dict(mod_policy='Admins', value=dict(anchor_peers=[dict(host=f'peer0.org{index}.example.org', port=7051)]), version='0'),
+                MSP=dict(mod_policy='Admins', value=dict(config=dict(name=msp_id, root_certs=[root], tls_root_certs=[tls_root], admins=[admin], fabric_node_ous=dict(enable=True, **node_ous), crypto_config=dict(identity_identifier_hash_function='SHA256', signature_hash_family='SHA2'))), version='0')
+            ),
+            version='0'
+        )
+    return dict(channel_group=dict(groups=dict(Application=dict(groups=organizations, mod_policy='Admins', version='1')), mod_policy='Admins', version='0'), sequence='3')
+
+
+def compare_dicts(config, iterations):
+
+    # Copy a decoded channel config, and compare it to an identical config and to one with
+    # a different sequence, using a JSON round trip and sorted JSON strings (as before), and
+    # then structurally.
+    identical = json.loads(json.dumps(config))
+    different = dict(identical, sequence='4')
+
+    def json_equal(other):
+        return json.dumps(config, sort_keys=True) == json.dumps(other, sort_keys=True)
+    return [
+        ('json copy', measure(lambda: json.loads(json.dumps(config)), iterations)),
+        ('copy', measure(lambda: copy_dict(config), iterations)),
+        ('json equal', measure(lambda: json_equal(identical), iterations)),
+        ('equal', measure(lambda: equal_dicts(config, identical), iterations)),
+        ('json differ', measure(lambda: json_equal(different), iterations)),
+        ('differ', measure(lambda: equal_dicts(config, different), iterations))
+    ]
+
+
+@benchmark
+def bench_dicts(iterations):
+
+    # A small channel config with 20 organizations.
+    return compare_dicts(channel_config(20), iterations)
+
+
+@benchmark
+def bench_large_dicts(iterations):
+
+    # A large channel config with 300 organizations, as seen on a long lived network; this
+    # runs a tenth of the iterations, as each one takes more than ten times as long.
+    return compare_dicts(channel_config(300), max(iterations // 10, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the module_utils micro-benchmarks.')
+    parser.add_argument('names', nargs='*', help=f'the benchmarks to run: {", ".join(BENCHMARKS)} (default all)')
+    parser.add_argument('--iterations', type=int, default=2000, help='the number of iterations of each benchmark')
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f'unknown benchmark {name}')
+    for name in args.names or BENCHMARKS:
+        for (label, elapsed) in BENCHMARKS[name](args.iterations):
+            print(f'{name:<12} {label:<12} {elapsed:8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
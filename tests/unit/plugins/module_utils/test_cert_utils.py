@@ -0,0 +1,198 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import base64
+import datetime
+
+import pytest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.x509.oid import NameOID
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.cert_utils import (
+    CertificateCache, cert_cache, crl_cache, diff_crls, equal_crls, get_cert_fingerprint, get_crl_index,
+    get_revoked_serials, hash_crl, load_crl, normalize_whitespace, split_ca_chain)
+
+
+def create_cert(name, issuer=None, ca=True):
+
+    # Create a certificate signed by the issuer (a (cert, key) tuple), or a self signed certificate.
+    key = ec.generate_private_key(ec.SECP256R1())
+    (issuer_cert, issuer_key) = issuer if issuer is not None else (None, key)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = x509.CertificateBuilder() \
+        .subject_name(subject) \
+        .issuer_name(issuer_cert.subject if issuer_cert is not None else subject) \
+        .public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()) \
+        .not_valid_before(now) \
+        .not_valid_after(now + datetime.timedelta(days=1)) \
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True) \
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False) \
+        .add_extension(x509.AuthorityKeyIdentifier.from_issuer_public_key(issuer_key.public_key()), critical=False)
+    return (builder.sign(issuer_key, hashes.SHA256()), key)
+
+
+def to_base64(*certs):
+    return base64.b64encode(b''.join([cert.public_bytes(Encoding.PEM) for cert in certs])).decode('utf-8')
+
+
+@pytest.fixture(scope='module')
+def chain():
+    root = create_cert('root')
+    intermediate = create_cert('intermediate', root)
+    leaf = create_cert('leaf', intermediate, False)
+    return (root[0], intermediate[0], leaf[0])
+
+
+@pytest.fixture(autouse=True)
+def clear_cert_cache():
+    cert_cache.clear()
+    yield
+    cert_cache.clear()
+
+
+def test_split_ca_chain(chain):
+    (root, intermediate, _) = chain
+    (root_certs, intermediate_certs) = split_ca_chain(to_base64(intermediate, root))
+    assert root_certs == [to_base64(root)]
+    assert intermediate_certs == [to_base64(intermediate)]
+
+
+def test_normalize_whitespace(chain):
+    (_, _, leaf) = chain
+    pem = leaf.public_bytes(Encoding.PEM).decode('utf-8')
+    reformatted = '\n' + pem.replace('\n', '\r\n')
+    assert normalize_whitespace(base64.b64encode(reformatted.encode('utf-8')).decode('utf-8')) == to_base64(leaf)
+
+
+def test_fingerprint_ignores_formatting(chain):
+    (_, _, leaf) = chain
+    pem = leaf.public_bytes(Encoding.PEM)
+    reformatted = pem.replace(b'\n', b'\r\n')
+    assert get_cert_fingerprint(base64.b64encode(pem)) == get_cert_fingerprint(base64.b64encode(reformatted))
+    assert get_cert_fingerprint(base64.b64encode(pem)) == leaf.fingerprint(hashes.SHA256()).hex()
+
+
+def test_cert_cache_parses_once(chain):
+    (root, intermediate, leaf) = chain
+    for _ in range(3):
+        split_ca_chain(to_base64(intermediate, root))
+        normalize_whitespace(to_base64(leaf))
+    assert cert_cache.misses == 3
+    assert cert_cache.hits == 6
+
+
+def test_cert_cache_evicts_least_recently_used(chain):
+    (root, intermediate, leaf) = chain
+    cache = CertificateCache(max_size=2)
+    (root_pem, intermediate_pem, leaf_pem) = [cert.public_bytes(Encoding.PEM) for cert in chain]
+    first = cache.get(root_pem)
+    cache.get(intermediate_pem)
+    assert cache.get(root_pem) is first
+    cache.get(leaf_pem)
+    assert len(cache.entries) == 2
+    assert cache.get(root_pem) is first
+    cache.get(intermediate_pem)
+    assert cache.misses == 4
+
+
+def create_crl(issuer, serials, crl_number=None):
+
+    # Create a base64 encoded PEM CRL revoking the serial numbers, signed by the issuer.
+    (issuer_cert, issuer_key) = issuer
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = x509.CertificateRevocationListBuilder() \
+        .issuer_name(issuer_cert.subject) \
+        .last_update(now) \
+        .next_update(now + datetime.timedelta(days=1))
+    for serial in serials:
+        revoked = x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(now).build()
+        builder = builder.add_revoked_certificate(revoked)
+    if crl_number is not None:
+        builder = builder.add_extension(x509.CRLNumber(crl_number), critical=False)
+    crl = builder.sign(issuer_key, hashes.SHA256())
+    return base64.b64encode(crl.public_bytes(Encoding.PEM)).decode('utf-8')
+
+
+@pytest.fixture(scope='module')
+def issuers():
+    return (create_cert('ca1'), create_cert('ca2'))
+
+
+@pytest.fixture(autouse=True)
+def clear_crl_cache():
+    crl_cache.clear()
+    yield
+    crl_cache.clear()
+
+
+@pytest.mark.parametrize('serials', [[], [1], [1, 127, 128, 255, 256, 2 ** 64, 2 ** 158], list(range(1, 5000))])
+def test_crl_index_matches_cryptography(issuers, serials):
+    crl = create_crl(issuers[0], serials, crl_number=42)
+    index = get_crl_index(crl)
+    parsed = load_crl(crl)
+    assert index.serials == {revoked.serial_number for revoked in parsed}
+    assert index.crl_number == 42
+    assert index.issuer == parsed.issuer.public_bytes()
+
+
+def test_crl_index_without_crl_number(issuers):
+    index = get_crl_index(create_crl(issuers[0], [5, 6]))
+    assert index.crl_number is None
+    assert index.serials == {5, 6}
+
+
+def test_crl_index_invalid():
+    with pytest.raises(Exception, match='expected a PEM encoded X509 CRL'):
+        get_crl_index(base64.b64encode(b'not a crl').decode('utf-8'))
+
+
+def test_crl_index_cached(issuers):
+    crl = create_crl(issuers[0], [1, 2])
+    assert get_crl_index(crl) is get_crl_index(crl)
+
+
+def test_equal_crls(issuers):
+    (ca1, ca2) = issuers
+    crl1 = create_crl(ca1, [1, 2, 3])
+    assert equal_crls([crl1], [crl1])
+    assert equal_crls([crl1], [create_crl(ca1, [3, 2, 1])])
+    assert not equal_crls([crl1], [create_crl(ca1, [1, 2])])
+    assert not equal_crls([crl1], [crl1, crl1])
+    assert not equal_crls([crl1], [create_crl(ca2, [4])])
+
+
+def test_equal_crls_same_crl_number(issuers):
+
+    # The same issuer and CRL number means the same CRL, without comparing the serials.
+    (ca1, ca2) = issuers
+    crl = create_crl(ca1, [1, 2], crl_number=7)
+    assert equal_crls([crl], [create_crl(ca1, [1, 2], crl_number=7)])
+    assert get_crl_index(crl)._serials is None
+    assert not equal_crls([crl], [create_crl(ca2, [3], crl_number=7)])
+
+
+def test_diff_crls(issuers):
+    (ca1, ca2) = issuers
+    crl1 = [create_crl(ca1, [1, 2, 3]), create_crl(ca2, [10])]
+    crl2 = [create_crl(ca1, [2, 3, 4, 5])]
+    assert get_revoked_serials(crl1) == {1, 2, 3, 10}
+    assert diff_crls(crl1, crl2) == ({4, 5}, {1, 10})
+    assert diff_crls(crl2, crl2) == (set(), set())
+
+
+def test_hash_crl(issuers):
+    (ca1, _) = issuers
+    crl = create_crl(ca1, [1, 2, 3])
+    assert hash_crl([crl]) == hash_crl([create_crl(ca1, [3, 1, 2])])
+    assert hash_crl([crl]) != hash_crl([create_crl(ca1, [1, 2])])
+    assert hash_crl([crl]) != hash_crl([crl, crl])
@@ -0,0 +1,107 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import chaincode_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.chaincode_utils import (
+    PackageCache, compute_chaincode_deployment_spec_id, compute_package_id)
+
+
+def varint(value):
+    result = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def field(number, value):
+    return varint(number << 3 | 2) + varint(len(value)) + value
+
+
+def write_package(path, label, code):
+    with tarfile.open(path, 'w:gz') as tar:
+        for name, data in [('metadata.json', json.dumps(dict(type='golang', label=label)).encode('utf-8')), ('code.tar.gz', code)]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def test_compute_package_id(tmp_path):
+    path = str(tmp_path / 'fabcar.tgz')
+    write_package(path, 'fabcar_1', b'code')
+    with open(path, 'rb') as file:
+        expected = hashlib.sha256(file.read()).hexdigest()
+    assert compute_package_id(path) == dict(label='fabcar_1', package_id=f'fabcar_1:{expected}')
+
+
+def test_compute_chaincode_deployment_spec_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(chaincode_utils, 'HASH_CHUNK_SIZE', 3)
+    chaincode_id = field(1, b'github.com/fabcar') + field(2, b'fabcar') + field(3, b'1.0')
+    spec = varint(1 << 3) + varint(1) + field(2, chaincode_id)
+    code = b'some code package bytes'
+    path = tmp_path / 'fabcar.cds'
+    path.write_bytes(field(1, spec) + field(3, code))
+    metadata_hash = hashlib.sha256(b'fabcar1.0').digest()
+    expected = hashlib.sha256(hashlib.sha256(code).digest() + metadata_hash).hexdigest()
+    assert compute_chaincode_deployment_spec_id(str(path)) == dict(name='fabcar', version='1.0', id=expected)
+
+
+def test_package_cache_reuses_result(tmp_path):
+    path = tmp_path / 'package'
+    path.write_bytes(b'package')
+    cache = PackageCache(str(tmp_path / 'cache.json'))
+    calls = list()
+
+    def compute(path):
+        calls.append(path)
+        return dict(id=len(calls))
+    assert cache.get(str(path), 'package', compute) == dict(id=1)
+    assert cache.get(str(path), 'package', compute) == dict(id=1)
+    assert PackageCache(str(tmp_path / 'cache.json')).get(str(path), 'package', compute) == dict(id=1)
+    assert len(calls) == 1
+
+
+def test_package_cache_detects_rebuild_with_same_size_and_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(chaincode_utils, 'HASH_CHUNK_SIZE', 4)
+    path = tmp_path / 'package'
+    cache = PackageCache(str(tmp_path / 'cache.json'))
+    calls = list()
+
+    def compute(path):
+        calls.append(path)
+        return dict(id=len(calls))
+    path.write_bytes(b'0123456789abcdef')
+    stat = os.stat(path)
+    assert cache.get(str(path), 'package', compute) == dict(id=1)
+
+    # Change the last chunk, keeping the size and timestamps.
+    path.write_bytes(b'0123456789abcdeX')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(str(path), 'package', compute) == dict(id=2)
+
+
+def test_package_cache_ignores_untrusted_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    directory = tmp_path / f'fabric-ansible-collection-{os.getuid()}'
+    directory.mkdir()
+    directory.chmod(0o777)
+    path = tmp_path / 'package'
+    path.write_bytes(b'package')
+    key = json.dumps([str(path), 'package'] + chaincode_utils.fingerprint_file(str(path)))
+    (directory / 'package-ids.json').write_text(json.dumps({key: dict(id='poisoned')}))
+    assert PackageCache().get(str(path), 'package', lambda path: dict(id='computed')) == dict(id='computed')
+    assert 'computed' not in (directory / 'package-ids.json').read_text()
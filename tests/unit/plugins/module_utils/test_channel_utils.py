@@ -0,0 +1,370 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import base64
+import hashlib
+import json
+import os
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import channel_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.channel_utils import ConfigBlockCache
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.msp_utils import organization_to_msp
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.organizations import Organization
+
+from ansible_collections.hyperledger.fabric_ansible_collection.tests.unit.plugins.module_utils.test_proto_utils import block, envelope, field, v2_metadata
+
+CONFIG = field(1, 3) + field(2, b'channel group')
+CONFIG_BLOCK = block(7, envelope('mychannel', CONFIG), v2_metadata(7))
+DATA_BLOCK = block(9, envelope('mychannel'), v2_metadata(7))
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    decoded = list()
+
+    def proto_to_json(proto_type, proto_input):
+        decoded.append(proto_input)
+        return dict(channel_group=dict())
+    monkeypatch.setattr(channel_utils, 'proto_to_json', proto_to_json)
+    return decoded
+
+
+class Fetcher:
+
+    def __init__(self, newest, config=CONFIG_BLOCK):
+        self.newest = newest
+        self.config = config
+        self.targets = list()
+
+    def __call__(self, target, path):
+        self.targets.append(target)
+        with open(path, 'wb') as file:
+            file.write(self.newest if target == 'newest' else self.config)
+
+
+def test_config_block_cache(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    fetch = Fetcher(DATA_BLOCK)
+    result = cache.get('mychannel', ['peer'], fetch, decode=True)
+    assert result == dict(cached=False, number=7, config=CONFIG, config_json=dict(channel_group=dict()))
+    assert fetch.targets == ['newest', 'config']
+    assert decoded == [CONFIG]
+
+    # A new cache, like a new task, revalidates with the newest block only.
+    fetch = Fetcher(DATA_BLOCK)
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch, decode=True)
+    assert result == dict(cached=True, number=7, config=CONFIG, config_json=dict(channel_group=dict()))
+    assert fetch.targets == ['newest']
+    assert len(decoded) == 1
+
+
+def test_config_block_cache_newest_is_config_block(tmp_path, decoded):
+    fetch = Fetcher(CONFIG_BLOCK)
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch)
+    assert result == dict(cached=False, number=7, config=CONFIG, config_json=None)
+    assert fetch.targets == ['newest']
+    assert decoded == []
+
+
+def test_config_block_cache_genesis_block_is_config_block(tmp_path, decoded):
+    genesis_block = block(0, envelope('mychannel', CONFIG), field(1, b''))
+    fetch = Fetcher(genesis_block)
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch)
+    assert result == dict(cached=False, number=0, config=CONFIG, config_json=None)
+    assert fetch.targets == ['newest']
+
+
+def test_config_block_cache_new_data_block(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK), decode=True)
+
+    # The config block is fetched again to check that it has not changed, but is not decoded again.
+    fetch = Fetcher(block(10, envelope('mychannel'), v2_metadata(7)))
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch, decode=True)
+    assert result == dict(cached=True, number=7, config=CONFIG, config_json=dict(channel_group=dict()))
+    assert fetch.targets == ['newest', 'config']
+    assert len(decoded) == 1
+
+
+def test_config_block_cache_recreated_channel_config_block(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK))
+
+    # A recreated channel can have a different config block with the same number.
+    config = field(1, 3) + field(2, b'other channel group')
+    fetch = Fetcher(block(7, envelope('mychannel', config), v2_metadata(7)))
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch)
+    assert result == dict(cached=False, number=7, config=config, config_json=None)
+    assert fetch.targets == ['newest']
+
+
+def test_config_block_cache_recreated_channel_data_block(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK))
+
+    # A recreated channel can have a different config block and data block with the same numbers.
+    config = field(1, 3) + field(2, b'other channel group')
+    data_block = block(9, envelope('mychannel') + field(2, b'other signature'), v2_metadata(7))
+    fetch = Fetcher(data_block, block(7, envelope('mychannel', config), v2_metadata(7)))
+    result = ConfigBlockCache(str(tmp_path)).get('mychannel', ['peer'], fetch)
+    assert result == dict(cached=False, number=7, config=config, config_json=None)
+    assert fetch.targets == ['newest', 'config']
+
+
+def test_config_block_cache_new_config(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK))
+    config = field(1, 4) + field(2, b'new channel group')
+    fetch = Fetcher(block(10, envelope('mychannel', config), v2_metadata(10)))
+    result = cache.get('mychannel', ['peer'], fetch)
+    assert result['cached'] is False
+    assert result['number'] == 10
+    assert result['config'] == config
+
+
+def test_config_block_cache_invalidate(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer1'], Fetcher(DATA_BLOCK))
+    cache.get('mychannel', ['peer2'], Fetcher(DATA_BLOCK))
+    cache.get('otherchannel', ['peer1'], Fetcher(DATA_BLOCK))
+    cache.invalidate('mychannel')
+    assert len(os.listdir(tmp_path)) == 1
+    assert cache.get('mychannel', ['peer1'], Fetcher(DATA_BLOCK))['cached'] is False
+
+
+def test_config_block_cache_rejects_corrupt_entry(tmp_path, decoded):
+    cache = ConfigBlockCache(str(tmp_path))
+    cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK))
+    [name] = os.listdir(tmp_path)
+    with open(tmp_path / name, 'r') as file:
+        entry = json.load(file)
+    entry['config'] = 'cG9pc29uZWQ='
+    with open(tmp_path / name, 'w') as file:
+        json.dump(entry, file)
+    result = cache.get('mychannel', ['peer'], Fetcher(DATA_BLOCK))
+    assert result['cached'] is False
+    assert result['config'] == CONFIG
+
+
+def test_config_block_cache_ignores_untrusted_directory(tmp_path, monkeypatch, decoded):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    directory = tmp_path / f'fabric-ansible-collection-{os.getuid()}'
+    directory.mkdir(mode=0o755)
+    directory.chmod(0o755)
+    fetch = Fetcher(DATA_BLOCK)
+    ConfigBlockCache().get('mychannel', ['peer'], fetch)
+    ConfigBlockCache().get('mychannel', ['peer'], fetch)
+    assert fetch.targets == ['newest', 'config', 'newest', 'config']
+    assert not (directory / 'config-blocks').exists() or not os.listdir(directory / 'config-blocks')
+
+
+def test_config_block_cache_default_directory_is_private(tmp_path, monkeypatch, decoded):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    fetch = Fetcher(DATA_BLOCK)
+    ConfigBlockCache().get('mychannel', ['peer'], fetch)
+    assert ConfigBlockCache().get('mychannel', ['peer'], fetch)['cached'] is True
+    directory = tmp_path / f'fabric-ansible-collection-{os.getuid()}' / 'config-blocks'
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    monkeypatch.setattr(channel_utils, 'proto_to_json', lambda proto_type, proto_input: json.loads(proto_input))
+    monkeypatch.setattr(channel_utils, 'json_to_proto', lambda proto_type, json_input: json.dumps(json_input, sort_keys=True).encode('utf-8'))
+
+
+def test_config_session(tmp_path, encoded):
+    path = str(tmp_path / 'config.bin')
+    channel_utils.write_config(path, dict(version=1))
+    channel_utils.write_config(path, dict(version=2), session=True)
+    assert channel_utils.read_config(path) == dict(version=2)
+    with open(path, 'rb') as file:
+        assert json.loads(file.read()) == dict(version=1)
+    assert channel_utils.flush_config_session(path)
+    assert not os.path.exists(channel_utils.get_config_session_path(path))
+    with open(path, 'rb') as file:
+        assert json.loads(file.read()) == dict(version=2)
+
+
+def test_config_session_stale_after_same_bytes_rewritten(tmp_path, encoded):
+    path = tmp_path / 'config.bin'
+    path.write_bytes(b'{"version": 1}')
+    channel_utils.write_config(str(path), dict(version=2), session=True)
+    assert channel_utils.read_config(str(path)) == dict(version=2)
+
+    # Replace the file with the same bytes, as fetching the same config again would.
+    replacement = tmp_path / 'replacement.bin'
+    replacement.write_bytes(b'{"version": 1}')
+    os.replace(replacement, path)
+    assert channel_utils.read_config(str(path)) == dict(version=1)
+    assert not channel_utils.flush_config_session(str(path))
+    assert not os.path.exists(channel_utils.get_config_session_path(str(path)))
+
+
+def test_discard_config_session(tmp_path, encoded):
+    path = str(tmp_path / 'config.bin')
+    channel_utils.write_config(path, dict(version=1))
+    assert not channel_utils.discard_config_session(path)
+    channel_utils.write_config(path, dict(version=2), session=True)
+    assert channel_utils.discard_config_session(path)
+    assert channel_utils.read_config(path) == dict(version=1)
+
+
+def test_encode_config_does_not_change_file(tmp_path, encoded):
+    path = str(tmp_path / 'config.bin')
+    channel_utils.write_config(path, dict(version=1))
+    assert json.loads(channel_utils.encode_config(path)) == dict(version=1)
+    channel_utils.write_config(path, dict(version=2), session=True)
+    assert json.loads(channel_utils.encode_config(path)) == dict(version=2)
+    with open(path, 'rb') as file:
+        assert json.loads(file.read()) == dict(version=1)
+    assert os.path.exists(channel_utils.get_config_session_path(path))
+
+
+def test_read_config_update_keeps_signatures(tmp_path, encoded):
+    path = tmp_path / 'update.bin'
+    assert channel_utils.read_config_update(str(path), dict(payload=dict(data=dict(config_update=1)))) is None
+    signed = dict(payload=dict(data=dict(config_update=1, signatures=[dict(signature_header=dict(creator=dict(mspid='Org1MSP')))])))
+    path.write_text(json.dumps(signed))
+    assert channel_utils.read_config_update(str(path), dict(payload=dict(data=dict(config_update=1)))) == signed
+    assert channel_utils.read_config_update(str(path), dict(payload=dict(data=dict(config_update=2)))) is None
+    assert channel_utils.get_config_update_signers(signed) == {'Org1MSP'}
+
+
+def test_update_config_unchanged(tmp_path, encoded):
+    path = tmp_path / 'update.bin'
+    assert channel_utils.update_config('mychannel', 'original', dict(), str(path), True, False, 'config') == (False, None)
+
+    # An existing configuration update is reported, but only removed outside of check mode.
+    path.write_text('{}')
+    assert channel_utils.update_config('mychannel', 'original', dict(), str(path), True, True, 'config') == (True, None)
+    assert path.exists()
+    assert channel_utils.update_config('mychannel', 'original', dict(), str(path), True, False, 'config') == (True, None)
+    assert not path.exists()
+
+
+def test_update_config(tmp_path, monkeypatch, encoded):
+    original = str(tmp_path / 'original.bin')
+    channel_utils.write_config(original, dict(version=1))
+    channel_utils.write_config(original, dict(version=2), session=True)
+    computed = list()
+
+    def compute_config_update(name, original, updated):
+        with open(updated, 'rb') as file:
+            computed.append(json.loads(file.read()))
+        return dict(payload=dict(data=dict(config_update=len(computed))))
+    monkeypatch.setattr(channel_utils, 'compute_config_update', compute_config_update)
+
+    # Check mode does not compute the configuration update.
+    path = tmp_path / 'update.bin'
+    assert channel_utils.update_config('mychannel', original, dict(version=3), str(path), False, True, 'config') == (True, str(path))
+    assert computed == []
+    assert not path.exists()
+
+    # The config session is flushed before computing the configuration update.
+    assert channel_utils.update_config('mychannel', original, dict(version=3), str(path), False, False, 'config') == (True, str(path))
+    assert computed == [dict(version=3)]
+    assert channel_utils.read_config(original) == dict(version=2)
+    assert not os.path.exists(channel_utils.get_config_session_path(original))
+    assert json.loads(path.read_text()) == dict(payload=dict(data=dict(config_update=1)))
+
+
+def test_update_config_no_update(tmp_path, monkeypatch, encoded):
+    monkeypatch.setattr(channel_utils, 'compute_config_update', lambda name, original, updated: None)
+    original = str(tmp_path / 'original.bin')
+    channel_utils.write_config(original, dict(version=1))
+    with pytest.raises(Exception, match='The changes to the channel configuration did not result in a configuration update'):
+        channel_utils.update_config('mychannel', original, dict(version=2), str(tmp_path / 'update.bin'), False, False, 'channel configuration')
+
+
+def organization(msp_id, admins=None):
+    return Organization.from_json(dict(
+        name=msp_id,
+        msp_id=msp_id,
+        root_certs=[base64.b64encode(f'{msp_id} root'.encode('utf-8')).decode('utf-8')],
+        intermediate_certs=[],
+        admins=admins or [],
+        revocation_list=[],
+        tls_root_certs=[base64.b64encode(f'{msp_id} tls root'.encode('utf-8')).decode('utf-8')],
+        tls_intermediate_certs=[],
+        fabric_node_ous=dict(enable=True),
+        organizational_unit_identifiers=[],
+        host_url=None
+    ))
+
+
+def peer(api_url):
+    return type('Peer', (), dict(api_url=api_url))()
+
+
+def test_reconcile_members():
+    groups = dict(
+        Org1MSP=organization_to_msp(organization('Org1MSP'), True),
+        Org2MSP=organization_to_msp(organization('Org2MSP'), True),
+        Org3MSP=organization_to_msp(organization('Org3MSP'), True),
+        Org5MSP=organization_to_msp(organization('Org5MSP'), True)
+    )
+    admin = base64.b64encode(b'Org2MSP admin').decode('utf-8')
+    plan = channel_utils.reconcile_members(groups, [
+        dict(organization=organization('Org1MSP')),
+        dict(organization=organization('Org2MSP', [admin])),
+        dict(organization=organization('Org3MSP'), state='absent'),
+        dict(organization=organization('Org4MSP'), anchor_peers=[peer('grpcs://peer0.org4.example.org:7051')])
+    ], True)
+    assert plan['counts'] == dict(added=1, updated=1, removed=1, unchanged=1)
+    assert plan['added'] == [dict(msp_id='Org4MSP')]
+    assert plan['unchanged'] == [dict(msp_id='Org1MSP')]
+    assert plan['removed'] == [dict(msp_id='Org3MSP')]
+    assert plan['updated'] == [dict(
+        msp_id='Org2MSP',
+        changes=['/values/MSP/value/config/admins'],
+        certificates=dict(admins=dict(added=[hashlib.sha256(b'Org2MSP admin').hexdigest()], removed=[]))
+    )]
+    assert sorted(groups.keys()) == ['Org1MSP', 'Org2MSP', 'Org4MSP', 'Org5MSP']
+    assert groups['Org2MSP']['values']['MSP']['value']['config']['admins'] == [admin]
+    assert groups['Org4MSP']['values']['AnchorPeers']['value'] == dict(anchor_peers=[dict(host='peer0.org4.example.org', port=7051)])
+    assert 'Endorsement' in groups['Org4MSP']['policies']
+
+
+def test_reconcile_members_purge():
+    groups = dict(
+        Org1MSP=organization_to_msp(organization('Org1MSP')),
+        Org2MSP=organization_to_msp(organization('Org2MSP'))
+    )
+    plan = channel_utils.reconcile_members(groups, [dict(organization=organization('Org1MSP'))], False, purge=True)
+    assert plan['counts'] == dict(added=0, updated=0, removed=1, unchanged=1)
+    assert list(groups.keys()) == ['Org1MSP']
+
+
+def test_reconcile_members_keeps_unmanaged_values():
+    msp = organization_to_msp(organization('Org1MSP'))
+    msp['values']['AnchorPeers'] = dict(mod_policy='Admins', value=dict(anchor_peers=[dict(host='peer0', port=7051)]))
+    groups = dict(Org1MSP=msp)
+    policy = dict(type=1, value=dict(identities=[], rule=dict(n_out_of=dict(n=1, rules=[]))))
+    plan = channel_utils.reconcile_members(groups, [dict(organization=organization('Org1MSP'), policies=dict(Custom=policy))], False)
+    assert plan['updated'][0]['changes'] == ['/policies/Custom']
+    assert plan['updated'][0]['certificates'] == dict()
+    assert groups['Org1MSP']['values']['AnchorPeers']['value']['anchor_peers'] == [dict(host='peer0', port=7051)]
+    assert groups['Org1MSP']['policies']['Custom']['policy'] == policy
+
+
+def test_reconcile_members_duplicate():
+    with pytest.raises(Exception, match='specified more than once'):
+        channel_utils.reconcile_members(dict(), [dict(organization=organization('Org1MSP')), dict(organization=organization('Org1MSP'))], False)
+
+
+def test_reconcile_consortium_members():
+    config_json = dict(channel_group=dict(groups=dict(Consortiums=dict(groups=dict(SampleConsortium=dict(groups=dict())))), values=dict()))
+    plan = channel_utils.reconcile_consortium_members(config_json, [dict(organization=organization('Org1MSP'))])
+    assert plan['added'] == [dict(msp_id='Org1MSP')]
+    assert 'Org1MSP' in config_json['channel_group']['groups']['Consortiums']['groups']['SampleConsortium']['groups']
+    with pytest.raises(Exception, match='consortium OtherConsortium does not exist'):
+        channel_utils.reconcile_consortium_members(config_json, [], consortium='OtherConsortium')
+    with pytest.raises(Exception, match='not for the system channel'):
+        channel_utils.reconcile_consortium_members(dict(channel_group=dict(groups=dict())), [])
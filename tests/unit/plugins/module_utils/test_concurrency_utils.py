@@ -0,0 +1,100 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import concurrency_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.concurrency_utils import (
+    Backoff, poll_concurrently, run_concurrently)
+
+
+def test_run_concurrently_results_in_order():
+    def func(item):
+        if item == 3:
+            raise Exception('three')
+        return item * 2
+    results = run_concurrently(func, range(5), 3)
+    assert [result for (result, _) in results] == [0, 2, 4, None, 8]
+    assert [str(e) if e is not None else None for (_, e) in results] == [None, None, None, 'three', None]
+    assert run_concurrently(func, [], 3) == []
+
+
+def test_run_concurrently_limits_threads():
+    lock = threading.Lock()
+    running = [0, 0]
+    barrier = threading.Barrier(2)
+
+    def func(item):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        barrier.wait(timeout=5)
+        with lock:
+            running[0] -= 1
+    run_concurrently(func, range(6), 2)
+    assert running == [0, 2]
+
+
+def test_backoff():
+    backoff = Backoff(1, 5)
+    assert backoff.ready(0)
+    next_attempts = list()
+    for now in [0, 10, 20, 30, 40]:
+        backoff.failed(now)
+        next_attempts.append(backoff.next_attempt - now)
+    assert next_attempts == [1, 2, 4, 5, 5]
+    assert not backoff.ready(44)
+    assert backoff.ready(45)
+
+
+class FakeClock:
+
+    def __init__(self, monkeypatch):
+        self.now = 0
+        monkeypatch.setattr(concurrency_utils.time, 'monotonic', lambda: self.now)
+        monkeypatch.setattr(concurrency_utils.time, 'sleep', self.sleep)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_poll_concurrently(monkeypatch):
+
+    # Each item is ready at the time given by the item.
+    clock = FakeClock(monkeypatch)
+    polls = list()
+
+    def func(item):
+        polls.append((item, clock.now))
+        if item < 0:
+            raise Exception('broken')
+        return clock.now >= item
+    results = poll_concurrently(func, [0, 2, 5, -1], 10, 4)
+    assert [(result['ready'], result['elapsed'], result['attempts']) for result in results[:3]] == [(True, 0, 1), (True, 3, 3), (True, 7, 4)]
+    assert results[3]['ready'] is False
+    assert results[3]['attempts'] == 4
+    assert str(results[3]['error']) == 'broken'
+    assert [now for (item, now) in polls if item == 5] == [0, 1, 3, 7]
+    assert [now for (item, now) in polls if item == -1] == [0, 1, 3, 7]
+    assert clock.now == 10
+
+
+def test_poll_concurrently_required(monkeypatch):
+    FakeClock(monkeypatch)
+    results = poll_concurrently(lambda item: item, [True, False, False], 60, 3, required=1)
+    assert [result['ready'] for result in results] == [True, False, False]
+    assert [result['attempts'] for result in results] == [1, 1, 1]
+
+
+@pytest.mark.parametrize('items', [[], [True]])
+def test_poll_concurrently_no_waiting(monkeypatch, items):
+    clock = FakeClock(monkeypatch)
+    results = poll_concurrently(lambda item: item, items, 60, 3)
+    assert all(result['ready'] for result in results)
+    assert clock.now == 0
@@ -0,0 +1,168 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import random
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.dict_utils import (
+    changes_to_dict, copy_dict, diff_dicts, diff_paths, equal_dicts)
+
+CONFIG = dict(
+    channel_group=dict(
+        groups=dict(Application=dict(groups=dict(Org1MSP=dict(version='0')), mod_policy='Admins')),
+        values=dict(Capabilities=dict(value=dict(capabilities=dict(V2_0=dict())))),
+        version='1'
+    ),
+    sequence='3',
+    anchors=[dict(host='peer1', port=7051), dict(host='peer2', port=7051)],
+    enabled=True,
+    ratio=0.5,
+    missing=None
+)
+
+
+def json_round_trip(value):
+    return json.loads(json.dumps(value))
+
+
+def test_copy_dict_matches_json_round_trip():
+    copy = copy_dict(CONFIG)
+    assert copy == json_round_trip(CONFIG)
+    copy['channel_group']['groups']['Application']['groups']['Org1MSP']['version'] = '1'
+    copy['anchors'][0]['port'] = 7052
+    assert CONFIG['channel_group']['groups']['Application']['groups']['Org1MSP']['version'] == '0'
+    assert CONFIG['anchors'][0]['port'] == 7051
+
+
+@pytest.mark.parametrize('value', [
+    dict(tuple=(1, 2, (3, 4))),
+    {1: 'one', 'two': 2},
+    [True, 1, 1.5, None, 'str']
+])
+def test_copy_dict_converts_like_json(value):
+    assert copy_dict(value) == json_round_trip(value)
+
+
+def test_equal_dicts():
+    assert equal_dicts(CONFIG, json_round_trip(CONFIG))
+    assert equal_dicts(dict(value=(1, 2)), dict(value=[1, 2]))
+    assert equal_dicts({1: 'one'}, {'1': 'one'})
+    assert equal_dicts(dict(value=float('nan')), dict(value=float('nan')))
+
+
+@pytest.mark.parametrize('changed', [
+    dict(CONFIG, sequence='4'),
+    dict(CONFIG, enabled=1),
+    dict(CONFIG, ratio=1),
+    dict(CONFIG, missing=False),
+    dict(CONFIG, anchors=CONFIG['anchors'][:1]),
+    dict(CONFIG, extra='value'),
+    dict(CONFIG, channel_group=dict(CONFIG['channel_group'], version='2'))
+])
+def test_equal_dicts_differences(changed):
+    assert not equal_dicts(CONFIG, changed)
+    assert not equal_dicts(changed, CONFIG)
+    assert equal_dicts(changed, json_round_trip(changed))
+
+
+def random_value(rng, depth=0):
+    choice = rng.randrange(9 if depth < 3 else 6)
+    if choice == 0:
+        return None
+    elif choice == 1:
+        return rng.choice([True, False])
+    elif choice == 2:
+        return rng.choice([0, 1, -1])
+    elif choice == 3:
+        return rng.choice([0.0, 1.0, -0.0, 0.5])
+    elif choice == 4:
+        return rng.choice(['', 'a', 'b', '1'])
+    elif choice == 5:
+        return rng.choice([[], (), dict()])
+    elif choice == 6:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(3))]
+    elif choice == 7:
+        return tuple(random_value(rng, depth + 1) for _ in range(rng.randrange(3)))
+    keys = rng.choice([['a', 'b', '1'], [1, 2]])
+    return {rng.choice(keys): random_value(rng, depth + 1) for _ in range(rng.randrange(3))}
+
+
+def test_equal_dicts_matches_json():
+
+    # Small random values collide often, so both equal and unequal pairs are checked.
+    rng = random.Random(0)
+    results = set()
+    for _ in range(5000):
+        value1 = random_value(rng)
+        value2 = random_value(rng) if rng.random() < 0.5 else copy_dict(value1)
+        expected = json.dumps(value1, sort_keys=True) == json.dumps(value2, sort_keys=True)
+        assert equal_dicts(value1, value2) == expected, (value1, value2)
+        assert copy_dict(value1) == json_round_trip(value1)
+        results.add(expected)
+    assert results == {True, False}
+
+
+def test_diff_paths():
+    target = dict(name='peer1', resources=dict(peer=dict(cpu='100m', memory='200M')), tags=['a'], unchanged='value')
+    source = dict(resources=dict(peer=dict(cpu='200m', memory='200M'), couchdb=dict(cpu='50m')), tags=['a', 'b'], unchanged='value')
+    assert diff_paths(target, source) == [
+        dict(op='replace', path='/resources/peer/cpu', value='200m'),
+        dict(op='add', path='/resources/couchdb', value=dict(cpu='50m')),
+        dict(op='replace', path='/tags', value=['a', 'b'])
+    ]
+    assert diff_paths(target, source, removals=True)[-1] == dict(op='remove', path='/name')
+    assert diff_paths(target, target) == []
+
+
+def test_diff_paths_none_is_not_an_addition():
+    assert diff_paths(dict(), dict(name=None)) == []
+    assert diff_paths(dict(name='peer1'), dict(name=None)) == [dict(op='replace', path='/name', value=None)]
+
+
+def test_diff_paths_escapes_keys():
+    changes = diff_paths(dict(), {'a/b': {'c~d': 1}})
+    assert changes == [dict(op='add', path='/a~1b', value={'c~d': 1})]
+    changes = diff_paths({'a/b': {'c~d': 1}}, {'a/b': {'c~d': 2}})
+    assert changes == [dict(op='replace', path='/a~1b/c~0d', value=2)]
+    assert changes_to_dict(changes) == {'a/b': {'c~d': 2}}
+
+
+def test_diff_paths_deep():
+
+    # Deep structures are walked without recursion.
+    target = dict()
+    source = dict()
+    current_target = target
+    current_source = source
+    for _ in range(5000):
+        current_target['child'] = dict()
+        current_source['child'] = dict()
+        current_target = current_target['child']
+        current_source = current_source['child']
+    current_source['value'] = 1
+    changes = diff_paths(target, source)
+    assert len(changes) == 1
+    assert changes[0]['path'] == '/child' * 5000 + '/value'
+
+
+def test_changes_to_dict():
+    changes = [
+        dict(op='replace', path='/resources/peer/cpu', value='200m'),
+        dict(op='add', path='/resources/couchdb', value=dict(cpu='50m')),
+        dict(op='remove', path='/name'),
+        dict(op='replace', path='/tags', value=['a', 'b'])
+    ]
+    assert changes_to_dict(changes) == dict(resources=dict(peer=dict(cpu='200m'), couchdb=dict(cpu='50m')), tags=['a', 'b'])
+    assert changes_to_dict([]) == dict()
+
+
+def test_diff_dicts():
+    target = dict(resources=dict(peer=dict(cpu='100m', memory='200M')), version='2.2.5')
+    source = dict(resources=dict(peer=dict(cpu='200m', memory='200M')), version='2.2.5')
+    assert diff_dicts(target, source) == dict(resources=dict(peer=dict(cpu='200m')))
@@ -0,0 +1,123 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import file_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.file_utils import (
+    equal_files, get_private_cache_dir, get_temp_file, replace_file)
+
+
+@pytest.fixture
+def private_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    return tmp_path / f'fabric-ansible-collection-{os.getuid()}'
+
+
+def test_get_private_cache_dir(private_dir):
+    old_umask = os.umask(0o022)
+    try:
+        path = get_private_cache_dir('blocks')
+    finally:
+        os.umask(old_umask)
+    assert path == str(private_dir / 'blocks')
+    assert os.stat(private_dir).st_mode & 0o777 == 0o700
+    assert os.stat(path).st_mode & 0o777 == 0o700
+    assert get_private_cache_dir() == str(private_dir)
+
+
+def test_get_private_cache_dir_accessible_to_others(private_dir):
+    private_dir.mkdir()
+    private_dir.chmod(0o755)
+    with pytest.raises(Exception, match='is not a private directory'):
+        get_private_cache_dir()
+
+
+def test_get_private_cache_dir_symlink(private_dir, tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.mkdir(mode=0o700)
+    private_dir.symlink_to(target)
+    with pytest.raises(Exception, match='is not a private directory'):
+        get_private_cache_dir()
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_equal_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, 'COMPARE_CHUNK_SIZE', 4)
+    file1 = write(tmp_path / 'file1', b'0123456789')
+    assert equal_files(file1, write(tmp_path / 'file2', b'0123456789'))
+    assert not equal_files(file1, write(tmp_path / 'file3', b'012345678'))
+    assert not equal_files(file1, write(tmp_path / 'file4', b'0123456788'))
+    assert equal_files(write(tmp_path / 'file5', b''), write(tmp_path / 'file6', b''))
+
+
+def test_get_temp_file_with_mode(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        private = get_temp_file(str(tmp_path))
+        public = get_temp_file(str(tmp_path), 0o666)
+    finally:
+        os.umask(old_umask)
+    assert os.path.dirname(public) == str(tmp_path)
+    assert os.stat(private).st_mode & 0o777 == 0o600
+    assert os.stat(public).st_mode & 0o777 == 0o640
+    assert os.path.getsize(public) == 0
+
+
+def test_replace_file_unchanged(tmp_path):
+    target = write(tmp_path / 'target', b'block')
+    source = write(tmp_path / 'source', b'block')
+    inode = os.stat(target).st_ino
+    assert not replace_file(source, target)
+    assert not os.path.exists(source)
+    assert os.stat(target).st_ino == inode
+
+
+def test_replace_file_new(tmp_path):
+    source = write(tmp_path / 'source', b'block')
+    os.chmod(source, 0o640)
+    target = str(tmp_path / 'target')
+    assert replace_file(source, target)
+    assert not os.path.exists(source)
+    assert (tmp_path / 'target').read_bytes() == b'block'
+    assert os.stat(target).st_mode & 0o777 == 0o640
+
+
+def test_replace_file_keeps_mode(tmp_path):
+    target = write(tmp_path / 'target', b'old block')
+    os.chmod(target, 0o604)
+    source = write(tmp_path / 'source', b'new block')
+    assert replace_file(source, target)
+    assert (tmp_path / 'target').read_bytes() == b'new block'
+    assert os.stat(target).st_mode & 0o777 == 0o604
+
+
+def test_replace_file_symlink(tmp_path):
+    real = write(tmp_path / 'real', b'old block')
+    link = tmp_path / 'link'
+    link.symlink_to(real)
+    source = write(tmp_path / 'source', b'new block')
+    assert replace_file(source, str(link))
+    assert link.is_symlink()
+    assert (tmp_path / 'real').read_bytes() == b'new block'
+
+
+def test_replace_file_hard_link(tmp_path):
+    target = write(tmp_path / 'target', b'old block')
+    other = tmp_path / 'other'
+    os.link(target, other)
+    source = write(tmp_path / 'source', b'new block')
+    assert replace_file(source, target)
+    assert not os.path.exists(source)
+    assert other.read_bytes() == b'new block'
+    assert os.stat(target).st_ino == os.stat(other).st_ino
@@ -0,0 +1,160 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import health_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.health_utils import (
+    CIRCUIT_BREAKER_THRESHOLD, LATENCY_SAMPLES, RECOVERY_DOWN_INTERVAL, NodeScoreboard, wait_for_recovery)
+
+
+def test_rank_unknown_nodes_first(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    scoreboard.record_success('a', 'fetch', 2)
+    scoreboard.record_success('b', 'fetch', 1)
+    assert scoreboard.rank(['a', 'b', 'c'], 'fetch') == ['c', 'b', 'a']
+
+
+def test_rank_by_failures_then_latency(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    scoreboard.record_success('a', 'fetch', 1)
+    scoreboard.record_success('b', 'fetch', 5)
+    scoreboard.record_success('c', 'fetch', 0.5)
+    scoreboard.record_failure('c', 'fetch')
+    assert scoreboard.rank(['a', 'b', 'c'], 'fetch') == ['a', 'b', 'c']
+
+
+def test_rank_open_circuit_breaker_last(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    for _ in range(CIRCUIT_BREAKER_THRESHOLD):
+        scoreboard.record_failure('a', 'fetch')
+    scoreboard.record_failure('b', 'fetch')
+    scoreboard.record_failure('b', 'fetch')
+    assert scoreboard.is_open('a')
+    assert not scoreboard.is_open('b')
+    assert scoreboard.rank(['a', 'b'], 'fetch') == ['b', 'a']
+
+
+def test_rank_is_per_operation(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    scoreboard.record_success('a', 'fetch', 5)
+    scoreboard.record_success('b', 'fetch', 1)
+    scoreboard.record_success('a', 'update', 1)
+    scoreboard.record_success('b', 'update', 5)
+    assert scoreboard.rank(['a', 'b'], 'fetch') == ['b', 'a']
+    assert scoreboard.rank(['a', 'b'], 'update') == ['a', 'b']
+
+
+def test_success_resets_failures(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    for _ in range(CIRCUIT_BREAKER_THRESHOLD):
+        scoreboard.record_failure('a', 'fetch')
+    scoreboard.record_success('a', 'fetch', 1)
+    assert not scoreboard.is_open('a')
+
+
+def test_get_latency(tmp_path):
+    scoreboard = NodeScoreboard(str(tmp_path / 'scores.json'))
+    assert scoreboard.get_latency('a', 'fetch') is None
+    for latency in range(1, LATENCY_SAMPLES + 11):
+        scoreboard.record_success('a', 'fetch', latency)
+    # Only the most recent samples are kept.
+    assert scoreboard.get_latency('a', 'fetch', 0) == 11
+    assert scoreboard.get_latency('a', 'fetch', 50) == 20
+    assert scoreboard.get_latency('a', 'fetch', 100) == LATENCY_SAMPLES + 10
+
+
+def test_scores_loaded_lazily(tmp_path):
+    path = tmp_path / 'scores.json'
+    scoreboard = NodeScoreboard(str(path))
+    path.write_text(json.dumps(dict(a=dict(failures=0, opened_until=0, latencies=dict(fetch=[1])))))
+    assert scoreboard.get_latency('a', 'fetch') == 1
+
+
+def test_corrupt_scores_ignored(tmp_path):
+    path = tmp_path / 'scores.json'
+    path.write_text('{')
+    scoreboard = NodeScoreboard(str(path))
+    assert scoreboard.rank(['a', 'b'], 'fetch') == ['a', 'b']
+
+
+def test_save_merges_other_processes(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    scoreboard1 = NodeScoreboard(path)
+    scoreboard2 = NodeScoreboard(path)
+    scoreboard1.rank(['a', 'b'], 'fetch')
+    scoreboard2.rank(['a', 'b'], 'fetch')
+    scoreboard1.record_success('a', 'fetch', 1)
+    scoreboard2.record_success('b', 'fetch', 2)
+    scoreboard3 = NodeScoreboard(path)
+    assert scoreboard3.get_latency('a', 'fetch') == 1
+    assert scoreboard3.get_latency('b', 'fetch') == 2
+
+
+def test_default_path_is_private(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    scoreboard = NodeScoreboard()
+    scoreboard.record_success('a', 'fetch', 1)
+    directory = os.path.dirname(scoreboard.path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    assert os.path.exists(scoreboard.path)
+
+
+def test_untrusted_directory_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    directory = tmp_path / f'fabric-ansible-collection-{os.getuid()}'
+    directory.mkdir()
+    directory.chmod(0o777)
+    (directory / 'node-scores.json').write_text(json.dumps(dict(a=dict(failures=0, opened_until=0, latencies=dict(fetch=[1])))))
+    scoreboard = NodeScoreboard()
+    assert scoreboard.get_latency('a', 'fetch') is None
+    scoreboard.record_success('a', 'fetch', 5)
+    assert json.loads((directory / 'node-scores.json').read_text())['a']['latencies']['fetch'] == [1]
+
+
+class FakeComponent:
+
+    # A component that is healthy except between the down and up times, with a fake clock.
+    def __init__(self, monkeypatch, down=None, up=None):
+        self.now = 0
+        self.down = down
+        self.up = up
+        self.probes = list()
+        monkeypatch.setattr(health_utils.time, 'monotonic', lambda: self.now)
+        monkeypatch.setattr(health_utils.time, 'sleep', self.sleep)
+        monkeypatch.setattr(health_utils, 'check_healthz', self.check_healthz)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def check_healthz(self, operations_url, probe_timeout):
+        self.probes.append(self.now)
+        if self.down is not None and self.down <= self.now < self.up:
+            raise Exception('Connection refused')
+        return True
+
+
+def test_wait_for_recovery_short_restart(monkeypatch):
+    component = FakeComponent(monkeypatch, down=1, up=1.5)
+    assert wait_for_recovery('https://peer1:9443', 60) == pytest.approx(1.5)
+    intervals = [later - earlier for earlier, later in zip(component.probes, component.probes[1:])]
+    assert max(intervals[:5]) == pytest.approx(RECOVERY_DOWN_INTERVAL)
+
+
+def test_wait_for_recovery_not_down(monkeypatch):
+    FakeComponent(monkeypatch)
+    assert wait_for_recovery('https://peer1:9443', 60, down_timeout=5) == pytest.approx(5)
+
+
+def test_wait_for_recovery_timeout(monkeypatch):
+    FakeComponent(monkeypatch, down=1, up=120)
+    with pytest.raises(Exception, match='Component failed to recover within 60 seconds: Connection refused'):
+        wait_for_recovery('https://peer1:9443', 60)
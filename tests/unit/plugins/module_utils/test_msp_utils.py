@@ -0,0 +1,83 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import msp_utils
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.enrolled_identities import EnrolledIdentity
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.msp_utils import (
+    MSPPathCache, convert_identity_to_msp_path, get_identity_hash)
+
+
+def identity(name='admin', cert=b'cert', private_key=b'key', ca=b'ca', hsm=False):
+    return EnrolledIdentity(name, cert, private_key, ca, hsm)
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(msp_utils, 'get_ram_temp_dir', lambda: str(tmp_path))
+    return tmp_path
+
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def test_convert_identity_to_msp_path(temp_dir):
+    msp_path = convert_identity_to_msp_path(identity())
+    assert os.path.dirname(msp_path) == str(temp_dir)
+    assert read(os.path.join(msp_path, 'admincerts', 'cert.pem')) == b'cert'
+    assert read(os.path.join(msp_path, 'cacerts', 'cert.pem')) == b'ca'
+    assert read(os.path.join(msp_path, 'signcerts', 'cert.pem')) == b'cert'
+    assert read(os.path.join(msp_path, 'keystore', 'key.pem')) == b'key'
+
+
+def test_convert_identity_to_msp_path_no_ca():
+    with pytest.raises(Exception, match='does not have a CA field'):
+        convert_identity_to_msp_path(identity(ca=None))
+
+
+def test_get_identity_hash():
+
+    # The name does not matter, but everything that ends up in the MSP directory does.
+    assert get_identity_hash(identity()) == get_identity_hash(identity(name='other'))
+    assert get_identity_hash(identity()) != get_identity_hash(identity(hsm=True))
+    assert get_identity_hash(identity()) != get_identity_hash(identity(cert=b'certk', private_key=b'ey'))
+    assert get_identity_hash(identity(private_key=None)) == get_identity_hash(identity(private_key=b''))
+
+
+def test_msp_path_cache_shares_identical_identities(temp_dir):
+    cache = MSPPathCache()
+    msp_path1 = cache.acquire(identity())
+    msp_path2 = cache.acquire(identity(name='other'))
+    msp_path3 = cache.acquire(identity(cert=b'other cert'))
+    assert msp_path1 == msp_path2
+    assert msp_path1 != msp_path3
+    assert len(os.listdir(temp_dir)) == 2
+
+
+def test_msp_path_cache_removes_on_last_release():
+    cache = MSPPathCache()
+    msp_path = cache.acquire(identity())
+    cache.acquire(identity())
+    cache.release(msp_path)
+    assert os.path.isdir(msp_path)
+    cache.release(msp_path)
+    assert not os.path.exists(msp_path)
+    assert cache.entries == dict()
+    assert cache.paths == dict()
+    assert os.path.isdir(cache.acquire(identity()))
+
+
+def test_msp_path_cache_release_unknown_path(temp_dir):
+    cache = MSPPathCache()
+    msp_path = convert_identity_to_msp_path(identity())
+    cache.release(msp_path)
+    assert not os.path.exists(msp_path)
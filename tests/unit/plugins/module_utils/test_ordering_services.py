@@ -0,0 +1,95 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import ordering_services
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.file_utils import get_temp_file, replace_file
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.health_utils import NodeScoreboard
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.ordering_services import OrderingServiceConnection
+
+
+class FakeModule:
+
+    def json_log(self, data):
+        pass
+
+
+class FakeNodeConnection:
+
+    # Fetches a block by running a shell command that writes the block to the path.
+    retries = 1
+
+    def __init__(self, node):
+        self.node = node
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, tb):
+        pass
+
+    def start_fetch(self, channel, target, path, output):
+        return subprocess.Popen(['sh', '-c', f'printf {self.node.block} > "$0"', path], stdout=output, stderr=subprocess.STDOUT, text=True)
+
+
+class FakeNode:
+
+    consenter_proposal_fin = True
+
+    def __init__(self, api_url, block):
+        self.api_url = api_url
+        self.block = block
+
+    def connect(self, module, identity, msp_id, hsm, tls_handshake_time_shift):
+        return FakeNodeConnection(self)
+
+
+@pytest.fixture
+def connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(ordering_services, 'node_scoreboard', NodeScoreboard(str(tmp_path / 'scores.json')))
+    ordering_service = SimpleNamespace(nodes=[FakeNode('grpcs://orderer1:7050', 'block')])
+    return OrderingServiceConnection(FakeModule(), ordering_service, SimpleNamespace(hsm=False), 'OrdererMSP', False)
+
+
+@pytest.fixture
+def umask():
+    old_umask = os.umask(0o022)
+    yield
+    os.umask(old_umask)
+
+
+def test_fetch_new_file_mode(connection, tmp_path, umask):
+    path = tmp_path / 'block.bin'
+    connection.fetch('mychannel', 'config', str(path))
+    assert path.read_bytes() == b'block'
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert sorted(os.listdir(tmp_path)) == ['block.bin', 'scores.json', 'scores.json.lock']
+
+
+def test_fetch_keeps_existing_file_mode(connection, tmp_path, umask):
+    path = tmp_path / 'block.bin'
+    path.write_bytes(b'old block')
+    os.chmod(path, 0o600)
+    connection.fetch('mychannel', 'config', str(path))
+    assert path.read_bytes() == b'block'
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_fetch_then_replace_file_mode(connection, tmp_path, umask):
+
+    # This is how the channel_block module fetches a block to a new file.
+    path = tmp_path / 'channel.block'
+    temp = get_temp_file(str(tmp_path), 0o666)
+    connection.fetch('mychannel', 'config', temp)
+    assert replace_file(temp, str(path))
+    assert path.read_bytes() == b'block'
+    assert os.stat(path).st_mode & 0o777 == 0o644
@@ -0,0 +1,65 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from types import SimpleNamespace
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils import peers
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.peers import PeerConnection
+
+
+class FakeConnection(PeerConnection):
+
+    # A peer connection with a fake clock, where the chaincode is instantiated at a
+    # given time, and the peer either delivers blocks or refuses straight away.
+    def __init__(self, monkeypatch, instantiated_at, delivers):
+        super().__init__(None, None, SimpleNamespace(hsm=False), 'Org1MSP', None)
+        self.now = 0
+        self.instantiated_at = instantiated_at
+        self.delivers = delivers
+        self.blocks = list()
+        self.checks = list()
+        monkeypatch.setattr(peers.time, 'monotonic', lambda: self.now)
+        monkeypatch.setattr(peers.time, 'sleep', self.sleep)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def get_channel_height(self, channel):
+        return 10
+
+    def wait_for_block(self, channel, number, timeout):
+        self.blocks.append(number)
+        if not self.delivers:
+            return False
+        self.now += 2
+        return True
+
+    def list_instantiated_chaincodes(self, channel):
+        self.checks.append(self.now)
+        if self.now >= self.instantiated_at:
+            return [dict(name='fabcar', version='1.0')]
+        return []
+
+
+def test_wait_for_chaincode_waits_for_blocks(monkeypatch):
+    connection = FakeConnection(monkeypatch, 5, True)
+    assert connection.wait_for_chaincode('mychannel', 'fabcar', '1.0')
+    assert connection.blocks == [10, 11, 12]
+
+
+def test_wait_for_chaincode_falls_back_to_polling(monkeypatch):
+    connection = FakeConnection(monkeypatch, 20, False)
+    assert connection.wait_for_chaincode('mychannel', 'fabcar', '1.0', start_block=5)
+    assert connection.blocks == [5]
+    assert connection.checks == [0, 1, 3, 7, 12, 17, 22]
+
+
+def test_wait_for_chaincode_timeout(monkeypatch):
+    connection = FakeConnection(monkeypatch, 60, False)
+    assert not connection.wait_for_chaincode('mychannel', 'fabcar', '1.0', timeout=10)
+    assert connection.blocks == [10]
+    assert connection.checks[-1] == 10
@@ -0,0 +1,151 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import io
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.proto_utils import (
+    WIRE_TYPE_FIXED32, WIRE_TYPE_FIXED64, WIRE_TYPE_LENGTH_DELIMITED, WIRE_TYPE_VARINT,
+    get_block_config, get_block_info, get_fields, iterate_fields, read_varint)
+
+
+def varint(value):
+    result = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def field(number, value):
+    if isinstance(value, int):
+        return varint(number << 3 | WIRE_TYPE_VARINT) + varint(value)
+    return varint(number << 3 | WIRE_TYPE_LENGTH_DELIMITED) + varint(len(value)) + value
+
+
+def envelope(channel_id, config=None):
+
+    # A config transaction if there is a config (common.HeaderType.CONFIG), otherwise an endorser transaction.
+    channel_header = field(1, 1 if config is not None else 3) + field(4, channel_id.encode('utf-8'))
+    payload = field(1, field(1, channel_header))
+    if config is not None:
+        payload += field(2, field(1, config))
+    return field(1, payload) + field(2, b'signature')
+
+
+def block(number, data, metadata):
+    header = field(1, number) if number else b''
+    header += field(2, b'previous hash') + field(3, data_hash(data))
+    return field(1, header) + field(2, field(1, data)) + field(3, metadata)
+
+
+def data_hash(data):
+    return hashlib.sha256(data).digest()
+
+
+def v2_metadata(last_config):
+    last_config_message = field(1, last_config) if last_config else b''
+    orderer_block_metadata = field(1, last_config_message) + field(2, b'consenter metadata')
+    return field(1, field(1, orderer_block_metadata) + field(2, b'signatures')) + field(1, b'') + field(1, b'')
+
+
+def v1_metadata(last_config):
+    last_config_message = field(1, last_config) if last_config else b''
+    return field(1, field(2, b'signatures')) + field(1, field(1, last_config_message))
+
+
+def test_read_varint():
+    assert read_varint(io.BytesIO(varint(0))) == 0
+    assert read_varint(io.BytesIO(varint(300))) == 300
+    assert read_varint(io.BytesIO(varint(2 ** 63))) == 2 ** 63
+    assert read_varint(io.BytesIO(b'')) is None
+    with pytest.raises(Exception, match='Unexpected end of file'):
+        read_varint(io.BytesIO(b'\x80'))
+
+
+def test_iterate_fields_skips_unread_values():
+    message = field(1, 150) + field(2, b'skipped') + varint(3 << 3 | WIRE_TYPE_FIXED64) + b'12345678' + varint(4 << 3 | WIRE_TYPE_FIXED32) + b'1234' + field(5, b'read')
+    file = io.BytesIO(message)
+    fields = list()
+    for (field_number, wire_type, value) in iterate_fields(file):
+        if field_number == 5:
+            value = file.read(value)
+        fields.append((field_number, wire_type, value))
+    assert fields == [
+        (1, WIRE_TYPE_VARINT, 150),
+        (2, WIRE_TYPE_LENGTH_DELIMITED, 7),
+        (3, WIRE_TYPE_FIXED64, b'12345678'),
+        (4, WIRE_TYPE_FIXED32, b'1234'),
+        (5, WIRE_TYPE_LENGTH_DELIMITED, b'read')
+    ]
+
+
+def test_iterate_fields_stops_at_end():
+    file = io.BytesIO(field(1, field(2, 5)) + field(3, 7))
+    (_, _, length) = next(iterate_fields(file))
+    assert list(iterate_fields(file, file.tell() + length)) == [(2, WIRE_TYPE_VARINT, 5)]
+    assert list(iterate_fields(file)) == [(3, WIRE_TYPE_VARINT, 7)]
+
+
+def test_iterate_fields_unsupported_wire_type():
+    with pytest.raises(Exception, match='Unsupported protobuf wire type 3'):
+        list(iterate_fields(io.BytesIO(varint(1 << 3 | 3))))
+
+
+def test_get_fields_repeated():
+    assert get_fields(field(1, b'a') + field(2, 1) + field(1, b'b')) == {1: [b'a', b'b'], 2: [1]}
+
+
+def test_get_block_info_v2():
+    config = field(1, 3) + field(2, b'channel group')
+    config_envelope = envelope('mychannel', config)
+    config_block = block(7, config_envelope, v2_metadata(7))
+    assert get_block_info(config_block) == dict(number=7, data_hash=data_hash(config_envelope).hex(), last_config=7, channel_id='mychannel', type=1)
+    data_envelope = envelope('mychannel')
+    data_block = block(9, data_envelope, v2_metadata(7))
+    assert get_block_info(data_block) == dict(number=9, data_hash=data_hash(data_envelope).hex(), last_config=7, channel_id='mychannel', type=3)
+
+
+def test_get_block_info_v1():
+    data_envelope = envelope('mychannel')
+    data_block = block(9, data_envelope, v1_metadata(3))
+    assert get_block_info(data_block) == dict(number=9, data_hash=data_hash(data_envelope).hex(), last_config=3, channel_id='mychannel', type=3)
+
+
+def test_get_block_info_genesis_block():
+    genesis_envelope = envelope('mychannel', b'')
+    genesis_block = block(0, genesis_envelope, v2_metadata(0))
+    assert get_block_info(genesis_block) == dict(number=0, data_hash=data_hash(genesis_envelope).hex(), last_config=0, channel_id='mychannel', type=1)
+
+
+def test_get_block_info_config_block_without_metadata():
+
+    # The genesis block created by configtxgen does not have a last config index.
+    genesis_block = block(0, envelope('mychannel', b''), field(1, b'') + field(1, b''))
+    assert get_block_info(genesis_block)['last_config'] == 0
+
+
+def test_get_block_info_without_metadata():
+    assert get_block_info(field(1, field(1, 4))) == dict(number=4, data_hash=None, last_config=None, channel_id=None, type=None)
+
+
+def test_get_block_config():
+    config = field(1, 3) + field(2, b'channel group' * 1000)
+    assert get_block_config(block(7, envelope('mychannel', config), v2_metadata(7))) == config
+
+
+def test_get_block_config_not_config_block():
+    with pytest.raises(Exception, match='not a config block'):
+        get_block_config(block(9, envelope('mychannel'), v2_metadata(7)))
+    with pytest.raises(Exception, match='does not contain any data'):
+        get_block_config(field(1, field(1, 4)))
@@ -0,0 +1,157 @@
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.consoles import Console
+from ansible_collections.hyperledger.fabric_ansible_collection.plugins.module_utils.utils import ComponentListing, load_policy
+
+POLICY = dict(type=1, value=dict(identities=[], rule=dict(n_out_of=dict(n=1, rules=[]))))
+
+
+def test_load_policy_from_file(tmp_path):
+    path = tmp_path / 'policy.json'
+    path.write_text(json.dumps(POLICY))
+    assert load_policy('Admins', str(path)) == POLICY
+
+
+def test_load_policy_from_dict_is_copied():
+    policy = load_policy('Admins', POLICY)
+    assert policy == POLICY
+    policy['value']['rule']['n_out_of']['n'] = 2
+    assert POLICY['value']['rule']['n_out_of']['n'] == 1
+
+
+def test_load_policy_invalid():
+    with pytest.raises(Exception, match='The policy Admins is invalid'):
+        load_policy('Admins', 1)
+
+
+MSP = dict(
+    component=dict(tls_cert='tls cert'),
+    ca=dict(root_certs=['ca root cert']),
+    tlsca=dict(root_certs=['tls ca root cert'])
+)
+
+
+def node(component_type, name, **kwargs):
+    component = dict(
+        id=name.lower(),
+        type=component_type,
+        display_name=name,
+        api_url=f'grpcs://{name.lower()}:7051',
+        operations_url=f'https://{name.lower()}:9443',
+        grpcwp_url=f'https://{name.lower()}:7443',
+        msp_id='Org1MSP',
+        location='kubernetes',
+        msp=MSP,
+        imported=False
+    )
+    component.update(kwargs)
+    return component
+
+
+class FakeConsole:
+
+    extract_organization_info = Console.extract_organization_info
+    extract_peer_info = Console.extract_peer_info
+    extract_ordering_service_info = Console.extract_ordering_service_info
+    extract_ordering_service_node_info = Console.extract_ordering_service_node_info
+
+    def __init__(self):
+        self.requests = 0
+
+    def get_all_components(self, deployment_attrs):
+        assert deployment_attrs == 'omitted'
+        self.requests += 1
+        orderer = dict(system_channel_id='testchainid', cluster_id='os', cluster_name='Ordering Service')
+        return [
+            dict(id='org1', type='msp', display_name='Org1', msp_id='Org1MSP', fabric_node_ous=dict(enable=True)),
+            node('fabric-peer', 'Peer1'),
+            node('fabric-peer', 'Peer2'),
+            node('fabric-orderer', 'Orderer1', **orderer),
+            node('fabric-orderer', 'Orderer2', **orderer),
+            node('fabric-orderer', 'Orderer3', system_channel_id='testchainid', cluster_id='other', cluster_name='Other Ordering Service', msp_id='Org2MSP'),
+            node('fabric-ca', 'CA1'),
+            node('fabric-ca', 'Peer1')
+        ]
+
+
+class FakeModule:
+
+    def __init__(self, api_endpoint=None, **kwargs):
+        self.params = dict(api_endpoint=api_endpoint, certificate_authorities=[], peers=[], ordering_service_nodes=[])
+        self.params.update(kwargs)
+
+
+def test_component_listing_single_request():
+    console = FakeConsole()
+    listing = ComponentListing(FakeModule(), console)
+    assert listing.get_organization('Org1').msp_id == 'Org1MSP'
+    assert listing.get_peer('Peer2').api_url == 'grpcs://peer2:7051'
+    ordering_service = listing.get_ordering_service('Ordering Service')
+    assert [ordering_service_node.name for ordering_service_node in ordering_service.nodes] == ['Orderer1', 'Orderer2']
+    assert listing.get_ordering_service_node('Orderer3').cluster_name == 'Other Ordering Service'
+    assert console.requests == 1
+
+
+def test_component_listing_no_request_for_values():
+    listing = ComponentListing(FakeModule())
+    peer = dict(node('fabric-peer', 'Peer1'), name='Peer1', pem='pem', tls_ca_root_cert='tls ca root cert', tls_cert='tls cert', type='fabric-peer')
+    assert listing.get_peer(peer).name == 'Peer1'
+    with pytest.raises(Exception, match='api_endpoint must be specified'):
+        listing.get_peer('Peer1')
+
+
+def test_component_listing_missing():
+    listing = ComponentListing(FakeModule(), FakeConsole())
+    with pytest.raises(Exception, match='The organization Org2 does not exist'):
+        listing.get_organization('Org2')
+    with pytest.raises(Exception, match='The peer Peer3 does not exist'):
+        listing.get_peer('Peer3')
+    with pytest.raises(Exception, match='The ordering service Missing does not exist'):
+        listing.get_ordering_service('Missing')
+    with pytest.raises(Exception, match='The ordering service node Orderer4 does not exist'):
+        listing.get_ordering_service_node('Orderer4')
+
+
+def names(components):
+    return [(component['type'], component['display_name']) for component in components]
+
+
+def test_component_listing_requested_components():
+    console = FakeConsole()
+    module = FakeModule(certificate_authorities=['CA1'], peers=['Peer2', 'Peer2'], ordering_service_nodes=['Orderer3'])
+    listing = ComponentListing(module, console)
+    assert names(listing.get_requested_components()) == [('fabric-ca', 'CA1'), ('fabric-peer', 'Peer2'), ('fabric-orderer', 'Orderer3')]
+    assert names(listing.get_requested_components({'Org2MSP'})) == [('fabric-ca', 'CA1'), ('fabric-peer', 'Peer2'), ('fabric-orderer', 'Orderer3')]
+    assert names(listing.get_requested_components({'Org1MSP'})) == [
+        ('fabric-ca', 'CA1'),
+        ('fabric-peer', 'Peer2'),
+        ('fabric-orderer', 'Orderer3'),
+        ('fabric-peer', 'Peer1'),
+        ('fabric-orderer', 'Orderer1'),
+        ('fabric-orderer', 'Orderer2')
+    ]
+    assert console.requests == 1
+
+
+def test_component_listing_requested_components_missing():
+    listing = ComponentListing(FakeModule(peers=['Peer3']), FakeConsole())
+    with pytest.raises(Exception, match='The component Peer3 of type fabric-peer does not exist'):
+        listing.get_requested_components()
+
+
+def test_component_listing_find_components():
+    listing = ComponentListing(FakeModule(), FakeConsole())
+    types = ['fabric-ca', 'fabric-peer', 'fabric-orderer']
+    assert names(listing.find_components('Orderer1', types)) == [('fabric-orderer', 'Orderer1')]
+    assert names(listing.find_components('Peer1', types)) == [('fabric-peer', 'Peer1'), ('fabric-ca', 'Peer1')]
+    assert names(listing.find_components('Peer1', ['fabric-peer'])) == [('fabric-peer', 'Peer1')]
+    assert listing.find_components('Org1', types) == []